@@ -70,3 +70,20 @@ class TestHelloWorldThread(unittest.TestCase):
 @dont_run_with_thread
 class TestHelloWorldProcess(TestHelloWorldThread):
     concurrency = 'process'
+
+
+@dont_run_with_thread
+class TestHelloWorldReusePort(TestHelloWorldThread):
+    concurrency = 'process'
+
+    @classmethod
+    def name(cls):
+        return 'helloworld_reuse_port'
+
+    @classmethod
+    def setUpClass(cls):
+        s = server(name=cls.name(), concurrency=cls.concurrency,
+                   bind='127.0.0.1:0', workers=2, reuse_port=True)
+        cls.app = yield send('arbiter', 'run', s)
+        cls.uri = 'http://{0}:{1}'.format(*cls.app.address)
+        cls.client = HttpClient()
@@ -3,6 +3,7 @@ import math
 from datetime import timedelta
 from random import random
 from functools import reduce
+from threading import current_thread
 
 from pulsar import get_request_loop, async_sleep
 from pulsar.apps import tasks
@@ -48,6 +49,36 @@ class NotOverLap(tasks.Job):
         yield time.time() - start
 
 
+class CpuBound(tasks.Job):
+    '''A CPU-bound job executed in the process pool of the worker.'''
+    executor = 'process'
+
+    def __call__(self, consumer, n=100000, lag=0):
+        if lag:
+            time.sleep(lag)
+        return {'sum': sum((i*i for i in range(n))),
+                'process': consumer.worker is None}
+
+
+class LoopJob(tasks.Job):
+    '''An asynchronous job executed in the event loop of the worker.'''
+    executor = 'loop'
+
+    def __call__(self, consumer, lag=0.1):
+        yield async_sleep(lag)
+        yield consumer.worker.event_loop.tid == current_thread().ident
+
+
+class Serial(tasks.Job):
+    '''A job whose tasks are executed one at a time by a worker.'''
+    max_concurrency = 1
+
+    def __call__(self, consumer, lag=0.2):
+        start = time.time()
+        yield async_sleep(lag)
+        yield start, time.time()
+
+
 class CheckWorker(tasks.Job):
 
     def __call__(self, consumer):
@@ -1,5 +1,5 @@
 '''Tests the "taskqueue" example.'''
-from pulsar.apps.tasks import TaskBackend
+from pulsar.apps.tasks import TaskBackend, Job
 from pulsar.apps.test import unittest
 
 
@@ -13,3 +13,8 @@ class TestTaskClasses(unittest.TestCase):
         self.assertRaises(NotImplementedError, b.flush)
         self.assertEqual(b.processed, 0)
         self.assertEqual(b.max_tasks, 0)
+
+    def testJobExecutor(self):
+        self.assertEqual(Job.executor, 'thread')
+        self.assertRaises(ValueError, type(Job), 'BadJob', (Job,),
+                          {'executor': 'fork'})
@@ -1,10 +1,15 @@
 '''Tests the taskqueue local backend.'''
+import os
 from random import random
-from time import time
+from time import time, sleep
 
-from pulsar import send, get_application, multi_async
+from pulsar import (send, get_application, multi_async, async_sleep,
+                    get_actor, TimeoutError)
+from pulsar.utils.pep import pickle
 from pulsar.apps import tasks, rpc
-from pulsar.apps.test import unittest, dont_run_with_thread
+from pulsar.apps.tasks.backends.local import LocalTaskBackend
+from pulsar.apps.tasks.pool import ProcessPool
+from pulsar.apps.test import unittest, dont_run_with_thread, run_on_arbiter
 
 from .manage import server
 
@@ -17,6 +22,122 @@ def task_function(N = 10, lag = 0.1):
 '''
 
 
+def task_ids(tasks):
+    return sorted((task.id for task in tasks))
+
+
+class TestLocalTaskBackend(unittest.TestCase):
+
+    def backend(self, **params):
+        return LocalTaskBackend('test_local_task_backend', **params)
+
+    def test_task_slots(self):
+        task = tasks.Task('a', name='addition', status=tasks.QUEUED,
+                          user='pippo')
+        self.assertFalse(hasattr(task, '__dict__'))
+        task2 = pickle.loads(pickle.dumps(task))
+        self.assertEqual(task2.id, 'a')
+        self.assertEqual(task2.status, tasks.QUEUED)
+        self.assertEqual(task2.params, {'user': 'pippo'})
+        data = task.tojson()
+        self.assertEqual(data['name'], 'addition')
+        self.assertEqual(data['time_started'], None)
+
+    def test_indexes(self):
+        be = self.backend()
+        be.save_task('a', name='addition', status=tasks.PENDING)
+        be.save_task('b', name='addition', status=tasks.PENDING,
+                     overlap_id='x')
+        be.save_task('c', name='runpycode', status=tasks.PENDING,
+                     user='pippo')
+        be.save_task('a', status=tasks.QUEUED)
+        be.save_task('c', user='luca')
+        self.assertEqual(task_ids(be.get_tasks(name='addition')), ['a', 'b'])
+        self.assertEqual(task_ids(be.get_tasks(status=tasks.PENDING)),
+                         ['b', 'c'])
+        self.assertEqual(task_ids(be.get_tasks(status=tasks.QUEUED,
+                                               name='addition')), ['a'])
+        self.assertEqual(task_ids(be.get_tasks(
+            status=(tasks.QUEUED, tasks.PENDING), name='runpycode')), ['c'])
+        self.assertEqual(task_ids(be.get_tasks(overlap_id='x')), ['b'])
+        self.assertEqual(task_ids(be.get_tasks(user='luca')), ['c'])
+        self.assertEqual(task_ids(be.get_tasks(id=['a', 'd'],
+                                               name='addition')), ['a'])
+        self.assertEqual(be.get_tasks(), [])
+        self.assertEqual(be.delete_tasks(['a', 'd']), ['a'])
+        self.assertEqual(task_ids(be.get_tasks(name='addition')), ['b'])
+        self.assertEqual(be.get_tasks(status=tasks.QUEUED), [])
+        self.assertFalse(tasks.QUEUED in be._indexes['status'])
+
+    def test_max_ready_tasks(self):
+        be = self.backend(max_ready_tasks=2)
+        for id in 'abcd':
+            be.save_task(id, name='addition', status=tasks.STARTED)
+        for id in 'abc':
+            be.save_task(id, status=tasks.SUCCESS)
+        self.assertEqual(task_ids(be.get_tasks(name='addition')),
+                         ['b', 'c', 'd'])
+        self.assertEqual(task_ids(be.get_tasks(status=tasks.SUCCESS)),
+                         ['b', 'c'])
+
+    def test_task_ttl(self):
+        be = self.backend(task_ttl=0.1)
+        be.save_task('a', name='addition', status=tasks.SUCCESS)
+        be.save_task('b', name='addition', status=tasks.STARTED)
+        self.assertEqual(task_ids(be.get_tasks(name='addition')), ['a', 'b'])
+        yield async_sleep(0.2)
+        self.assertEqual(task_ids(be.get_tasks(name='addition')), ['b'])
+        self.assertFalse(tasks.SUCCESS in be._indexes['status'])
+
+    def test_weighted_lanes(self):
+        lanes = tasks.WeightedLanes()
+        picks = [lanes.next((9, 0)) for _ in range(11)]
+        self.assertEqual(picks.count(9), 10)
+        self.assertEqual(picks.count(0), 1)
+        self.assertEqual(picks[0], 9)
+        self.assertEqual(lanes.next(()), None)
+        self.assertEqual(lanes.next((3,)), 3)
+
+    def test_priority_lanes(self):
+        be = self.backend()
+        for id, priority in (('a', 0), ('b', 9), ('c', 9), ('d', 4)):
+            be.save_task(id, name='addition', status=tasks.PENDING,
+                         priority=priority)
+            yield be.put_task(id)
+        self.assertEqual(task_ids(be.get_tasks(status=tasks.QUEUED)),
+                         ['a', 'b', 'c', 'd'])
+        batch = yield be.get_tasks_batch(3, 1)
+        self.assertEqual([task.id for task in batch], ['b', 'd', 'c'])
+        batch = yield be.get_tasks_batch(3, 1)
+        self.assertEqual([task.id for task in batch], ['a'])
+        self.assertFalse(be.lanes)
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'Requires fork')
+class TestProcessPool(unittest.TestCase):
+
+    @run_on_arbiter
+    def test_max_replacements(self):
+        pool = ProcessPool(get_actor().event_loop, 1, max_replacements=1)
+        try:
+            pid = yield pool.apply(os.getpid)
+            self.assertNotEqual(pid, os.getpid())
+            self.assertFalse(pool.exhausted)
+            yield self.async.assertRaises(TimeoutError, pool.apply, sleep,
+                                          (5,), None, 0.1)
+            self.assertTrue(pool.exhausted)
+            # the killed process was replaced
+            pid2 = yield pool.apply(os.getpid)
+            self.assertNotEqual(pid2, pid)
+            yield self.async.assertRaises(TimeoutError, pool.apply, sleep,
+                                          (5,), None, 0.1)
+            # no more replacements, no processes left
+            self.assertEqual(pool.replacements, 1)
+            yield self.async.assertRaises(RuntimeError, pool.apply, os.getpid)
+        finally:
+            pool.close()
+
+
 class TaskQueueBase(object):
     concurrency = 'thread'
     schedule_periodic = True
@@ -44,6 +165,7 @@ class TaskQueueBase(object):
         s = server(name=cls.name(),
                    rpc_bind='127.0.0.1:0',
                    concurrent_tasks=cls.concurrent_tasks,
+                   task_processes=2,
                    concurrency=cls.concurrency,
                    rpc_concurrency=cls.concurrency,
                    rpc_keep_alive=cls.rpc_timeout,
@@ -174,6 +296,71 @@ class TestTaskQueueOnThread(TaskQueueBase, unittest.TestCase):
         self.assertEqual(r['status'], tasks.SUCCESS)
         self.assertEqual(r['result'], 90)
 
+    def test_run_tasks_burst(self):
+        '''More tasks than the backlog are polled in batches.'''
+        app = yield get_application(self.name())
+        N = 3*self.concurrent_tasks
+        ids = yield multi_async((app.backend.run('addition', a=n, b=1)
+                                 for n in range(N)))
+        self.assertEqual(len(set(ids)), N)
+        done = yield multi_async((app.backend.wait_for_task(id)
+                                  for id in ids))
+        for n, task in enumerate(done):
+            self.assertEqual(task.status, tasks.SUCCESS)
+            self.assertEqual(task.result, n + 1)
+
+    def test_run_process_job(self):
+        app = yield get_application(self.name())
+        sizes = (10, 100, 1000)
+        ids = yield multi_async((app.backend.run('cpubound', n=n)
+                                 for n in sizes))
+        done = yield multi_async((app.backend.wait_for_task(id)
+                                  for id in ids))
+        for n, task in zip(sizes, done):
+            self.assertEqual(task.status, tasks.SUCCESS)
+            self.assertEqual(task.result, {'sum': sum((i*i for i in range(n))),
+                                           'process': True})
+
+    def test_run_process_job_timeout(self):
+        r = yield self.proxy.run_new_task(jobname='cpubound', lag=5,
+                                          meta_data={'expiry': time() + 1})
+        r = yield self.proxy.wait_for_task(r)
+        self.assertEqual(r['status'], tasks.REVOKED)
+        # the killed process is replaced
+        r = yield self.proxy.run_new_task(jobname='cpubound', n=10)
+        r = yield self.proxy.wait_for_task(r)
+        self.assertEqual(r['status'], tasks.SUCCESS)
+        self.assertEqual(r['result']['sum'], 285)
+
+    def test_run_loop_job(self):
+        r = yield self.proxy.run_new_task(jobname='loopjob')
+        r = yield self.proxy.wait_for_task(r)
+        self.assertEqual(r['status'], tasks.SUCCESS)
+        self.assertEqual(r['result'], True)
+
+    def test_task_priority(self):
+        app = yield get_application(self.name())
+        id = yield app.backend.run_job('addition', (1, 2), priority=12)
+        task = yield app.backend.wait_for_task(id)
+        self.assertEqual(task.status, tasks.SUCCESS)
+        self.assertEqual(task.result, 3)
+        self.assertEqual(task.priority, 9)
+        id = yield app.backend.run('addition', 1, 3)
+        task = yield app.backend.wait_for_task(id)
+        self.assertEqual(task.priority, tasks.Job.priority)
+
+    def test_max_concurrency(self):
+        app = yield get_application(self.name())
+        ids = yield multi_async((app.backend.run('serial')
+                                 for _ in range(3)))
+        done = yield multi_async((app.backend.wait_for_task(id)
+                                  for id in ids))
+        for task in done:
+            self.assertEqual(task.status, tasks.SUCCESS)
+        intervals = sorted((task.result for task in done))
+        for previous, interval in zip(intervals, intervals[1:]):
+            self.assertTrue(previous[1] <= interval[0])
+
     def test_not_overlap(self):
         sec = 2 + random()
         app = yield get_application(self.name())
@@ -319,4 +506,4 @@ class TestTaskQueueOnThread(TaskQueueBase, unittest.TestCase):
 
 @dont_run_with_thread
 class TestTaskQueueOnProcess(TestTaskQueueOnThread):
-    concurrency = 'process'
+    concurrency = 'process'
@@ -1,10 +1,13 @@
 '''Tests the taskqueue redis backend.'''
-try:
-    import stdnet
-except ImportError:
-    stdnet = None
+from datetime import datetime
 
-from pulsar.apps.test import unittest
+from pulsar.apps.redis import Redis, NoScriptError
+from pulsar.apps.tasks import states, Job, backends
+from pulsar.apps.tasks.backends.redis import (encode_fields, decode_task,
+                                              RedisScript)
+from pulsar.apps.test import unittest, run_on_arbiter
+from pulsar.utils.internet import (parse_connection_string,
+                                   get_connection_string)
 
 from . import test_local
 
@@ -16,24 +19,174 @@ def redis_pubsub_test(self, app):
     self.assertFalse('name=%s' % app.name in con_str)
 
 
-@unittest.skipUnless(stdnet, 'Requires python-stdnet')
+def redis_server(cfg):
+    return cfg.backend_server or 'redis://127.0.0.1:6379'
+
+
+class ScriptClient(object):
+    '''A client with an empty script cache recording the commands.'''
+    def __init__(self, error=None):
+        self.error = error
+        self.commands = []
+        self.scripts = set()
+
+    def evalsha(self, sha, numkeys, *args):
+        self.commands.append('evalsha')
+        if self.error:
+            raise self.error
+        elif sha not in self.scripts:
+            raise NoScriptError('No matching script. Please use EVAL.')
+        return 'cached'
+
+    def eval(self, script, numkeys, *args):
+        self.commands.append('eval')
+        self.scripts.add(RedisScript(script).sha)
+        return 'loaded'
+
+
+class TestRedisTaskEncoding(unittest.TestCase):
+
+    def test_encode_decode(self):
+        now = datetime.now()
+        fields = encode_fields({'id': 'abc', 'name': 'addition',
+                                'status': states.QUEUED, 'overlap_id': '',
+                                'from_task': None, 'time_executed': now,
+                                'expiry': None, 'args': (1, 2),
+                                'kwargs': {'b': 3}, 'priority': 7,
+                                'user': 'pippo'})
+        self.assertEqual(len(fields), 22)
+        task = decode_task(dict(zip(fields[::2], fields[1::2])))
+        self.assertEqual(task.id, 'abc')
+        self.assertEqual(task.name, 'addition')
+        self.assertEqual(task.status, states.QUEUED)
+        self.assertEqual(task.overlap_id, '')
+        self.assertEqual(task.from_task, None)
+        self.assertEqual(task.time_executed, now)
+        self.assertEqual(task.expiry, None)
+        self.assertEqual(task.args, (1, 2))
+        self.assertEqual(task.kwargs, {'b': 3})
+        self.assertEqual(task.priority, 7)
+        self.assertEqual(task.params, {'user': 'pippo'})
+
+    def test_decode_times(self):
+        now = datetime.now()
+        fields = encode_fields({'id': 'abc', 'time_started': now,
+                                'time_ended': now, 'result': 5})
+        task = decode_task(dict(zip(fields[::2], fields[1::2])))
+        self.assertEqual(task.time_started, now)
+        self.assertEqual(task.time_ended, now)
+        self.assertEqual(task.result, 5)
+        self.assertEqual(task.priority, Job.priority)
+        self.assertFalse(task.params)
+
+    def test_decode_empty(self):
+        self.assertEqual(decode_task({}), None)
+
+
+@unittest.skipUnless(Redis, 'Requires redis-py')
+class TestRedisScript(unittest.TestCase):
+
+    def test_load_script(self):
+        script = RedisScript('return 1')
+        client = ScriptClient()
+        result = yield script(client, [], [])
+        self.assertEqual(result, 'loaded')
+        self.assertEqual(client.commands, ['evalsha', 'eval'])
+        result = yield script(client, [], [])
+        self.assertEqual(result, 'cached')
+        self.assertEqual(client.commands, ['evalsha', 'eval', 'evalsha'])
+
+    def test_script_error(self):
+        script = RedisScript('return 1')
+        client = ScriptClient(ValueError('script error'))
+        try:
+            yield script(client, [], [])
+        except ValueError:
+            pass
+        else:
+            assert False, 'ValueError not raised'
+        self.assertEqual(client.commands, ['evalsha'])
+
+
+@unittest.skipUnless(Redis, 'Requires redis-py')
+class TestRedisTaskBackend(unittest.TestCase):
+    '''Run the Lua scripts of the backend on the redis server.'''
+
+    def setUp(self):
+        # the tests run on the arbiter, which does not have the test cfg
+        self.server = redis_server(self.cfg)
+
+    def backend(self, name, **params):
+        scheme, address, query = parse_connection_string(self.server)
+        query.update(params)
+        return backends.TaskBackend.make(
+            get_connection_string(scheme, address, query), name=name)
+
+    @run_on_arbiter
+    def test_priority_lanes(self):
+        be = self.backend('redisscripts')
+        yield be.flush()
+        for id, priority in (('a', 0), ('b', 9), ('c', 9), ('d', 4)):
+            yield be.save_task(id, name='addition', status=states.PENDING,
+                               priority=priority)
+            result = yield be.put_task(id)
+            self.assertEqual(result, id)
+        result = yield be.put_task('e')
+        self.assertEqual(result, None)
+        size = yield be.num_tasks()
+        self.assertEqual(size, 4)
+        tasks = yield be.get_tasks(status=states.QUEUED)
+        self.assertEqual(sorted((t.id for t in tasks)), ['a', 'b', 'c', 'd'])
+        batch = yield be.get_tasks_batch(3)
+        self.assertEqual([t.id for t in batch], ['b', 'd', 'c'])
+        batch = yield be.get_tasks_batch(3)
+        self.assertEqual([t.id for t in batch], ['a'])
+        size = yield be.num_tasks()
+        self.assertEqual(size, 0)
+        yield be.save_task('a', status=states.SUCCESS)
+        tasks = yield be.get_tasks(status=states.SUCCESS)
+        self.assertEqual([t.id for t in tasks], ['a'])
+        tasks = yield be.get_tasks(status=states.QUEUED)
+        self.assertEqual(sorted((t.id for t in tasks)), ['b', 'c', 'd'])
+        deleted = yield be.delete_tasks(['a', 'b', 'x'])
+        self.assertEqual(sorted(deleted), ['a', 'b'])
+        tasks = yield be.get_tasks(name='addition')
+        self.assertEqual(sorted((t.id for t in tasks)), ['c', 'd'])
+        yield be.flush()
+
+    @run_on_arbiter
+    def test_reap(self):
+        be = self.backend('redisreap', visibility_timeout=0.001)
+        yield be.flush()
+        yield be.save_task('a', name='addition', status=states.PENDING)
+        yield be.put_task('a')
+        batch = yield be.get_tasks_batch(1)
+        self.assertEqual([t.id for t in batch], ['a'])
+        # the visibility deadline expired, the task is put back in its lane
+        batch = yield be.get_tasks_batch(1)
+        self.assertEqual([t.id for t in batch], ['a'])
+        self.assertEqual(batch[0].status, states.QUEUED)
+        yield be.flush()
+
+
+@unittest.skipUnless(Redis, 'Requires redis-py')
 class TestRedisTaskQueueOnThread(test_local.TestTaskQueueOnThread):
     #schedule_periodic = False
 
     @classmethod
     def task_backend(cls):
-        return cls.cfg.backend_server or 'redis://127.0.0.1:6379'
+        return redis_server(cls.cfg)
 
     def pubsub_test(self, app):
         redis_pubsub_test(self, app)
 
 
-@unittest.skipUnless(stdnet, 'Requires python-stdnet')
+@unittest.skipUnless(Redis, 'Requires redis-py')
 class TestRedisTaskQueueOnProcess(test_local.TestTaskQueueOnProcess):
 
     @classmethod
     def task_backend(cls):
-        return cls.cfg.backend_server or 'redis://127.0.0.1:6379'
+        return redis_server(cls.cfg)
 
     def pubsub_test(self, app):
         redis_pubsub_test(self, app)
@@ -42,12 +42,14 @@ import pulsar
 from pulsar.utils.internet import parse_connection_string
 
 try:
-    from .client import Redis, RedisProtocol, CRedisParser, Request
+    from .client import (Redis, RedisProtocol, CRedisParser, Request,
+                         NoScriptError)
 except ImportError:
     RedisProtocol = None
     RedisParser = None
     Redis = None
     Request = None
+    NoScriptError = None
 
 
 connection_info = namedtuple('connection_info', 'address db password timeout')
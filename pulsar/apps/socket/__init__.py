@@ -53,6 +53,17 @@ last read from the remote client, one can use the
 
 will close client connections which have been idle for 10 seconds.
 
+max_concurrent_connections
+-----------------------------
+To limit the number of concurrent client connections of each worker::
+
+    python script.py --max-concurrent-connections 1000
+
+once the limit is reached the worker stops accepting connections until
+some of the open ones are closed. The :ref:`max-accepts <setting-max_accepts>`
+setting controls how many pending connections are accepted every time the
+listening socket is ready.
+
 .. _socket-server-ssl:
 
 TLS/SSL support
@@ -95,6 +106,7 @@ for:
 Check the :meth:`SocketServer.monitor_start` method for implementation details.
 '''
 import os
+from functools import partial
 
 import pulsar
 from pulsar import TcpServer, multi_async
@@ -150,6 +162,53 @@ class Backlog(SocketSetting):
         """
 
 
+class MaxAccepts(SocketSetting):
+    name = "max_accepts"
+    flags = ["--max-accepts"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The maximum number of connections accepted each time the listening
+        socket is ready.
+
+        Accepting several pending connections in one event loop iteration
+        helps when many clients connect at once. If set to zero (the
+        default) a platform dependent value is used.
+        """
+
+
+class MaxConcurrentConnections(SocketSetting):
+    name = "max_concurrent_connections"
+    flags = ["--max-concurrent-connections"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The maximum number of concurrent client connections of a worker.
+
+        When reached, the worker stops accepting new connections until some
+        of the open ones are closed. Pending connections wait in the
+        ``backlog`` queue. If set to zero (the default) there is no limit.
+        """
+
+
+class ReusePort(SocketSetting):
+    name = "reuse_port"
+    flags = ["--reuse-port"]
+    action = "store_true"
+    default = False
+    validator = pulsar.validate_bool
+    desc = """\
+        Each worker listens on its own socket bound with ``SO_REUSEPORT``.
+
+        Rather than all workers accepting connections from one shared
+        socket, the kernel balances new connections across the workers
+        sockets. Requires Linux 3.9 or above and has no effect when the
+        server has no workers.
+        """
+
+
 class KeyFile(SocketSetting):
     name = "key_file"
     flags = ["--key-file"]
@@ -214,51 +273,96 @@ class SocketServer(pulsar.Application):
                 raise ValueError('key_file "%s" does not exist' % cfg.key_file)
             ssl = SSLContext(keyfile=cfg.key_file, certfile=cfg.cert_file)
         address = parse_address(self.cfg.address)
+        reuse_port = bool(cfg.reuse_port and cfg.workers)
         # First create the sockets
-        sockets = yield loop.start_serving(lambda: None, *address)
+        sockets = yield loop.start_serving(lambda: None, *address,
+                                           reuse_port=reuse_port)
         addresses = []
         for sock in sockets:
             assert loop.remove_reader(sock.fileno()), (
                 "Could not remove reader")
             addresses.append(sock.getsockname())
-        monitor.params.sockets = [WrapSocket(s) for s in sockets]
+        if reuse_port:
+            # Workers bind their own sockets to the resolved addresses
+            monitor.params.sockets = None
+            monitor.params.addresses = [(sock.family, sock.getsockname())
+                                        for sock in sockets]
+            for sock in sockets:
+                sock.close()
+        else:
+            monitor.params.sockets = [WrapSocket(s) for s in sockets]
         monitor.params.ssl = ssl
         self.addresses = addresses
         self.address = addresses[0]
 
     def worker_start(self, worker):
-        '''Start the worker by invoking the :meth:`create_server` method.'''
+        '''Start the worker by invoking the :meth:`create_server` method.
+
+        When the ``reuse_port`` setting is on, the worker binds its own
+        listening sockets to the server addresses.'''
         worker.servers[self.name] = servers = []
-        for sock in worker.params.sockets:
-            server = self.create_server(worker, sock.sock)
+        if worker.params.sockets is None:
+            loop = worker.event_loop
+            sockets = []
+            for family, address in worker.params.addresses:
+                socks = yield loop.start_serving(lambda: None, *address[:2],
+                                                 family=family,
+                                                 reuse_port=True)
+                for sock in socks:
+                    loop.remove_reader(sock.fileno())
+                    sockets.append(sock)
+        else:
+            sockets = [sock.sock for sock in worker.params.sockets]
+        for sock in sockets:
+            server = self.create_server(worker, sock)
             servers.append(server)
+            if self.cfg.max_requests:
+                server.bind_event('connection_made',
+                                  partial(self._max_requests, worker, server))
 
     def worker_stopping(self, worker):
+        '''Stop accepting connections and wait for requests in progress
+        for up to :ref:`graceful_timeout <setting-graceful_timeout>`
+        seconds.'''
         all = []
         for server in worker.servers[self.name]:
-            all.append(server.close_connections())
+            all.append(server.drain(self.cfg.graceful_timeout))
         return multi_async(all)
 
     def worker_info(self, worker, info):
         info['sockets'] = sockets = []
+        max_concurrent = self.cfg.max_concurrent_connections
         for server in worker.servers.get(self.name, ()):
             address = format_address(server.address)
             sockets.append({
                 'address': format_address(server.address),
                 'read_timeout': server.timeout,
                 'concurrent_connections': server.concurrent_connections,
+                'accepting': server.accepting,
                 'received_connections': server.received})
+            if max_concurrent:
+                load = server.concurrent_connections/float(max_concurrent)
+                info['load'] = max(info.get('load', 0), load)
 
     #   INTERNALS
+    def _max_requests(self, worker, server, connection):
+        # Ask the monitor for a replacement once the server has received
+        # max_requests connections
+        if server.received >= self.cfg.max_requests:
+            worker.recycle()
+        return connection
 
     def create_server(self, worker, sock, ssl=None):
         '''Create the Server Protocol which will listen for requests. It
 uses the :meth:`protocol_consumer` method as the protocol consumer factory.'''
         cfg = self.cfg
+        max_concurrent = cfg.max_concurrent_connections
         server = TcpServer(worker.event_loop,
                            sock=sock,
                            consumer_factory=self.protocol_consumer(),
                            max_connections=cfg.max_requests,
+                           max_concurrent_connections=max_concurrent,
+                           accepts=cfg.max_accepts,
                            timeout=cfg.keep_alive,
                            name=self.name)
         for event in ('connection_made', 'pre_request', 'post_request',
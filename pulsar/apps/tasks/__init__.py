@@ -126,6 +126,22 @@ class ConcurrentTasks(TaskSetting):
         """
 
 
+class TaskProcesses(TaskSetting):
+    name = "task_processes"
+    flags = ["--task-processes"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The number of processes forked by a worker to run CPU-bound jobs.
+
+        Only jobs with the ``process`` :attr:`.Job.executor` run in these
+        processes, which are forked when the worker starts if there are
+        such jobs. ``0`` (the default) forks one process per CPU, consider
+        a lower value when running several workers.
+        """
+
+
 class TaskBackendConnection(TaskSetting):
     name = "task_backend"
     flags = ["--task-backend"]
@@ -141,6 +157,36 @@ class TaskBackendConnection(TaskSetting):
         This parameters is used by :class:`.TaskQueue` application.'''
 
 
+class TaskTtl(TaskSetting):
+    name = "task_ttl"
+    flags = ["--task-ttl"]
+    validator = pulsar.validate_pos_float
+    type = float
+    default = 3600
+    desc = """\
+        Seconds a finished task is kept by the ``local://`` task backend.
+
+        Tasks in a :ref:`ready state <task-ready-state>` are removed from the
+        backend after this time. ``0`` keeps them until they are deleted.
+        """
+
+
+class MaxReadyTasks(TaskSetting):
+    name = "max_ready_tasks"
+    flags = ["--max-ready-tasks"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = 10000
+    desc = """\
+        Maximum number of finished tasks kept by the ``local://`` task
+        backend.
+
+        When the number of tasks in a :ref:`ready state <task-ready-state>`
+        exceeds this number, the oldest ones are removed. ``0`` does not
+        limit the number of finished tasks.
+        """
+
+
 class TaskPaths(TaskSetting):
     name = "task_paths"
     validator = pulsar.validate_list
@@ -197,7 +243,8 @@ class TaskQueue(pulsar.Application):
             task_paths=self.cfg.task_paths,
             schedule_periodic=self.cfg.schedule_periodic,
             max_tasks=self.cfg.max_requests,
-            backlog=self.cfg.concurrent_tasks)
+            backlog=self.cfg.concurrent_tasks,
+            processes=self.cfg.task_processes)
 
     def monitor_task(self, monitor):
         '''Override the :meth:`.Application.monitor_task` callback.
@@ -222,6 +269,9 @@ class TaskQueue(pulsar.Application):
         tasks = {'concurrent': list(be.concurrent_tasks),
                  'processed': be.processed}
         info['tasks'] = tasks
+        if self.cfg.concurrent_tasks:
+            load = len(be.concurrent_tasks)/float(self.cfg.concurrent_tasks)
+            info['load'] = max(info.get('load', 0), load)
 
 
 @command()
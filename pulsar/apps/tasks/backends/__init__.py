@@ -17,7 +17,7 @@ to start pulling tasks form the distributed task queue.
 
 Implementation
 ~~~~~~~~~~~~~~~~~
-When creating a new :class:`TaskBackend` there are six methods which must
+When creating a new :class:`TaskBackend` there are seven methods which must
 be implemented:
 
 * The :meth:`~TaskBackend.put_task` method, invoked when putting a new
@@ -26,6 +26,10 @@ be implemented:
   a :class:`Task` from the backend server.
 * The :meth:`~TaskBackend.get_tasks` method, invoked when retrieving
   a group of :class:`Task` from the backend server.
+* The :meth:`~TaskBackend.get_tasks_batch` method, invoked by task queue
+  workers when retrieving queued :class:`Task` for execution. Tasks are
+  taken from the :ref:`priority lanes <job-priority>` in the order given
+  by :class:`WeightedLanes`.
 * The :meth:`~TaskBackend.save_task` method, invoked when creating
   or updating a :class:`Task`.
 * The :meth:`~TaskBackend.delete_tasks` method, invoked when deleting
@@ -103,6 +107,13 @@ TaskConsumer
    :members:
    :member-order: bysource
 
+Weighted Lanes
+~~~~~~~~~~~~~~~~~~~
+
+.. autoclass:: WeightedLanes
+   :members:
+   :member-order: bysource
+
 Scheduler Entry
 ~~~~~~~~~~~~~~~~~~~
 
@@ -124,22 +135,26 @@ Redis Backend
 
 .. _redis: http://redis.io/
 '''
+import os
 import sys
 import logging
 from time import mktime
+from functools import partial
 from datetime import datetime, timedelta
 from threading import Lock
 
 from pulsar import (maybe_async, EMPTY_TUPLE, EMPTY_DICT, Failure,
-                    PulsarException, Backend, Deferred, coroutine_return)
-from pulsar.utils.pep import itervalues
-from pulsar.apps.tasks.models import JobRegistry
+                    PulsarException, Backend, Deferred, TimeoutError)
+from pulsar.utils.pep import itervalues, iteritems
+from pulsar.apps.tasks.models import (JobRegistry, MAX_PRIORITY,
+                                      DEFAULT_PRIORITY)
+from pulsar.apps.tasks.pool import ProcessPool
 from pulsar.apps.tasks import states, create_task_id
 from pulsar.apps import pubsub
 from pulsar.utils.log import local_property
 
 __all__ = ['Task', 'Backend', 'TaskBackend', 'TaskNotAvailable',
-           'nice_task_message', 'LOGGER']
+           'WeightedLanes', 'nice_task_message', 'LOGGER']
 
 LOGGER = logging.getLogger('pulsar.tasks')
 
@@ -209,12 +224,14 @@ class TaskConsumer(object):
 
     .. attribute:: worker
 
-        the :class:`.Actor` running the task worker.
+        the :class:`.Actor` running the task worker, ``None`` for
+        :ref:`jobs with the process executor <job-executor>`.
 
     .. attribute:: backend
 
         Access to the :class:`TaskBackend`. This is useful when creating
-        tasks from within a :ref:`job callable <job-callable>`.
+        tasks from within a :ref:`job callable <job-callable>`. ``None``
+        for :ref:`jobs with the process executor <job-executor>`.
     '''
     def __init__(self, backend, worker, task_id, job):
         self.backend = backend
@@ -264,12 +281,25 @@ class Task(object):
         Optional :attr:`Task.id` for the :class:`Task` which queued
         this :class:`Task`. This is a usuful for monitoring the creation
         of tasks within other tasks.
+
+    .. attribute:: priority
+
+        The :ref:`priority <job-priority>` of the task, an integer between
+        ``0`` and ``9``.
+
+    .. attribute:: params
+
+        Dictionary of additional parameters.
     '''
+    __slots__ = ('id', 'overlap_id', 'name', 'time_executed', 'time_started',
+                 'time_ended', 'expiry', 'args', 'kwargs', 'status',
+                 'from_task', 'result', 'priority', 'params')
     stack_trace = None
 
     def __init__(self, id, overlap_id='', name=None, time_executed=None,
                  expiry=None, args=None, kwargs=None, status=None,
-                 from_task=None, result=None, **params):
+                 from_task=None, result=None, priority=DEFAULT_PRIORITY,
+                 **params):
         self.id = id
         self.overlap_id = overlap_id
         self.name = name
@@ -282,12 +312,20 @@ class Task(object):
         self.kwargs = kwargs
         self.status = status
         self.result = result
+        self.priority = priority
         self.params = params
 
     def __repr__(self):
         return '%s (%s)' % (self.name, self.id)
     __str__ = __repr__
 
+    def __getstate__(self):
+        return dict(((name, getattr(self, name)) for name in self.__slots__))
+
+    def __setstate__(self, state):
+        for name, value in iteritems(state):
+            setattr(self, name, value)
+
     @property
     def status_code(self):
         '''Integer indicating :attr:`status` precedence.
@@ -320,7 +358,7 @@ Lower number higher precedence.'''
 
     def tojson(self):
         '''Convert the task instance into a JSON-serializable dictionary.'''
-        data = self.__dict__.copy()
+        data = self.__getstate__()
         data['expiry'] = totimestamp(data['expiry'])
         data['time_executed'] = totimestamp(data['time_executed'])
         data['time_started'] = totimestamp(data['time_started'])
@@ -328,6 +366,46 @@ Lower number higher precedence.'''
         return data
 
 
+def lane_weight(priority):
+    '''The weight of the queue lane of tasks with ``priority``.'''
+    return priority + 1
+
+
+class WeightedLanes(object):
+    '''Select the lane of the next queued task with a smooth weighted
+    round-robin.
+
+    At each :meth:`next` call, the credit of every non empty lane is
+    increased by its :func:`lane_weight` and the lane with the highest
+    credit is selected and its credit decreased by the sum of the weights.
+    Lanes are selected proportionally to their weight, evenly interleaved,
+    and the credit of empty lanes is reset.
+    '''
+    def __init__(self):
+        self.credits = {}
+
+    def next(self, lanes):
+        '''Return the lane of the next task from the non empty ``lanes``.
+
+        Ties are resolved in favour of the first lane, ``lanes`` should be
+        sorted by decreasing priority. Return ``None`` if ``lanes`` is
+        empty.'''
+        old = self.credits
+        credits = {}
+        best = None
+        total = 0
+        for lane in lanes:
+            weight = lane_weight(lane)
+            total += weight
+            credits[lane] = old.get(lane, 0) + weight
+            if best is None or credits[lane] > credits[best]:
+                best = lane
+        if best is not None:
+            credits[best] -= total
+        self.credits = credits
+        return best
+
+
 class PubSubClient(pubsub.Client):
 
     def __init__(self, be):
@@ -382,6 +460,13 @@ It also schedules the run of periodic tasks if enabled to do so.
 
     Default: ``2``.
 
+.. attribute:: processes
+
+    The number of processes in the :class:`.ProcessPool` of workers
+    running :ref:`jobs with the process executor <job-executor>`. Passed by
+    the task-queue application
+    :ref:`task processes setting <setting-task_processes>`.
+
 .. attribute:: processed
 
     The number of tasks processed (so far) by the worker running this backend.
@@ -389,10 +474,11 @@ It also schedules the run of periodic tasks if enabled to do so.
 
 '''
     def setup(self, task_paths=None, schedule_periodic=False, backlog=1,
-              max_tasks=0, poll_timeout=None, **params):
+              max_tasks=0, poll_timeout=None, processes=0, **params):
         self.task_paths = task_paths
         self.backlog = backlog
         self.max_tasks = max_tasks
+        self.processes = processes
         self.poll_timeout = max(poll_timeout or 0, 2)
         self.processed = 0
         self.local.schedule_periodic = schedule_periodic
@@ -445,6 +531,12 @@ information.
         '''The number of :attr:`concurrent_tasks`.'''
         return len(self.concurrent_tasks)
 
+    @local_property
+    def concurrent_jobs(self):
+        '''Dictionary of the number of :attr:`concurrent_tasks` by
+        :attr:`.Job.name`, used to enforce :attr:`.Job.max_concurrency`.'''
+        return {}
+
     @local_property
     def entries(self):
         return self._setup_schedule()
@@ -488,6 +580,9 @@ its execution. It returns a :class:`.Deferred`.'''
         # make sure we are subscribed to the task_done channel
         def _():
             self.pubsub
+            # register the callback before retrieving the task so that
+            # a task_done message received in between is not lost
+            when_done = self.get_callback(task_id)
             task = yield self.get_task(task_id)
             if task:
                 if task.done():  # task done, simply return it
@@ -496,7 +591,9 @@ its execution. It returns a :class:`.Deferred`.'''
                         when_done.callback(task)
                     yield task
                 else:
-                    yield self.get_callback(task_id)
+                    yield when_done
+            else:
+                self.pop_callback(task_id)
         return maybe_async(_(), timeout=timeout, get_result=False)
 
     ########################################################################
@@ -506,8 +603,18 @@ its execution. It returns a :class:`.Deferred`.'''
         '''invoked by the task queue ``worker`` when it starts.
 
         Here, the ``worker`` creates its thread pool via
-        :meth:`.Actor.create_thread_pool` and register the
-        :meth:`may_pool_task` callback in its event loop.'''
+        :meth:`.Actor.create_thread_pool`, forks its :class:`.ProcessPool`
+        if there are :ref:`jobs with the process executor <job-executor>`
+        and register the :meth:`may_pool_task` callback in its event
+        loop.'''
+        if any((job.executor == 'process' for job in
+                itervalues(self.registry))):
+            if hasattr(os, 'fork'):
+                self.local.process_pool = ProcessPool(
+                    worker.event_loop, self.processes, worker.logger)
+            else:
+                worker.logger.warning('Cannot fork processes, jobs with '
+                                      'the process executor run in threads')
         worker.create_thread_pool()
         self.local.task_poller = worker.event_loop.call_soon(
             self.may_pool_task, worker)
@@ -521,6 +628,8 @@ its execution. It returns a :class:`.Deferred`.'''
         if self.local.task_poller:
             self.local.task_poller.cancel()
             worker.logger.debug('stopped polling tasks')
+        if self.local.process_pool:
+            self.local.process_pool.close()
 
     ########################################################################
     ##    ABSTRACT METHODS
@@ -557,6 +666,19 @@ by subclasses.
         **Must be implemented by subclasses.**'''
         raise NotImplementedError
 
+    def get_tasks_batch(self, size):
+        '''Retrieve up to ``size`` queued :class:`Task` in one call.
+
+It waits at most :attr:`poll_timeout` seconds for the first task to be
+available and it does not wait for the others.
+
+:param size: the maximum number of tasks to retrieve.
+:return: a list of :class:`Task`, empty if no task was queued.
+
+**Must be implemented by subclasses.**
+'''
+        raise NotImplementedError
+
     def save_task(self, task_id, **params):
         '''Create or update a :class:`Task` with ``task_id`` and key-valued
 parameters ``params``.
@@ -642,12 +764,16 @@ value ``now`` can be passed.'''
                     expiry = get_datetime(expiry, time_executed)
                 elif job.timeout:
                     expiry = get_datetime(job.timeout, time_executed)
+                priority = params.pop('priority', None)
+                if priority is None:
+                    priority = job.priority
+                priority = min(max(int(priority), 0), MAX_PRIORITY)
                 LOGGER.debug('Queue new task %s (%s).', job.name, task_id)
                 yield self.save_task(task_id, overlap_id=overlap_id,
                                      name=job.name,
                                      time_executed=time_executed,
                                      expiry=expiry, args=targs,
-                                     kwargs=tkwargs,
+                                     kwargs=tkwargs, priority=priority,
                                      status=states.PENDING, **params)
                 pubsub.publish(self.channel('task_created'), task_id)
         else:
@@ -707,35 +833,125 @@ value ``now`` can be passed.'''
     def may_pool_task(self, worker):
         '''Called in the ``worker`` event loop.
 
-        It pools a new task if possible, and add it to the queue of
-        tasks consumed by the ``worker`` CPU-bound thread.'''
+        It pools as many tasks as there are free slots in the :attr:`backlog`
+        with one :meth:`get_tasks_batch` call, and add them to the queue of
+        tasks consumed by the ``worker`` CPU-bound thread. When the backlog
+        is full, the next poll is triggered by a task finishing its
+        execution. Tasks of jobs already running :attr:`.Job.max_concurrency`
+        tasks are put back into the queue. The ``worker`` is recycled after
+        :attr:`max_tasks` tasks or when its :class:`.ProcessPool` is
+        :attr:`~.ProcessPool.exhausted`.'''
         next_time = 0
         if worker.is_running():
             thread_pool = worker.thread_pool
             if not thread_pool:
                 worker.logger.warning('No thread pool, cannot poll tasks.')
             elif self.num_concurrent_tasks < self.backlog:
+                pool = self.local.process_pool
+                restart = None
                 if self.max_tasks and self.processed >= self.max_tasks:
-                    if not self.num_concurrent_tasks:
-                        worker.logger.warning(
-                            'Processed %s tasks. Restarting.')
-                        worker.stop()
-                        coroutine_return()
+                    restart = 'Processed %s tasks' % self.processed
+                elif pool and pool.exhausted:
+                    # Forking after the thread pool started is not safe,
+                    # restart the worker to fork a new process pool
+                    restart = '%s cannot replace processes' % pool
+                if restart:
+                    if self.num_concurrent_tasks:
+                        self.local.poll_on_done = True
+                        return
+                    if worker.recycle():
+                        worker.logger.warning('%s. Restarting.', restart)
+                    next_time = 1
                 else:
-                    task = yield self.get_task()
-                    if task:    # Got a new task
+                    size = self.backlog - self.num_concurrent_tasks
+                    if self.max_tasks:
+                        size = min(size, self.max_tasks - self.processed)
+                    tasks = yield self.get_tasks_batch(size)
+                    started = 0
+                    for task in tasks or ():
+                        if self._max_concurrency(task):
+                            yield self.put_task(task.id)
+                            continue
+                        started += 1
                         self.processed += 1
                         self.concurrent_tasks.add(task.id)
-                        thread_pool.apply(self._execute_task, worker, task)
+                        jobs = self.concurrent_jobs
+                        jobs[task.name] = jobs.get(task.name, 0) + 1
+                        d = self._apply(worker, thread_pool, task)
+                        d.add_both(partial(self._task_finished, worker,
+                                           task.name))
+                    if tasks and not started:
+                        # All tasks were put back, wait for a running task
+                        # of their jobs to finish
+                        self.local.poll_on_done = True
+                        return
             else:
-                worker.logger.info('%s concurrent requests. Cannot poll.',
-                                   self.num_concurrent_tasks)
-                next_time = 1
+                worker.logger.debug('%s concurrent tasks. Wait for one to '
+                                    'finish before polling.',
+                                    self.num_concurrent_tasks)
+                self.local.poll_on_done = True
+                return
         worker.event_loop.call_later(next_time, self.may_pool_task, worker)
 
+    def _apply(self, worker, thread_pool, task):
+        # Execute the task in the thread pool unless its job executor is
+        # the event loop or a process pool is available
+        job = self.registry.get(task.name)
+        executor = job.executor if job else 'thread'
+        if executor == 'loop' or (executor == 'process' and
+                                  self.local.process_pool):
+            return maybe_async(self._execute_task(worker, task),
+                               event_loop=worker.event_loop,
+                               get_result=False)
+        else:
+            return thread_pool.apply(self._execute_task, worker, task)
+
+    def _run_job(self, consumer, task):
+        job = consumer.job
+        pool = self.local.process_pool
+        if job.executor == 'process' and pool:
+            timeout = None
+            if task.expiry:
+                timeout = timedelta_seconds(task.expiry - datetime.now())
+            remote = TaskConsumer(None, None, task.id, job)
+            d = pool.apply(job, (remote,) + tuple(task.args), task.kwargs,
+                           timeout)
+            return d.add_errback(self._process_timeout)
+        else:
+            return job(consumer, *task.args, **task.kwargs)
+
+    def _process_timeout(self, failure):
+        if failure.isinstance(TimeoutError):
+            failure.mute()
+            raise TaskTimeout
+        return failure
+
+    def _max_concurrency(self, task):
+        # True if the job of task is running its maximum number of tasks
+        job = self.registry.get(task.name)
+        return bool(job and job.max_concurrency and
+                    self.concurrent_jobs.get(task.name, 0) >=
+                    job.max_concurrency)
+
+    def _task_finished(self, worker, jobname, result):
+        # Called in the thread pool when a task has finished its execution
+        worker.event_loop.call_soon_threadsafe(self._poll_on_done, worker,
+                                               jobname)
+        return result
+
+    def _poll_on_done(self, worker, jobname):
+        jobs = self.concurrent_jobs
+        jobs[jobname] -= 1
+        if not jobs[jobname]:
+            jobs.pop(jobname)
+        if self.local.poll_on_done:
+            self.local.poll_on_done = False
+            worker.event_loop.call_soon(self.may_pool_task, worker)
+
     def _execute_task(self, worker, task):
-        #Asynchronous execution of a Task. This method is called
-        #on a separate thread of execution from the worker event loop thread.
+        #Asynchronous execution of a Task. This method is called on a
+        #thread of the thread pool or, depending on the job executor, in the
+        #worker event loop.
         pubsub = self.pubsub
         task_id = task.id
         result = None
@@ -756,7 +972,7 @@ value ``now`` can be passed.'''
                     yield self.save_task(task_id, status=states.STARTED,
                                          time_started=time_ended)
                     pubsub.publish(self.channel('task_start'), task_id)
-                    result = yield job(consumer, *task.args, **task.kwargs)
+                    result = yield self._run_job(consumer, task)
                     time_ended = datetime.now()
             else:
                 consumer = None
@@ -1,12 +1,37 @@
 '''
 The local task backend store tasks in pulsar process domain and therefore
 is accessed only from one running task queue.
+
+Tasks are indexed by ``name``, ``status``, ``overlap_id`` and ``from_task``
+so that :meth:`TaskBackend.get_tasks` filtering on these fields does not
+scan all tasks. Finished tasks are removed after
+:ref:`task_ttl <setting-task_ttl>` seconds or when there are more than
+:ref:`max_ready_tasks <setting-max_ready_tasks>` of them.
+
+Queued task ids are kept in a ``deque`` for each
+:ref:`priority <job-priority>` and a :class:`.Queue` holds one item for
+each queued task, so that workers can wait for tasks. The lane of the next
+task is selected by a :class:`.WeightedLanes`.
 '''
+from time import time
+from collections import deque
+
 from pulsar import send, command, Queue, Empty, coroutine_return
-from pulsar.utils.pep import itervalues
+from pulsar.utils.pep import itervalues, iteritems
+from pulsar.utils.structures import OrderedDict
 from pulsar.apps.tasks import backends, states
 from pulsar.apps.pubsub import PubSub
 
+INDEXED_FIELDS = ('name', 'status', 'overlap_id', 'from_task')
+TASK_FIELDS = frozenset(backends.Task.__slots__)
+
+
+def task_field(task, name):
+    if name in TASK_FIELDS:
+        return getattr(task, name)
+    else:
+        return task.params.get(name)
+
 
 class TaskBackend(backends.TaskBackend):
 
@@ -20,6 +45,9 @@ class TaskBackend(backends.TaskBackend):
     def get_tasks(self, **filters):
         return send(self.name, 'get_tasks', **filters)
 
+    def get_tasks_batch(self, size):
+        return send(self.name, 'get_tasks_batch', size, self.poll_timeout)
+
     def save_task(self, task_id, **params):
         return send(self.name, 'save_task', task_id, **params)
 
@@ -33,33 +61,67 @@ class TaskBackend(backends.TaskBackend):
 #########################################################    INTERNALS
 class LocalTaskBackend(object):
 
-    def __init__(self, name):
+    def __init__(self, name, task_ttl=0, max_ready_tasks=0):
         self.pubsub = PubSub(name=name)
+        self.task_ttl = task_ttl
+        self.max_ready_tasks = max_ready_tasks
         self._init()
 
     def put_task(self, task_id):
         if task_id in self._tasks:
             task = self._tasks[task_id]
-            task.status = states.QUEUED
+            self.save_task(task_id, status=states.QUEUED)
+            lane = self.lanes.get(task.priority)
+            if lane is None:
+                self.lanes[task.priority] = lane = deque()
+            lane.append(task.id)
             yield self.queue.put(task.id)
             yield task.id
 
     def get_task(self, task_id, timeout):
         if not task_id:
             try:
-                task_id = yield self.queue.get(timeout)
+                yield self.queue.get(timeout)
             except Empty:
                 coroutine_return()
+            task_id = self._pop()
         yield self._tasks.get(task_id)
 
+    def get_tasks_batch(self, size, timeout):
+        tasks = []
+        task = yield self.get_task(None, timeout)
+        if task:
+            tasks.append(task)
+            queue = self.queue
+            while len(tasks) < size and queue.qsize():
+                queue.get_nowait()
+                task = self._tasks.get(self._pop())
+                if task:
+                    tasks.append(task)
+        yield tasks
+
     def save_task(self, task_id, **params):
         task = self._tasks.get(task_id)
         if task:
-            for field, value in params.items():
-                setattr(task, field, value)
+            for field, value in iteritems(params):
+                if field in self._indexes:
+                    self._unindex(task, field)
+                if field in TASK_FIELDS:
+                    setattr(task, field, value)
+                else:
+                    task.params[field] = value
+                if field in self._indexes:
+                    self._index(task, field)
         else:   # create a new task
             task = backends.Task(task_id, **params)
             self._tasks[task.id] = task
+            for field in self._indexes:
+                self._index(task, field)
+        if 'status' in params:
+            self._ready.pop(task.id, None)
+            if task.done():
+                self._ready[task.id] = time()
+        self._evict()
         return task.id
 
     def delete_tasks(self, ids):
@@ -67,36 +129,97 @@ class LocalTaskBackend(object):
             deleted = list(self._tasks)
             self._init()
         else:
-            deleted = []
-            for id in ids:
-                task = self._tasks.pop(id, None)
-                if task:
-                    deleted.append(id)
+            deleted = [id for id in ids if self._remove(id)]
         return deleted
 
     def get_tasks(self, **filters):
-        tasks = []
-        if filters:
-            fs = []
-            for name, value in filters.items():
-                if not isinstance(value, (list, tuple, set, frozenset)):
-                    value = (value,)
-                fs.append((name, value))
-            # Loop over tasks
-            for task in itervalues(self._tasks):
-                select = True
-                for name, values in fs:
-                    value = getattr(task, name, None)
-                    if value not in values:
-                        select = False
-                        break
-                if select:
-                    tasks.append(task)
-        return tasks
+        self._evict()
+        if not filters:
+            return []
+        ids = None
+        scan = []
+        for name, values in iteritems(filters):
+            if not isinstance(values, (list, tuple, set, frozenset)):
+                values = (values,)
+            if name == 'id':
+                selected = set(values)
+            elif name in self._indexes:
+                index = self._indexes[name]
+                selected = set()
+                for value in values:
+                    selected.update(index.get(value, ()))
+            else:
+                scan.append((name, values))
+                continue
+            ids = selected if ids is None else ids & selected
+        all_tasks = self._tasks
+        if ids is None:
+            tasks = itervalues(all_tasks)
+        else:
+            tasks = (all_tasks[id] for id in ids if id in all_tasks)
+        return [task for task in tasks
+                if all((task_field(task, name) in values
+                        for name, values in scan))]
 
     def _init(self):
         self._tasks = {}
+        self._indexes = dict(((field, {}) for field in INDEXED_FIELDS))
+        # ids of tasks in a ready state ordered by the time they finished
+        self._ready = OrderedDict()
         self.queue = Queue()
+        self.lanes = {}
+        self.weighted_lanes = backends.WeightedLanes()
+
+    def _pop(self):
+        # Pop a task id from the lane selected by the weighted round-robin
+        lanes = self.lanes
+        lane = self.weighted_lanes.next(sorted(lanes, reverse=True))
+        ids = lanes[lane]
+        task_id = ids.popleft()
+        if not ids:
+            lanes.pop(lane)
+        return task_id
+
+    def _index(self, task, field):
+        value = task_field(task, field)
+        index = self._indexes[field]
+        if value in index:
+            index[value].add(task.id)
+        else:
+            index[value] = set((task.id,))
+
+    def _unindex(self, task, field):
+        value = task_field(task, field)
+        index = self._indexes[field]
+        ids = index.get(value)
+        if ids:
+            ids.discard(task.id)
+            if not ids:
+                index.pop(value)
+
+    def _remove(self, task_id):
+        task = self._tasks.pop(task_id, None)
+        if task:
+            for field in self._indexes:
+                self._unindex(task, field)
+            self._ready.pop(task_id, None)
+            return task
+
+    def _evict(self):
+        # Remove tasks which finished more than task_ttl seconds ago and
+        # the oldest finished tasks above max_ready_tasks
+        ready = self._ready
+        ttl = self.task_ttl
+        max_ready = self.max_ready_tasks
+        if ready:
+            expired = time() - ttl
+            while ready:
+                task_id = next(iter(ready))
+                if ((max_ready and len(ready) > max_ready) or
+                        (ttl and ready[task_id] <= expired)):
+                    self._remove(task_id)
+                else:
+                    break
 
 
 #################################################    TASKQUEUE COMMANDS
@@ -115,6 +238,11 @@ def get_task(request, task_id=None, timeout=1):
     return _get_tasks(request.actor).get_task(task_id, timeout)
 
 
+@command()
+def get_tasks_batch(request, size=1, timeout=1):
+    return _get_tasks(request.actor).get_tasks_batch(size, timeout)
+
+
 @command()
 def get_tasks(request, **filters):
     return _get_tasks(request.actor).get_tasks(**filters)
@@ -128,5 +256,9 @@ def put_task(request, task_id):
 def _get_tasks(actor):
     tasks = getattr(actor, '_TASKQUEUE_TASKS', None)
     if tasks is None:
-        actor._TASKQUEUE_TASKS = tasks = LocalTaskBackend(name=actor.name)
+        cfg = actor.cfg
+        tasks = LocalTaskBackend(name=actor.name,
+                                 task_ttl=cfg.get('task_ttl', 0),
+                                 max_ready_tasks=cfg.get('max_ready_tasks', 0))
+        actor._TASKQUEUE_TASKS = tasks
     return tasks
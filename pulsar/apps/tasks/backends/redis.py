@@ -1,50 +1,288 @@
 '''
 A :class:`pulsar.apps.tasks.backends.TaskBackend` implementation
-based on redis_ as data server.
-Requires python-stdnet_ for mapping tasks into redis hashes.
+based on redis_ as data server. It uses the
+:ref:`asynchronous redis client <redis-client>` and therefore requires
+redis-py_.
+
+Data layout
+~~~~~~~~~~~~~~~~
+
+All keys are prefixed by the ``namespace``, the name of the task queue
+application followed by a dot.
+
+* ``task:<id>`` a hash with the fields of a :class:`.Task`. The ``name``,
+  ``status``, ``overlap_id``, ``from_task`` and ``priority`` fields are
+  stored as strings, datetimes as timestamps and all other fields are
+  pickled.
+* ``tasks`` the set of all task ids.
+* ``index:<field>:<value>`` the set of task ids with ``field`` equal to
+  ``value``, for the ``name``, ``status``, ``overlap_id`` and ``from_task``
+  fields.
+* ``queue:<priority>`` the list of queued task ids with
+  :ref:`priority <job-priority>`.
+* ``lanes`` a hash with the credits of the weighted round-robin over the
+  ``queue:<priority>`` lists, see :class:`.WeightedLanes`.
+* ``signal`` a list with one item when there are queued tasks, workers
+  wait for tasks with a blocking pop on this list.
+* ``executing`` a sorted set of claimed task ids scored by their visibility
+  deadline.
+
+Task state transitions run in Lua scripts so that hashes and indexes are
+always consistent. Workers claim a batch of task ids, taken from the
+priority lanes by the weighted round-robin shared by all workers, and add
+them to the ``executing`` set with a deadline ``visibility_timeout``
+seconds in the future, refreshed when the task status changes. Tasks still
+executing after their deadline, for example because the worker running
+them died, are put back into their lane. The visibility timeout can be
+specified via the backend connection string::
+
+    redis://127.0.0.1:6379?visibility_timeout=3600
+
+and it should be larger than the duration of the longest task.
+
+Default: ``600``.
 
 .. _redis: http://redis.io/
-.. _python-stdnet: https://pypi.python.org/pypi/python-stdnet
+.. _redis-py: https://github.com/andymccurdy/redis-py
 '''
-from stdnet import odm
+from time import time, mktime
+from hashlib import sha1
+from datetime import datetime
 
-from pulsar import async
+from pulsar import coroutine_return
+from pulsar.apps import redis
 from pulsar.apps.tasks import backends, states
-from pulsar.utils.log import local_method
+from pulsar.apps.tasks.models import MAX_PRIORITY, DEFAULT_PRIORITY
+from pulsar.utils.log import local_property
+from pulsar.utils.pep import pickle, native_str, iteritems
 from pulsar.utils.internet import get_connection_string
 
 
-class TaskData(odm.StdModel):
-    id = odm.SymbolField(primary_key=True)
-    overlap_id = odm.SymbolField(required=False)
-    name = odm.SymbolField()
-    status = odm.SymbolField()
-    args = odm.PickleObjectField()
-    kwargs = odm.PickleObjectField()
-    result = odm.PickleObjectField()
-    from_task = odm.SymbolField(required=False)
-    time_executed = odm.DateTimeField(index=False)
-    time_started = odm.DateTimeField(required=False, index=False)
-    time_ended = odm.DateTimeField(required=False, index=False)
-    expiry = odm.DateTimeField(required=False, index=False)
-    meta = odm.JSONField()
-    #
-    # List where all TaskData ids are queued
-    queue = odm.ListField(class_field=True)
-    # Set where TaskData ids under execution are stored
-    executing = odm.SetField(class_field=True)
-
-    class Meta:
-        app_label = 'tasks'
-
-    def as_task(self):
-        params = dict(self.meta or {})
-        for field in self._meta.scalarfields:
-            params[field.name] = getattr(self, field.attname, None)
-        return backends.Task(self.id, **params)
-
-    def __unicode__(self):
-        return '%s (%s)' % (self.name, self.status)
+STRING_FIELDS = frozenset(('id', 'name', 'status', 'overlap_id', 'from_task'))
+INT_FIELDS = frozenset(('priority',))
+TIME_FIELDS = frozenset(('time_executed', 'time_started', 'time_ended',
+                         'expiry'))
+INDEXED_FIELDS = ('name', 'status', 'overlap_id', 'from_task')
+PRIORITIES = tuple(range(MAX_PRIORITY, -1, -1))
+
+
+def encode_fields(params):
+    '''Encode the :class:`.Task` fields in ``params`` into a list of field,
+    value pairs for a redis hash.'''
+    data = []
+    for field, value in iteritems(params):
+        if field in STRING_FIELDS:
+            value = '' if value is None else value
+        elif field in INT_FIELDS:
+            value = str(int(value))
+        elif field in TIME_FIELDS:
+            if value is None:
+                value = ''
+            elif isinstance(value, datetime):
+                value = repr(mktime(value.timetuple()) +
+                             1e-6*value.microsecond)
+            else:
+                value = repr(value)
+        else:
+            value = pickle.dumps(value, 2)
+        data.extend((field, value))
+    return data
+
+
+def decode_task(data):
+    '''Create a :class:`.Task` from a redis hash ``data`` or return ``None``
+    if ``data`` is empty.'''
+    if not data:
+        return
+    params = {}
+    for field, value in iteritems(data):
+        field = native_str(field)
+        if field in STRING_FIELDS:
+            value = native_str(value)
+        elif field in INT_FIELDS:
+            value = int(value)
+        elif field in TIME_FIELDS:
+            value = datetime.fromtimestamp(float(value)) if value else None
+        else:
+            value = pickle.loads(value)
+        params[field] = value
+    time_started = params.pop('time_started', None)
+    time_ended = params.pop('time_ended', None)
+    task = backends.Task(from_task=params.pop('from_task', None) or None,
+                         **params)
+    task.time_started = time_started
+    task.time_ended = time_ended
+    return task
+
+
+class RedisScript(object):
+    '''A Lua script executed with ``EVALSHA``.
+
+    The script is loaded with ``EVAL`` the first time it is not found in the
+    redis server script cache.'''
+    def __init__(self, script):
+        self.script = script
+        self.sha = sha1(script.encode('utf-8')).hexdigest()
+
+    def __call__(self, client, keys, args):
+        try:
+            result = yield client.evalsha(self.sha, len(keys), *(keys + args))
+        except redis.NoScriptError:
+            result = yield client.eval(self.script, len(keys), *(keys + args))
+        coroutine_return(result)
+
+
+# KEYS: task hash, tasks set, executing set
+# ARGV: task id, index prefix, ready states, deadline, field, value, ...
+SAVE = RedisScript('''\
+local id, prefix, deadline = ARGV[1], ARGV[2], ARGV[4]
+local indexed = {name=true, status=true, overlap_id=true, from_task=true}
+local ready = {}
+for state in string.gmatch(ARGV[3], '[^,]+') do
+    ready[state] = true
+end
+for i = 5, #ARGV, 2 do
+    local field, value = ARGV[i], ARGV[i + 1]
+    if indexed[field] then
+        local old = redis.call('hget', KEYS[1], field)
+        if old then
+            redis.call('srem', prefix .. field .. ':' .. old, id)
+        end
+        redis.call('sadd', prefix .. field .. ':' .. value, id)
+        if field == 'status' then
+            if ready[value] then
+                redis.call('zrem', KEYS[3], id)
+            elseif redis.call('zscore', KEYS[3], id) then
+                redis.call('zadd', KEYS[3], deadline, id)
+            end
+        end
+    end
+end
+if #ARGV > 4 then
+    redis.call('hmset', KEYS[1], unpack(ARGV, 5))
+end
+redis.call('sadd', KEYS[2], id)
+return id
+''')
+
+# KEYS: task hash, executing, signal
+# ARGV: task id, status index prefix, queued status, queue prefix,
+#       default priority
+PUT = RedisScript('''\
+if redis.call('exists', KEYS[1]) == 0 then
+    return false
+end
+local old = redis.call('hget', KEYS[1], 'status')
+if old then
+    redis.call('srem', ARGV[2] .. old, ARGV[1])
+end
+redis.call('hset', KEYS[1], 'status', ARGV[3])
+redis.call('sadd', ARGV[2] .. ARGV[3], ARGV[1])
+redis.call('zrem', KEYS[2], ARGV[1])
+local priority = redis.call('hget', KEYS[1], 'priority') or ARGV[5]
+redis.call('lpush', ARGV[4] .. priority, ARGV[1])
+redis.call('del', KEYS[3])
+redis.call('lpush', KEYS[3], 1)
+return ARGV[1]
+''')
+
+# KEYS: executing, lanes, signal
+# ARGV: queue prefix, batch size, deadline, priority, weight, ...
+# Priorities are sorted in decreasing order
+TAKE = RedisScript('''\
+local prefix, size, deadline = ARGV[1], tonumber(ARGV[2]), ARGV[3]
+local credits = {}
+local stored = redis.call('hgetall', KEYS[2])
+for i = 1, #stored, 2 do
+    credits[stored[i]] = tonumber(stored[i + 1])
+end
+local function queued()
+    local lanes = {}
+    for i = 4, #ARGV, 2 do
+        if redis.call('llen', prefix .. ARGV[i]) > 0 then
+            lanes[#lanes + 1] = i
+        end
+    end
+    return lanes
+end
+local ids = {}
+local lanes = queued()
+while #lanes > 0 and #ids < size do
+    local selected, best, total = {}, nil, 0
+    for _, i in ipairs(lanes) do
+        local lane, weight = ARGV[i], tonumber(ARGV[i + 1])
+        total = total + weight
+        selected[lane] = (credits[lane] or 0) + weight
+        if not best or selected[lane] > selected[best] then
+            best = lane
+        end
+    end
+    selected[best] = selected[best] - total
+    credits = selected
+    local id = redis.call('rpop', prefix .. best)
+    redis.call('zadd', KEYS[1], deadline, id)
+    ids[#ids + 1] = id
+    lanes = queued()
+end
+redis.call('del', KEYS[2], KEYS[3])
+for lane, credit in pairs(credits) do
+    redis.call('hset', KEYS[2], lane, credit)
+end
+if #lanes > 0 then
+    redis.call('lpush', KEYS[3], 1)
+end
+return ids
+''')
+
+# KEYS: executing, signal
+# ARGV: now, task key prefix, status index prefix, queued status,
+#       queue prefix, default priority
+REAP = RedisScript('''\
+local expired = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('zrem', KEYS[1], id)
+    local key = ARGV[2] .. id
+    if redis.call('exists', key) == 1 then
+        local old = redis.call('hget', key, 'status')
+        if old then
+            redis.call('srem', ARGV[3] .. old, id)
+        end
+        redis.call('hset', key, 'status', ARGV[4])
+        redis.call('sadd', ARGV[3] .. ARGV[4], id)
+        local priority = redis.call('hget', key, 'priority') or ARGV[6]
+        redis.call('rpush', ARGV[5] .. priority, id)
+    end
+end
+if #expired > 0 then
+    redis.call('del', KEYS[2])
+    redis.call('lpush', KEYS[2], 1)
+end
+return #expired
+''')
+
+# KEYS: tasks set, executing
+# ARGV: task key prefix, index prefix, task id, ...
+DELETE = RedisScript('''\
+local deleted = {}
+local indexed = {'name', 'status', 'overlap_id', 'from_task'}
+for i = 3, #ARGV do
+    local id = ARGV[i]
+    local key = ARGV[1] .. id
+    if redis.call('exists', key) == 1 then
+        for _, field in ipairs(indexed) do
+            local value = redis.call('hget', key, field)
+            if value then
+                redis.call('srem', ARGV[2] .. field .. ':' .. value, id)
+            end
+        end
+        redis.call('del', key)
+        deleted[#deleted + 1] = id
+    end
+    redis.call('srem', KEYS[1], id)
+    redis.call('zrem', KEYS[2], id)
+end
+return deleted
+''')
 
 
 class TaskBackend(backends.TaskBackend):
@@ -57,78 +295,141 @@ class TaskBackend(backends.TaskBackend):
             params['namespace'] = '%s.' % name
         return get_connection_string(scheme, address, params)
 
+    def setup(self, namespace=None, visibility_timeout=None, **params):
+        self.namespace = namespace or ''
+        self.visibility_timeout = float(visibility_timeout or 600)
+        return super(TaskBackend, self).setup(**params)
+
+    @local_property
+    def client(self):
+        '''The asynchronous redis client for this backend.'''
+        pool = redis.RedisPool()
+        return pool.from_connection_string(self.connection_string)
+
     def num_tasks(self):
         '''Retrieve the number of tasks in the task queue.'''
-        task_manager = self.task_manager()
-        return task_manager.queue.size()
+        pipe = self.client.pipeline(transaction=False)
+        for priority in PRIORITIES:
+            pipe.llen(self._key('queue:%s' % priority))
+        sizes = yield pipe.execute()
+        yield sum(sizes)
 
-    @async()
     def put_task(self, task_id):
         if task_id:
-            task_data = yield self._get_task(task_id)
-            if task_data:
-                task_data.status = states.QUEUED
-                task_data = yield task_data.save()
-                yield self.task_manager().queue.push_back(task_data.id)
-                yield task_data.id
-
-    @async()
+            result = yield PUT(self.client,
+                               [self._key('task:%s' % task_id),
+                                self._key('executing'), self._key('signal')],
+                               [task_id, self._key('index:status:'),
+                                states.QUEUED, self._key('queue:'),
+                                DEFAULT_PRIORITY])
+            if result:
+                yield task_id
+
     def save_task(self, task_id, **params):
-        # Called by self when the task need to be saved
-        task_manager = self.task_manager()
-        task_data = yield self._get_task(task_id)
-        if task_data:
-            for field, value in params.items():
-                if field in task_data._meta.dfields:
-                    setattr(task_data, field, value)
-                else:
-                    # not a field put value in the meta json field
-                    task_data.meta[field] = value
-            yield task_data.save()
-        else:
-            task_data = yield task_manager.new(id=task_id, **params)
+        deadline = time() + self.visibility_timeout
+        yield SAVE(self.client,
+                   [self._key('task:%s' % task_id), self._key('tasks'),
+                    self._key('executing')],
+                   [task_id, self._key('index:'),
+                    ','.join(states.READY_STATES), repr(deadline),
+                    'id', task_id] + encode_fields(params))
         yield task_id
 
-    def get_task(self, task_id=None, timeout=1):
-        task_manager = self.task_manager()
-        #
+    def get_task(self, task_id=None):
         if not task_id:
-            task_id = yield task_manager.queue.block_pop_front(timeout=timeout)
-        if task_id:
-            task_data = yield self._get_task(task_id)
-            if task_data:
-                yield task_data.as_task()
+            tasks = yield self.get_tasks_batch(1)
+            coroutine_return(tasks[0] if tasks else None)
+        data = yield self.client.hgetall(self._key('task:%s' % task_id))
+        yield decode_task(data)
+
+    def get_tasks_batch(self, size):
+        if time() > (self.local.next_reap or 0):
+            yield self._reap()
+        ids = yield self._take(size)
+        if not ids:
+            signal = yield self.client.brpop(self._key('signal'),
+                                             int(self.poll_timeout))
+            if not signal:
+                coroutine_return([])
+            ids = yield self._take(size)
+        yield self._load_tasks(ids)
 
     def get_tasks(self, **filters):
-        task_manager = self.task_manager()
-        tasks = yield task_manager.filter(**filters).all()
-        yield [t.as_task() for t in tasks]
+        if not filters:
+            coroutine_return([])
+        client = self.client
+        ids = None
+        scan = []
+        for field, values in iteritems(filters):
+            if not isinstance(values, (list, tuple, set, frozenset)):
+                values = (values,)
+            if field == 'id':
+                selected = set(values)
+            elif field in INDEXED_FIELDS:
+                keys = [self._key('index:%s:%s' % (field, value))
+                        for value in values]
+                selected = yield client.sunion(keys)
+                selected = set((native_str(id) for id in selected))
+            else:
+                scan.append((field, values))
+                continue
+            ids = selected if ids is None else ids & selected
+        if ids is None:
+            ids = yield client.smembers(self._key('tasks'))
+        tasks = yield self._load_tasks(ids)
+        yield [task for task in tasks
+               if all((getattr(task, field, None) in values
+                       for field, values in scan))]
 
     def delete_tasks(self, ids=None):
         deleted = []
         if ids:
-            task_manager = self.task_manager()
-            tasks = yield task_manager.filter(id=ids).all()
-            yield task_manager.filter(id=ids).delete()
-            for task_data in tasks:
-                deleted.append(task_data.id)
-        yield deleted
+            keys = [self._key('tasks'), self._key('executing')]
+            deleted = yield DELETE(self.client, keys,
+                                   [self._key('task:'), self._key('index:')] +
+                                   list(ids))
+        yield [native_str(id) for id in deleted]
 
     def flush(self):
-        return self.models().flush()
+        ids = yield self.client.smembers(self._key('tasks'))
+        yield self.delete_tasks(ids)
+        keys = [self._key('queue:%s' % priority) for priority in PRIORITIES]
+        yield self.client.delete(self._key('lanes'), self._key('signal'),
+                                 self._key('executing'), *keys)
 
     #######################################################################
     ##    INTERNALS
-    @local_method
-    def models(self):
-        models = odm.Router(self.connection_string)
-        models.register(TaskData)
-        return models
-
-    def task_manager(self):
-        return self.models().taskdata
-
-    def _get_task(self, task_id):
-        tasks = yield self.task_manager().filter(id=task_id).all()
-        if tasks:
-            yield tasks[0]
+    def _key(self, name):
+        return '%s%s' % (self.namespace, name)
+
+    def _load_tasks(self, ids):
+        ids = [native_str(id) for id in ids]
+        tasks = []
+        if ids:
+            pipe = self.client.pipeline(transaction=False)
+            for id in ids:
+                pipe.hgetall(self._key('task:%s' % id))
+            data = yield pipe.execute()
+            tasks = [task for task in map(decode_task, data) if task]
+        yield tasks
+
+    def _take(self, size):
+        # Claim up to size tasks from the priority lanes
+        deadline = time() + self.visibility_timeout
+        lanes = []
+        for priority in PRIORITIES:
+            lanes.extend((priority, backends.lane_weight(priority)))
+        return TAKE(self.client,
+                    [self._key('executing'), self._key('lanes'),
+                     self._key('signal')],
+                    [self._key('queue:'), size, repr(deadline)] + lanes)
+
+    def _reap(self):
+        # Put back into the queue tasks whose visibility deadline expired
+        now = time()
+        self.local.next_reap = now + 0.5*self.visibility_timeout
+        yield REAP(self.client,
+                   [self._key('executing'), self._key('signal')],
+                   [repr(now), self._key('task:'),
+                    self._key('index:status:'), states.QUEUED,
+                    self._key('queue:'), DEFAULT_PRIORITY])
@@ -43,6 +43,25 @@ execution::
 
 This allows for cooperative task execution on each task thread workers.
 
+.. _job-executor:
+
+Job executors
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+The :attr:`Job.executor` attribute controls where tasks are executed:
+
+* ``thread`` (default) runs tasks in the thread pool of the worker.
+* ``loop`` runs tasks in the worker event loop. Use it for jobs which only
+  perform asynchronous I/O and do not block.
+* ``process`` runs tasks in a pool of processes forked by the worker, the
+  number of processes is set by the :ref:`task_processes
+  <setting-task_processes>` parameter. Use it for CPU-bound jobs, which
+  would otherwise compete for the GIL with the other threads of the
+  worker. The job, its arguments and its result must be picklable, the
+  job callable cannot return a :ref:`coroutine <coroutine>` and the
+  :class:`.TaskConsumer` passed to it has no ``worker`` and ``backend``.
+  On platforms without ``fork``, these jobs run in the thread pool.
+
 .. _job-non-overlap:
 
 Non overlapping Jobs
@@ -56,6 +75,22 @@ However, when setting the :attr:`Job.can_overlap` attribute to ``False``,
 a new task cannot be started unless a previous task of the same job
 is done.
 
+.. _job-priority:
+
+Priorities and concurrency
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Queued tasks wait in one lane for each :attr:`Job.priority`, from ``0``
+(lowest) to ``9`` (highest). Task workers take tasks from the non empty
+lanes with a weighted round-robin where the weight of a lane is its
+priority plus one, so that high priority tasks are executed first without
+starving low priority ones. The priority of a single task can be set
+with the ``priority`` meta parameter of :meth:`.TaskBackend.run_job`.
+
+The :attr:`Job.max_concurrency` attribute limits the number of tasks of a
+job a worker executes at the same time. Tasks above the limit are put
+back into their lane.
+
 
 Job class
 ~~~~~~~~~~~~~~~~~~~~~~
@@ -91,6 +126,10 @@ from pulsar.utils.security import gen_unique_id
 __all__ = ['JobMetaClass', 'Job', 'PeriodicJob',
            'anchorDate', 'JobRegistry', 'create_task_id']
 
+EXECUTORS = ('thread', 'loop', 'process')
+MAX_PRIORITY = 9
+DEFAULT_PRIORITY = 4
+
 
 def create_task_id():
     return gen_unique_id()[:8]
@@ -139,6 +178,10 @@ class JobMetaClass(type):
         job_name = attrs.get("name", name).lower()
         log_prefix = attrs.get("log_prefix") or "pulsar"
         attrs["name"] = job_name
+        executor = attrs.get('executor')
+        if executor is not None and executor not in EXECUTORS:
+            raise ValueError('Job %s executor must be one of %s'
+                             % (name, ', '.join(EXECUTORS)))
         logname = '%s.job.%s' % (log_prefix, name)
         attrs['logger'] = logging.getLogger(logname)
         return super(JobMetaClass, cls).__new__(cls, name, bases, attrs)
@@ -166,7 +209,9 @@ class Job(JobMetaClass('JobBase', (object,), {'abstract': True})):
 .. attribute:: timeout
 
     An instance of a datetime.timedelta or ``None``. If set, it represents the
-    time lag after which a task which did not start expires.
+    time lag after which a task which did not start expires. Tasks of jobs
+    with the ``process`` :attr:`executor` still running when they expire
+    are killed and revoked.
 
     Default: ``None``.
 
@@ -178,6 +223,28 @@ class Job(JobMetaClass('JobBase', (object,), {'abstract': True})):
 
     Default: ``True``.
 
+.. attribute:: executor
+
+    Where the tasks of this job are executed, one of ``thread``, ``loop``
+    and ``process``. Check :ref:`job executors <job-executor>`.
+
+    Default: ``thread``.
+
+.. attribute:: priority
+
+    Integer between ``0`` and ``9`` giving the
+    :ref:`priority <job-priority>` of the tasks of this job. Tasks with
+    higher priority are executed more often.
+
+    Default: ``4``.
+
+.. attribute:: max_concurrency
+
+    The maximum number of tasks of this job executed concurrently by a
+    task worker. ``0`` for no limit.
+
+    Default: ``0``.
+
 .. attribute:: doc_syntax
 
     The doc string syntax.
@@ -193,6 +260,9 @@ class Job(JobMetaClass('JobBase', (object,), {'abstract': True})):
     expires = None
     doc_syntax = 'markdown'
     can_overlap = True
+    executor = 'thread'
+    priority = DEFAULT_PRIORITY
+    max_concurrency = 0
 
     def __call__(self, consumer, *args, **kwargs):
         '''The Jobs' task executed by the consumer. This function needs to be
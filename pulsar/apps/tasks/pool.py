@@ -0,0 +1,235 @@
+'''A :class:`ProcessPool` runs functions on a group of processes forked from
+a task queue worker.
+
+It is used by the :class:`.TaskBackend` to execute :class:`.Job` with the
+``process`` :attr:`.Job.executor`, CPU-bound jobs which would otherwise
+compete for the GIL with the other threads of the worker. Processes are
+forked when the pool is created and communicate with the worker via pipes
+registered with the worker event loop, messages are pickled with protocol
+``2``.
+
+Processes which exit or time out are replaced by forking the worker again.
+By then the worker thread pool is running and a replacement process can
+inherit a lock held by one of its threads (in the logging module for example)
+and hang as soon as it tries to acquire it. For this reason a pool replaces
+at most :attr:`ProcessPool.max_replacements` processes, after which it is
+:attr:`ProcessPool.exhausted` and the :class:`.TaskBackend` recycles the
+worker, so that a new pool is forked before the threads start.
+
+Process pools are only available on platforms which support ``fork``.
+'''
+import os
+import sys
+import signal
+import traceback
+from collections import deque
+from inspect import isgenerator
+from multiprocessing import Pipe, cpu_count
+
+from pulsar import Deferred, TimeoutError
+from pulsar.utils.pep import pickle
+from pulsar.utils.system import EXIT_SIGNALS
+
+
+__all__ = ['ProcessPool']
+
+PROTOCOL = 2
+MAX_REPLACEMENTS = 10
+
+
+class PoolProcess(object):
+    '''A process of a :class:`ProcessPool`.'''
+    def __init__(self, pid, connection):
+        self.pid = pid
+        self.connection = connection
+        self.deferred = None
+        self.timeout = None
+
+    def __repr__(self):
+        return 'pool-process-%s' % self.pid
+
+    def fileno(self):
+        return self.connection.fileno()
+
+
+class ProcessPool(object):
+    '''A pool of forked processes.
+
+    :param event_loop: the :class:`.EventLoop` of the actor owning the pool.
+    :param processes: the number of processes, the number of CPUs if not
+        given.
+    :param logger: logger for the pool events.
+    :param max_replacements: maximum number of processes replaced by the
+        pool. When reached, processes which exit or time out are not replaced
+        and functions fail once there are no processes left.
+    '''
+    def __init__(self, event_loop, processes=None, logger=None,
+                 max_replacements=MAX_REPLACEMENTS):
+        self.event_loop = event_loop
+        self.processes = max(processes or cpu_count(), 1)
+        self.logger = logger
+        self.max_replacements = max_replacements
+        self.replacements = 0
+        self.closed = False
+        self._idle = []
+        self._busy = set()
+        self._waiting = deque()
+        for _ in range(self.processes):
+            self._idle.append(self._fork())
+
+    def __repr__(self):
+        return 'ProcessPool %s/%s' % (len(self._busy), self.processes)
+
+    @property
+    def num_waiting(self):
+        '''Number of functions waiting for a free process.'''
+        return len(self._waiting)
+
+    @property
+    def exhausted(self):
+        '''``True`` when the pool cannot replace processes any longer.'''
+        return self.replacements >= self.max_replacements
+
+    def apply(self, func, args=(), kwargs=None, timeout=None):
+        '''Run ``func(*args, **kwargs)`` in a process of the pool.
+
+        ``func``, its arguments and its result must be picklable and
+        ``func`` cannot return an :ref:`asynchronous component
+        <tutorial-coroutine>`.
+
+        :param timeout: optional number of seconds after which the process
+            running ``func`` is killed and replaced by a new one.
+        :return: a :class:`.Deferred` called back with the result of
+            ``func`` or with a ``TimeoutError``.
+        '''
+        assert not self.closed, 'Pool closed'
+        d = Deferred()
+        data = pickle.dumps((func, args, kwargs or {}), PROTOCOL)
+        self._waiting.append((d, data, timeout))
+        self._apply()
+        return d
+
+    def close(self):
+        '''Kill all processes of this pool.'''
+        if not self.closed:
+            self.closed = True
+            for process in list(self._busy):
+                self._remove(process).cancel('Pool closed')
+            while self._idle:
+                self._kill(self._idle.pop())
+            while self._waiting:
+                self._waiting.popleft()[0].cancel('Pool closed')
+
+    def _fork(self):
+        connection, child = Pipe()
+        pid = os.fork()
+        if pid:
+            child.close()
+            return PoolProcess(pid, connection)
+        else:   # pragma    nocover
+            try:
+                connection.close()
+                for process in self._idle:
+                    process.connection.close()
+                for process in self._busy:
+                    process.connection.close()
+                serve(child, os.getppid())
+            finally:
+                os._exit(0)
+
+    def _apply(self):
+        while self._idle and self._waiting:
+            process = self._idle.pop()
+            d, data, timeout = self._waiting.popleft()
+            process.deferred = d
+            if timeout is not None:
+                process.timeout = self.event_loop.call_later(
+                    timeout, self._timeout, process)
+            self._busy.add(process)
+            self.event_loop.add_reader(process.fileno(), self._done, process)
+            process.connection.send_bytes(data)
+        if not (self._idle or self._busy):
+            while self._waiting:
+                self._waiting.popleft()[0].callback(
+                    RuntimeError('No processes left in %s' % self))
+
+    def _done(self, process):
+        try:
+            success, result = pickle.loads(process.connection.recv_bytes())
+        except (EOFError, IOError):
+            self._replace(process, RuntimeError('%s exited' % process))
+        else:
+            d = self._release(process)
+            self._idle.append(process)
+            if success:
+                d.callback(result)
+            else:
+                d.callback(RuntimeError(result))
+            self._apply()
+
+    def _timeout(self, process):
+        if self.logger:
+            self.logger.warning('Killing %s after timeout', process)
+        self._replace(process, TimeoutError('%s timed out' % process))
+
+    def _replace(self, process, error):
+        d = self._remove(process)
+        if not self.closed:
+            if not self.exhausted:
+                self.replacements += 1
+                self._idle.append(self._fork())
+            elif self.logger:
+                self.logger.warning('%s replaced %s processes, not replacing '
+                                    '%s', self, self.replacements, process)
+            d.callback(error)
+            self._apply()
+
+    def _release(self, process):
+        self.event_loop.remove_reader(process.fileno())
+        if process.timeout:
+            process.timeout.cancel()
+            process.timeout = None
+        self._busy.discard(process)
+        d, process.deferred = process.deferred, None
+        return d
+
+    def _remove(self, process):
+        d = self._release(process)
+        self._kill(process)
+        return d
+
+    def _kill(self, process):
+        process.connection.close()
+        try:
+            os.kill(process.pid, signal.SIGKILL)
+            os.waitpid(process.pid, 0)
+        except OSError:
+            pass
+
+
+def serve(connection, ppid):   # pragma    nocover
+    '''Run functions received from ``connection`` until it is closed or the
+    parent process ``ppid`` exits.'''
+    for sig in EXIT_SIGNALS:
+        signal.signal(sig, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        while not connection.poll(1):
+            if os.getppid() != ppid:
+                return
+        try:
+            data = connection.recv_bytes()
+        except (EOFError, IOError):
+            return
+        try:
+            func, args, kwargs = pickle.loads(data)
+            result = func(*args, **kwargs)
+            if isgenerator(result):
+                raise TypeError('%s returned a generator. Asynchronous '
+                                'functions cannot run in a process pool'
+                                % func)
+            data = pickle.dumps((True, result), PROTOCOL)
+        except Exception:
+            data = pickle.dumps((False, ''.join(
+                traceback.format_exception(*sys.exc_info()))), PROTOCOL)
+        connection.send_bytes(data)
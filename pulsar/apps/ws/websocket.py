@@ -139,6 +139,7 @@ class WebSocketProtocol(ProtocolConsumer):
 
     '''
     _started = False
+    buffer_protocol = True
 
     def __init__(self, handshake, handler, parser):
         super(WebSocketProtocol, self).__init__()
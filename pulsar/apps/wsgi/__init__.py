@@ -71,6 +71,26 @@ from .routers import *
 from .auth import *
 
 
+class WsgiSetting(pulsar.Setting):
+    virtual = True
+    app = 'wsgi'
+    section = "WSGI Servers"
+
+
+class HttpPipeline(WsgiSetting):
+    name = "http_pipeline"
+    flags = ["--http-pipeline"]
+    validator = pulsar.validate_pos_int
+    type = int
+    default = MAX_PIPELINE
+    desc = """\
+        The maximum number of pipelined HTTP requests queued on a connection.
+
+        Requests are answered in order. When the queue is full the server
+        stops reading from the client until a response is sent.
+        """
+
+
 class WSGIServer(SocketServer):
     '''A WSGI :class:`.SocketServer`.
     '''
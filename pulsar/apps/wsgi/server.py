@@ -16,6 +16,7 @@ import sys
 import time
 import os
 import socket
+from collections import deque
 from wsgiref.handlers import format_date_time
 
 import pulsar
@@ -31,10 +32,14 @@ from pulsar.async.protocols import ProtocolConsumer
 from .utils import handle_wsgi_error, LOGGER, HOP_HEADERS
 
 
-__all__ = ['HttpServerResponse', 'MAX_CHUNK_SIZE', 'test_wsgi_environ']
+__all__ = ['HttpServerResponse', 'MAX_CHUNK_SIZE', 'MAX_PIPELINE',
+           'test_wsgi_environ']
 
 
 MAX_CHUNK_SIZE = 65536
+MAX_PIPELINE = 16
+KEEP_ALIVE = b'Connection: keep-alive\r\n'
+CLOSE = b'Connection: close\r\n'
 
 
 def test_wsgi_environ(url='/', method=None, headers=None, extra=None,
@@ -138,7 +143,8 @@ class StreamReader:
 
     def data_processed(self, protocol, data=None):
         '''Callback by the protocol when new body data is received.'''
-        if self.parser.is_message_complete():
+        if (not self.on_message_complete.done() and
+                self.parser.is_message_complete()):
             self.on_message_complete.callback(None)
 
 
@@ -239,6 +245,52 @@ If the size is 0, this is the last chunk, and an extra CRLF is appended.
     return head + chunk + b'\r\n'
 
 
+class HeaderCache(object):
+    '''Pre-encoded response headers shared by all responses of a worker.
+
+    The ``Date`` header is recomputed at most once per second.
+    '''
+    MAX_STATUS_LINES = 100
+
+    def __init__(self, server_software):
+        self.server = ('Server: %s\r\n' % server_software).encode(
+            DEFAULT_CHARSET)
+        self.status_lines = {}
+        self._second = None
+        self._date = None
+
+    def date(self):
+        '''The ``Date`` header line.'''
+        second = int(time.time())
+        if second != self._second:
+            self._second = second
+            self._date = ('Date: %s\r\n' % format_date_time(second)).encode(
+                DEFAULT_CHARSET)
+        return self._date
+
+    def status_line(self, version, status):
+        '''The status line for HTTP ``version`` and ``status``.'''
+        key = (version, status)
+        line = self.status_lines.get(key)
+        if line is None:
+            line = ('HTTP/%s.%s %s\r\n' % (version + (status,))).encode(
+                DEFAULT_CHARSET)
+            if len(self.status_lines) < self.MAX_STATUS_LINES:
+                self.status_lines[key] = line
+        return line
+
+
+_header_caches = {}
+
+
+def header_cache(server_software):
+    '''The :class:`HeaderCache` for ``server_software``.'''
+    cache = _header_caches.get(server_software)
+    if cache is None:
+        cache = _header_caches[server_software] = HeaderCache(server_software)
+    return cache
+
+
 def keep_alive(headers, version):
         """ return True if the connection should be kept alive"""
         conn = set((v.lower() for v in headers.get_all('connection', ())))
@@ -269,10 +321,17 @@ class HttpServerResponse(ProtocolConsumer):
     .. attribute:: wsgi_callable
 
         The wsgi callable handling requests.
+
+    HTTP/1.1 pipelining is supported. Requests received before the response
+    to the current request is finished are parsed and queued, up to the
+    ``http_pipeline`` setting, and answered in order by new
+    :class:`HttpServerResponse` on the same connection.
     '''
     _status = None
     _headers_sent = None
     _request_headers = None
+    _pipeline = None
+    _pipeline_buffer = None
     SERVER_SOFTWARE = pulsar.SERVER_SOFTWARE
     ONE_TIME_EVENTS = ProtocolConsumer.ONE_TIME_EVENTS + ('on_headers',)
 
@@ -284,6 +343,7 @@ class HttpServerResponse(ProtocolConsumer):
         self.headers = Headers()
         self.keep_alive = False
         self.SERVER_SOFTWARE = server_software or self.SERVER_SOFTWARE
+        self.header_cache = header_cache(self.SERVER_SOFTWARE)
 
     def data_received(self, data):
         '''Implements :meth:`~.ProtocolConsumer.data_received` method.
@@ -292,13 +352,16 @@ class HttpServerResponse(ProtocolConsumer):
         delegate the response to the :func:`wsgi_callable` function.
         '''
         p = self.parser
-        if p.execute(bytes(data), len(data)) == len(data):
-            if self._request_headers is None and p.is_headers_complete():
-                self._request_headers = Headers(p.get_headers(), kind='client')
-                stream = StreamReader(self._request_headers, p, self.transport)
-                self.bind_event('data_processed', stream.data_processed)
-                environ = self.wsgi_environ(stream)
-                self.event_loop.async(self._response(environ))
+        if self._pipeline is not None or p.is_message_complete():
+            return self._pipeline_data(data)
+        parsed = p.execute(bytes(data), len(data))
+        if parsed == len(data) or p.is_message_complete():
+            # queue pipelined requests first, the response may finish
+            # synchronously
+            if parsed < len(data):
+                self._pipeline_data(data[parsed:])
+            if p.is_headers_complete():
+                self._start_wsgi()
         else:
             # This is a parsing error, the client must have sent
             # bogus data
@@ -388,8 +451,7 @@ class HttpServerResponse(ProtocolConsumer):
         :param force: Optional flag used internally.
         '''
         if not self._headers_sent:
-            tosend = self.get_headers()
-            self._headers_sent = tosend.flat(self.version, self.status)
+            self._headers_sent = self.headers_bytes()
             self.fire_event('on_headers')
             self.transport.write(self._headers_sent)
         if data:
@@ -431,6 +493,66 @@ class HttpServerResponse(ProtocolConsumer):
                 self.keep_alive = False
                 self.finish_wsgi()
 
+    def _start_wsgi(self):
+        if self._request_headers is not None:
+            return
+        p = self.parser
+        self._request_headers = Headers(p.get_headers(), kind='client')
+        stream = StreamReader(self._request_headers, p, self.transport)
+        self.bind_event('data_processed', stream.data_processed)
+        # A pipelined request may be complete already
+        stream.data_processed(self)
+        environ = self.wsgi_environ(stream)
+        self.event_loop.async(self._response(environ))
+
+    def _pipeline_data(self, data):
+        # Parse data of requests pipelined after the current request, up
+        # to the http_pipeline limit. Bytes of requests above the limit are
+        # buffered until a queued request is started
+        pipeline = self._pipeline
+        if pipeline is None:
+            pipeline = self._pipeline = deque()
+        if self._pipeline_buffer:
+            self._pipeline_buffer += bytes(data)
+            return
+        limit = self.cfg.get('http_pipeline', MAX_PIPELINE)
+        while data:
+            if not pipeline or pipeline[-1].is_message_complete():
+                if len(pipeline) >= limit:
+                    self._pipeline_buffer = bytes(data)
+                    break
+                pipeline.append(http_parser(kind=0))
+            p = pipeline[-1]
+            parsed = p.execute(bytes(data), len(data))
+            if parsed == len(data):
+                break
+            elif parsed >= 0 and p.is_message_complete():
+                data = data[parsed:]
+            else:
+                raise ProtocolError
+        if len(pipeline) >= limit:
+            self.transport.pause()
+
+    def _next_pipelined(self):
+        # Start the next pipelined request in a new consumer
+        connection = self.connection
+        consumer = connection.consumer_factory()
+        connection.set_consumer(consumer)
+        consumer.start()
+        pipeline = self._pipeline
+        consumer.parser = pipeline.popleft()
+        buffer, self._pipeline_buffer = self._pipeline_buffer, None
+        if pipeline or buffer:
+            consumer._pipeline = pipeline
+        if buffer:
+            consumer._pipeline_data(buffer)
+        if (not consumer._pipeline_buffer and
+                len(pipeline) < self.cfg.get('http_pipeline', MAX_PIPELINE)):
+            self.transport.resume()
+        if consumer.parser.is_headers_complete():
+            # don't recurse when responses finish synchronously
+            self.event_loop.call_soon(consumer._start_wsgi)
+
     def _async_wsgi(self, wsgi_iter):
         if isinstance(wsgi_iter, (Deferred, Failure)):
             wsgi_iter = yield wsgi_iter
@@ -452,6 +574,8 @@ class HttpServerResponse(ProtocolConsumer):
         if not self.keep_alive:
             self.connection.close()
         self.finished()
+        if self.keep_alive and self._pipeline:
+            self._next_pipelined()
 
     def is_chunked(self):
         '''Check if the response uses chunked transfer encoding.
@@ -491,6 +615,30 @@ class HttpServerResponse(ProtocolConsumer):
             headers['Set-cookie'] = self._request_headers['cookie']
         return headers
 
+    def headers_bytes(self):
+        '''The bytes of the status line and headers to send to the client.
+
+        The ``Server``, ``Date`` and ``Connection`` headers are taken
+        from the :attr:`header_cache`, unless set by the application, and
+        the header block is built with one bytes join.
+        '''
+        headers = self.get_headers()
+        cache = self.header_cache
+        connection = headers.get('connection')
+        if connection == 'keep-alive':
+            connection = KEEP_ALIVE
+        elif connection == 'close':
+            connection = CLOSE
+        else:
+            connection = None
+        lines = ''.join(('%s: %s\r\n' % kv for kv in headers
+                         if not connection or kv[0] != 'Connection'))
+        date = b'' if 'date' in headers else cache.date()
+        server = b'' if 'server' in headers else cache.server
+        return b''.join((cache.status_line(self.version, self.status),
+                         date, server, connection or b'',
+                         lines.encode(DEFAULT_CHARSET), b'\r\n'))
+
     def wsgi_environ(self, stream):
         #return a the WSGI environ dictionary
         parser = self.parser
@@ -504,6 +652,4 @@ class HttpServerResponse(ProtocolConsumer):
                                       'pulsar.cfg': self.cfg,
                                       'wsgi.multiprocess': multiprocess})
         self.keep_alive = keep_alive(self.headers, parser.get_version())
-        self.headers.update([('Server', self.SERVER_SOFTWARE),
-                             ('Date', format_date_time(time.time()))])
         return environ
@@ -5,6 +5,7 @@ from .events import *
 from .proxy import *
 from .internet import *
 from .pollers import *
+from .schedulers import *
 from .eventloop import *
 from .threads import *
 from .actor import *
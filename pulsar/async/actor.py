@@ -120,6 +120,18 @@ class Actor(EventHandler, Pulsar, ActorIdentity, Coverage):
 
         Used to send and receive :ref:`actor messages <tutorials-messages>`.
 
+    .. attribute:: links
+
+        The :class:`pulsar.async.mailbox.MailboxLinks` for direct messages
+        with other actors, available when the
+        :ref:`actor-links <setting-actor_links>` setting is on.
+
+    .. attribute:: watchdog
+
+        The :class:`pulsar.async.watchdog.Watchdog` checking the
+        :attr:`event_loop` is not blocked, available when the
+        :ref:`watchdog <setting-watchdog>` setting is positive.
+
     .. attribute:: address
 
         The socket address for this :attr:`Actor.mailbox`.
@@ -173,8 +185,11 @@ class Actor(EventHandler, Pulsar, ActorIdentity, Coverage):
     MANY_TIMES_EVENTS = ('on_info', 'on_params')
     exit_code = None
     mailbox = None
+    links = None
+    watchdog = None
     signal_queue = None
     next_periodic_task = None
+    _recycling = False
 
     def __init__(self, impl):
         super(Actor, self).__init__()
@@ -274,6 +289,21 @@ Always return a :class:`Deferred`.'''
         attribute.'''
         return self.__impl.stop(self, exc)
 
+    def recycle(self):
+        '''Ask the monitor to replace this :class:`Actor` with a new one.
+
+        The monitor spawns the replacement and gracefully stops this actor
+        once the replacement is ready. If the monitor cannot recycle actors,
+        the actor stops.
+
+        :return: a :class:`Deferred` called back with the monitor response
+            the first time this method is called, ``None`` afterwards.
+        '''
+        if not self._recycling:
+            self._recycling = True
+            return self.send('monitor', 'recycle').add_callback(
+                self._recycled, self.stop)
+
     def create_thread_pool(self, workers=None):
         '''Create a :class:`ThreadPool` for this :class:`Actor`
         if not already present.
@@ -363,6 +393,8 @@ status and performance. The dictionary contains the following entries:
   actor.
 * ``extra`` the :attr:`extra` attribute (which you can use to add stuff).
 * ``system`` system info.
+* ``load`` the load of the actor, used by autoscaling pools. Available when
+  the event loop measures its statistics or when set by applications.
 
 This method is invoked when you run the
 :ref:`info command <actor_info_command>` from another actor.
@@ -377,12 +409,24 @@ This method is invoked when you run the
                  'thread_id': self.tid,
                  'process_id': self.pid,
                  'is_process': isp,
+                 'ready': self.event('start').done(),
                  'age': self.impl.age}
+        if self.links:
+            actor['link_address'] = self.links.address
         events = {'callbacks': len(self.event_loop._callbacks),
-                  'io_loops': self.event_loop.num_loops}
+                  'io_loops': self.event_loop.num_loops,
+                  'scheduler': self.event_loop.scheduler.info()}
+        stats = self.event_loop.stats
+        if stats is not None:
+            events['stats'] = stats.info()
+        if self.watchdog:
+            events['watchdog'] = self.watchdog.info()
         data = {'actor': actor,
                 'events': events,
                 'extra': self.extra}
+        if stats is not None:
+            # the event loop lag, applications may report a higher load
+            data['load'] = stats.busy
         if isp:
             data['system'] = system.system_info(self.pid)
         self.fire_event('on_info', info=data)
@@ -407,6 +451,11 @@ This method is invoked when you run the
             if exc != -1:
                 self.stop(exc)
 
+    def _recycled(self, recycled):
+        if not recycled:
+            self.stop()
+        return recycled
+
     def _send(self, target, action, *args, **kwargs):
         target = self.monitor if target == 'monitor' else target
         mailbox = self.mailbox
@@ -420,6 +469,9 @@ This method is invoked when you run the
                 return command_in_context(action, self, actor, args, kwargs)
             elif isinstance(actor, ActorProxyMonitor):
                 mailbox = actor.mailbox
+            elif self.links:
+                # Use the direct link with target if available
+                mailbox = self.links.get(target) or mailbox
         if hasattr(mailbox, 'request'):
             #if not mailbox.closed:
             return mailbox.request(action, self, target, args, kwargs)
@@ -58,10 +58,24 @@ class Request(object):
 
     def connect(self, event_loop, connection):
         '''Called by a :class:`Client` when a new connection is needed.
+
+        An :attr:`address` which is not a ``(host, port)`` tuple is the path
+        of a unix domain socket.
         '''
-        host, port = self.address
-        _, connection = yield event_loop.create_connection(
-            lambda: connection, host, port, ssl=self.ssl)
+        if isinstance(self.address, tuple):
+            host, port = self.address
+            _, connection = yield event_loop.create_connection(
+                lambda: connection, host, port, ssl=self.ssl)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                yield event_loop.sock_connect(sock, self.address)
+            except Exception:
+                sock.close()
+                raise
+            _, connection = yield event_loop.create_connection(
+                lambda: connection, sock=sock, ssl=self.ssl)
         # wait for the connection_made event
         yield connection.event('connection_made')
         # starts the new request
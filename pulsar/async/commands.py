@@ -44,6 +44,18 @@ def stop(request):
     return request.actor.stop()
 
 
+@command()
+def recycle(request):
+    '''Replace the calling actor with a new one once the new actor is ready.
+
+Return ``True`` if the actor is being recycled.'''
+    remote_actor = request.caller
+    if (isinstance(remote_actor, ActorProxyMonitor) and
+            request.actor.is_monitor()):
+        return request.actor.recycle_actor(remote_actor)
+    return False
+
+
 @command()
 def notify(request, info):
     '''The actor notify itself with a dictionary of information.
@@ -68,6 +80,15 @@ The command perform the following actions:
     return t
 
 
+@command()
+def link_address(request, aid):
+    '''Return the address of the :class:`pulsar.async.mailbox.MailboxLinks`
+server of actor ``aid`` or ``None`` if not available.'''
+    remote_actor = request.actor.get_actor(aid)
+    if isinstance(remote_actor, ActorProxyMonitor):
+        return remote_actor.info.get('actor', {}).get('link_address')
+
+
 @command()
 def spawn(request, **kwargs):
     '''Spawn a new actor.'''
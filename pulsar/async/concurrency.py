@@ -1,5 +1,6 @@
 from functools import partial
 from multiprocessing import Process, current_process
+from time import time
 
 from pulsar import system
 from pulsar.utils.security import gen_unique_id
@@ -8,11 +9,15 @@ from pulsar.utils.pep import new_event_loop, itervalues
 from .proxy import ActorProxyMonitor, get_proxy
 from .access import get_actor, set_actor, remove_actor, logger
 from .threads import Thread
-from .mailbox import MailboxClient, MailboxConsumer, ProxyMailbox
+from .mailbox import (MailboxClient, MailboxLinks, ProxyMailbox,
+                      create_mailbox_server)
+from .heartbeat import heartbeat_slot
+from .loopstats import LoopStats
+from .watchdog import Watchdog
 from .defer import multi_async, maybe_failure, Failure, Deferred
 from .eventloop import signal, StopEventLoop
-from .stream import TcpServer
 from .pollers import POLLERS
+from .schedulers import SCHEDULERS
 from .consts import *
 
 
@@ -54,6 +59,10 @@ class Concurrency(object):
         constructor.
     '''
     _creation_counter = 0
+    heartbeat = None
+    '''The :class:`pulsar.async.heartbeat.HeartbeatSlot` of the actor, if
+    available.'''
+    _info_time = None
 
     def make(self, kind, actor_class, monitor, cfg, name=None, aid=None, **kw):
         self.__class__._creation_counter += 1
@@ -65,6 +74,7 @@ class Concurrency(object):
         self.actor_class = actor_class
         self.params = kw
         self.params['monitor'] = monitor
+        self.heartbeat = heartbeat_slot(kind, cfg)
         return self.get_actor()
 
     @property
@@ -90,6 +100,18 @@ handler. By default it return nothing so that the best handler for the
 system is chosen.'''
         return POLLERS[self.cfg.poller]()
 
+    def timer_scheduler(self):
+        '''Return a :class:`Scheduler` instance which sets the
+:attr:`EventLoop.scheduler` for timed callbacks.'''
+        return SCHEDULERS[self.cfg.scheduler]()
+
+    def loop_stats(self):
+        '''Return a :class:`pulsar.async.loopstats.LoopStats` instance which
+sets the :attr:`EventLoop.stats` when the
+:ref:`loop_stats <setting-loop_stats>` setting is positive.'''
+        if self.cfg.loop_stats:
+            return LoopStats(self.cfg.loop_stats)
+
     def run_actor(self, actor):
         '''Start running the ``actor``.'''
         actor.event_loop.run_forever()
@@ -107,6 +129,10 @@ system is chosen.'''
             if a is not actor:
                 set_actor(actor)
             actor.state = ACTOR_STATES.RUN
+            if actor.cfg.watchdog:
+                actor.watchdog = Watchdog(actor.event_loop,
+                                          actor.cfg.watchdog, actor.logger)
+                actor.watchdog.start()
             r = self.periodic_task(actor)
             if r:
                 r.add_callback(partial(self.started, actor))
@@ -118,6 +144,16 @@ system is chosen.'''
     def started(self, actor, result=None):
         actor.logger.info('%s started', actor)
         actor.fire_event('start')
+        actor.event('start').add_callback(partial(self.ready, actor))
+
+    def ready(self, actor, result=None):
+        '''Notify the monitor once the ``start`` callbacks of ``actor`` are
+        done, the monitor uses it when replacing
+        :ref:`recycled actors <actor-recycle>`.'''
+        if actor.is_running():
+            actor.send('monitor', 'notify', actor.info()
+                       ).add_errback(actor.stop)
+        return result
 
     def get_actor(self):
         self.daemon = True
@@ -130,6 +166,8 @@ system is chosen.'''
         '''Create the mailbox for ``actor``.'''
         set_actor(actor)
         client = MailboxClient(actor.monitor.address, actor, event_loop)
+        if actor.cfg.actor_links:
+            actor.links = MailboxLinks(actor, event_loop)
         client.event_loop.call_soon_threadsafe(self.hand_shake, actor)
         client.bind_event('finish', lambda result: event_loop.stop())
         return client
@@ -140,14 +178,25 @@ system is chosen.'''
 This is an internal method called periodically by the :attr:`Actor.event_loop`
 to ping the actor monitor. If successful return a :class:`Deferred` called
 back with the acknowledgement from the monitor.
+
+When the actor has a :attr:`heartbeat` slot, it is beaten at every call while
+the actor information is sent to the monitor every ``MAX_NOTIFY`` seconds,
+unless the actor belongs to an autoscaling pool which needs up to date loads.
 '''
         actor.next_periodic_task = None
         ack = None
         if actor.is_running():
-            actor.logger.debug('notifying the monitor')
-            # if an error occurs, shut down the actor
-            ack = actor.send('monitor', 'notify', actor.info())\
-                       .add_errback(actor.stop)
+            heartbeat = self.heartbeat
+            if heartbeat is not None:
+                heartbeat.beat()
+            if (heartbeat is None or actor.cfg.max_workers or
+                    self._info_time is None or
+                    time() - self._info_time >= MAX_NOTIFY):
+                self._info_time = time()
+                actor.logger.debug('notifying the monitor')
+                # if an error occurs, shut down the actor
+                ack = actor.send('monitor', 'notify', actor.info())\
+                           .add_errback(actor.stop)
             next = max(ACTOR_TIMEOUT_TOLE*actor.cfg.timeout, MIN_NOTIFY)
         else:
             next = 0
@@ -195,6 +244,10 @@ back with the acknowledgement from the monitor.
     def _stop_actor(self, actor):
         '''Exit from the :class:`Actor` domain.'''
         actor.state = ACTOR_STATES.CLOSE
+        if actor.links:
+            actor.links.close()
+        if actor.watchdog:
+            actor.watchdog.stop()
         if actor.event_loop.is_running():
             actor.logger.debug('Closing mailbox')
             actor.mailbox.close()
@@ -213,7 +266,11 @@ class ProcessMixin(object):
         actor.start_coverage()
 
     def setup_event_loop(self, actor):
-        event_loop = new_event_loop(io=self.io_poller(), logger=actor.logger,
+        event_loop = new_event_loop(io=self.io_poller(),
+                                    scheduler=self.timer_scheduler(),
+                                    fast_dispatch=self.cfg.fast_dispatch,
+                                    stats=self.loop_stats(),
+                                    logger=actor.logger,
                                     poll_timeout=actor.params.poll_timeout)
         actor.mailbox = self.create_mailbox(actor, event_loop)
         proc_name = "%s-%s" % (actor.cfg.proc_name, actor)
@@ -281,6 +338,8 @@ to be spawned.'''
         if actor.is_running():
             interval = MONITOR_TASK_PERIOD
             actor.manage_actors()
+            actor.recycle_actors()
+            actor.autoscale()
             actor.spawn_actors()
             actor.stop_actors()
             actor.monitor_task()
@@ -309,13 +368,28 @@ class ArbiterConcurrency(MonitorMixin, ProcessMixin, Concurrency):
             system.daemonize()
         actor.start_coverage()
 
+    def setup_event_loop(self, actor):
+        '''Install the ``SIGHUP`` handler which restarts all workers.'''
+        super(ArbiterConcurrency, self).setup_event_loop(actor)
+        if signal and hasattr(signal, 'SIGHUP'):
+            try:
+                actor.event_loop.add_signal_handler(
+                    signal.SIGHUP, self.handle_restart_signal, actor)
+            except ValueError:
+                pass
+
+    def handle_restart_signal(self, actor, sig, frame):
+        actor.logger.warning("Got %s. Restarting workers.",
+                             system.SIG_NAMES.get(sig))
+        for monitor in list(itervalues(actor.monitors)):
+            monitor.restart_actors()
+
     def create_mailbox(self, actor, event_loop):
         '''Override :meth:`Concurrency.create_mailbox` to create the
         mailbox server.
         '''
-        mailbox = TcpServer(event_loop, '127.0.0.1', 0,
-                            consumer_factory=MailboxConsumer,
-                            name='mailbox')
+        mailbox = create_mailbox_server(event_loop,
+                                        actor.cfg.mailbox_transport)
         # when the mailbox stop, close the event loop too
         mailbox.bind_event('stop', lambda _: event_loop.stop())
         mailbox.bind_event('start', lambda _: event_loop.call_soon_threadsafe(
@@ -409,7 +483,11 @@ class ActorThread(Concurrency, Thread):
 
     def setup_event_loop(self, actor):
         '''Create the event loop but don't install signals.'''
-        event_loop = new_event_loop(io=self.io_poller(), logger=actor.logger,
+        event_loop = new_event_loop(io=self.io_poller(),
+                                    scheduler=self.timer_scheduler(),
+                                    fast_dispatch=self.cfg.fast_dispatch,
+                                    stats=self.loop_stats(),
+                                    logger=actor.logger,
                                     poll_timeout=actor.params.poll_timeout)
         actor.mailbox = self.create_mailbox(actor, event_loop)
 
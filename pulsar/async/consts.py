@@ -51,6 +51,15 @@ ACTOR_JOIN_THREAD_POOL_TIMEOUT = 5  # TIMEOUT WHEN JOINING THE THREAD POOL
 MONITOR_TASK_PERIOD = 2
 '''Interval for :class:`pulsar.Monitor` and :class:`pulsar.Arbiter`
 periodic task.'''
+SCALE_UP_LOAD = 0.8
+'''Autoscaling pools grow when the average load of workers is above this
+value.'''
+SCALE_DOWN_LOAD = 0.3
+'''Autoscaling pools shrink when the average load of workers is below this
+value.'''
+SCALE_TARGET_LOAD = 0.6
+'''Autoscaling pools are resized so that the average load of workers
+approaches this value.'''
 #
 # SPECIAL objects for Deferred
 CONTINUE = object()
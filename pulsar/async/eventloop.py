@@ -1,7 +1,6 @@
 import os
 import sys
 import socket
-from heapq import heappush, heappop
 from functools import partial
 from collections import deque
 from threading import current_thread
@@ -25,6 +24,7 @@ from .stream import create_connection, start_serving, sock_connect, sock_accept
 from .udp import create_datagram_endpoint
 from .consts import DEFAULT_CONNECT_TIMEOUT, DEFAULT_ACCEPT_TIMEOUT
 from .pollers import DefaultIO
+from .schedulers import DefaultScheduler
 
 __all__ = ['EventLoop', 'TimedCall', 'run_in_loop_thread']
 
@@ -100,6 +100,9 @@ it is created by :meth:`EventLoop.call_soon`, :meth:`EventLoop.call_later`,
 
     Flag indicating this callback is cancelled.
 """
+    _scheduler = None
+    _handle = None
+
     def __init__(self, deadline, callback, args):
         self.reschedule(deadline)
         self._callback = callback
@@ -130,7 +133,10 @@ it is created by :meth:`EventLoop.call_soon`, :meth:`EventLoop.call_later`,
 
     def cancel(self):
         '''Attempt to cancel the callback.'''
-        self._cancelled = True
+        if not self._cancelled:
+            self._cancelled = True
+            if self._scheduler is not None:
+                self._scheduler.cancel(self)
 
     def reschedule(self, new_deadline):
         self._deadline = new_deadline
@@ -182,7 +188,7 @@ class LoopingCall(object):
             event_loop = self.event_loop
             if self.interval:
                 handler.reschedule(event_loop.timer() + self.interval)
-                heappush(event_loop._scheduled, handler)
+                event_loop._scheduler.add(handler)
             else:
                 self.event_loop._callbacks.append(self.handler)
 
@@ -200,22 +206,45 @@ class EventLoop(BaseEventLoop):
 
         Default: ``0.5``
 
+    .. attribute:: fast_dispatch
+
+        If ``True`` I/O events are dispatched directly to the handlers
+        registered with the :attr:`io` poller rather than being added to
+        the callbacks queue. It saves one callback per event at every loop.
+
+        Default: ``False``
+
     .. attribute:: tid
 
         The thread id where this event loop is running. If the
         event loop is not running this attribute is ``None``.
 
+    .. attribute:: stats
+
+        Optional :class:`pulsar.async.loopstats.LoopStats` which measures
+        sampled loop iterations.
+
     """
     poll_timeout = 0.5
     tid = None
     pid = None
     exit_signal = None
     task_factory = Task
+    fast_dispatch = False
+    stats = None
 
     def __init__(self, io=None, logger=None, poll_timeout=None, timer=None,
-                 iothreadloop=True):
+                 iothreadloop=True, scheduler=None, fast_dispatch=None,
+                 stats=None):
         self._io = io or DefaultIO()
+        if fast_dispatch is not None:
+            self.fast_dispatch = fast_dispatch
         self.timer = timer or default_timer
+        if scheduler is None:
+            scheduler = DefaultScheduler(self.timer)
+        self._scheduler = scheduler
+        if stats is not None:
+            self.stats = stats
         self.poll_timeout = poll_timeout if poll_timeout else self.poll_timeout
         self.logger = logger or LOGGER
         close_on_exec(self._io.fileno())
@@ -244,6 +273,14 @@ class EventLoop(BaseEventLoop):
         or else ``select``.'''
         return self._io
 
+    @property
+    def scheduler(self):
+        '''The :class:`Scheduler` of timed callbacks for this event loop.
+
+        By default it is a binary heap, a hierarchical timing wheel is
+        also available.'''
+        return self._scheduler
+
     @property
     def iothreadloop(self):
         '''``True`` if this :class:`EventLoop` install itself as the event
@@ -263,7 +300,8 @@ loop of the thread where it is run.'''
 
     @property
     def active(self):
-        return bool(self._callbacks or self._scheduled)
+        return bool(self._callbacks or self._threadsafe_callbacks or
+                    self._scheduler)
 
     @property
     def num_loops(self):
@@ -338,7 +376,7 @@ Returns a :class:`TimedCall` with a :meth:`TimedCall.cancel` method
 that can be used to cancel the call.'''
         if when > self.timer():
             timeout = TimedCall(when, callback, args)
-            heappush(self._scheduled, timeout)
+            self._scheduler.add(timeout)
             return timeout
         else:
             return self.call_soon(callback, *args)
@@ -364,7 +402,7 @@ Any positional arguments after the callback will be passed to
 the callback when it is called.'''
         if seconds > 0:
             timeout = TimedCall(self.timer() + seconds, callback, args)
-            heappush(self._scheduled, timeout)
+            self._scheduler.add(timeout)
             return timeout
         else:
             return self.call_soon(callback, *args)
@@ -382,9 +420,18 @@ It is safe to call this method from any thread at any time.
 Note that this is the *only* method in :class:`EventLoop` that
 makes this guarantee. all other interaction with the :class:`EventLoop`
 must be done from that :class:`EventLoop`'s thread. It may be used
-to transfer control from other threads to the EventLoop's thread.'''
-        timeout = self.call_soon(callback, *args)
-        self.wake()
+to transfer control from other threads to the EventLoop's thread.
+
+Callbacks are collected in a separate queue which the event loop moves to
+its callbacks at every iteration. Only the first callback added since the
+last move wakes the event loop.'''
+        timeout = TimedCall(None, callback, args)
+        # Append before checking the flag: if the loop has moved the queue
+        # and reset the flag in the meantime, the loop is woken again
+        self._threadsafe_callbacks.append(timeout)
+        if not self._wake_pending:
+            self._wake_pending = True
+            self.wake()
         return timeout
 
     def run_in_executor(self, executor, callback, *args):
@@ -433,6 +480,13 @@ if one is set. A no-op if no callback is currently set for the file
 descriptor.'''
         return self._io.remove_reader(file_descriptor(fd))
 
+    def has_reader(self, fd):
+        '''``True`` if a read callback is set for file descriptor ``fd``.'''
+        try:
+            return bool(self._io.handlers(file_descriptor(fd))[1])
+        except KeyError:
+            return False
+
     def remove_writer(self, fd):
         '''Cancels the current write callback for file descriptor fd,
 if one is set. A no-op if no callback is currently set for the file
@@ -506,7 +560,8 @@ default signal handler ``signal.SIG_DFL``.'''
 
     def start_serving(self, protocol_factory, host=None, port=None, ssl=None,
                       family=socket.AF_UNSPEC, flags=socket.AI_PASSIVE,
-                      sock=None, backlog=100, reuse_address=None):
+                      sock=None, backlog=100, reuse_address=None,
+                      reuse_port=False, accepts=None):
         """Creates a TCP server bound to ``host`` and ``port``.
 
         :param protocol_factory: The :class:`Protocol` which handle server
@@ -530,11 +585,19 @@ default signal handler ``signal.SIG_DFL``.'''
             ``TIME_WAIT`` state, without waiting for its natural timeout to
             expire. If not specified will automatically be set to ``True``
             on UNIX.
+        :param reuse_port: set the ``SO_REUSEPORT`` option so that several
+            sockets, usually in different processes, can listen on the same
+            address. The kernel balances connections across them.
+        :param accepts: maximum number of connections accepted every time
+            the listening socket is ready (defaults to ``NUMBER_ACCEPTS``).
+            Removing the reader of the listening socket from the
+            ``protocol_factory`` stops the current batch.
         :return: a :class:`Deferred` whose result will be a list of socket
             objects which will later be handled by ``protocol_factory``.
         """
         res = start_serving(self, protocol_factory, host, port, ssl,
-                            family, flags, sock, backlog, reuse_address)
+                            family, flags, sock, backlog, reuse_address,
+                            reuse_port, accepts)
         return self.async(res)
 
     def create_datagram_endpoint(self, protocol_factory, local_addr=None,
@@ -588,13 +651,16 @@ the event loop to poll with a 0 timeout all the times.'''
 
     def has_callback(self, callback):
         if callback.deadline:
-            return callback in self._scheduled
+            return callback in self._scheduler
         else:
-            return callback in self._callbacks
+            return (callback in self._callbacks or
+                    callback in self._threadsafe_callbacks)
 
     def clear(self):
         self._callbacks = deque()
-        self._scheduled = []
+        self._threadsafe_callbacks = deque()
+        self._wake_pending = False
+        self._scheduler.clear()
 
     def maybe_async(self, value):
         '''Run ``value`` in this event loop.
@@ -654,27 +720,47 @@ the event loop to poll with a 0 timeout all the times.'''
     def _run_once(self, timeout=None):
         timeout = timeout or self.poll_timeout
         self._num_loops += 1
+        self._move_threadsafe_callbacks()
+        stats = self.stats
+        if stats is not None and self._num_loops % stats.sample:
+            stats = None
         #
         # Compute the desired timeout
         if self._callbacks:
             timeout = 0
-        elif self._scheduled:
-            timeout = min(max(0, self._scheduled[0].deadline - self.timer()),
-                          timeout)
+        else:
+            deadline = self._scheduler.next_deadline()
+            if deadline is not None:
+                timeout = min(max(0, deadline - self.timer()), timeout)
         # poll events
-        self._poll(timeout)
+        if stats is None:
+            self._dispatch_events(self._poll(timeout))
+        else:
+            start = stats.timer()
+            event_pairs = self._poll(timeout)
+            polled = stats.timer()
+            self._dispatch_events(event_pairs)
+        self._move_threadsafe_callbacks()
         #
         # append scheduled callback
-        now = self.timer()
-        while self._scheduled and self._scheduled[0].deadline <= now:
-            self._callbacks.append(heappop(self._scheduled))
+        self._scheduler.pop_due(self.timer(), self._callbacks)
         #
         # Run callbacks
+        self._run_callbacks(stats)
+        if stats is not None:
+            stats.add_loop(polled - start, stats.timer() - polled)
+
+    def _run_callbacks(self, stats=None):
+        # Run the callbacks ready at the start of the call. When ``stats`` is
+        # given, measure the time spent by each callback.
         callbacks = self._callbacks
         todo = len(callbacks)
         for i in range(todo):
             exc_info = None
             callback = callbacks.popleft()
+            if stats is not None:
+                deadline = getattr(callback, 'deadline', None)
+                begin = stats.timer()
             try:
                 value = callback()
             except socket.error as e:
@@ -685,24 +771,61 @@ the event loop to poll with a 0 timeout all the times.'''
             else:
                 if isgenerator(value):
                     self.task_factory(value, event_loop=self)
+            if stats is not None:
+                stats.add_callback(
+                    callback, stats.timer() - begin,
+                    None if deadline is None else begin - deadline)
             if exc_info:
                 Failure(exc_info).log(
                     msg='Unhadled exception in event loop callback.')
 
+    def _move_threadsafe_callbacks(self):
+        # Called at every iteration, also when the queue is empty, so that
+        # the flag set by a thread whose callback was moved already does not
+        # stop later callbacks from waking the loop. The flag is reset
+        # before moving so that callbacks added by other threads while
+        # moving wake the loop. popleft is atomic, swapping the deque would
+        # lose callbacks appended to the old one.
+        self._wake_pending = False
+        threadsafe = self._threadsafe_callbacks
+        append = self._callbacks.append
+        while threadsafe:
+            append(threadsafe.popleft())
+
     def _poll(self, timeout):
-        callbacks = self._callbacks
-        io = self._io
         try:
-            event_pairs = io.poll(timeout)
+            return self._io.poll(timeout)
         except Exception as e:
             if self._raise_loop_error(e):
                 raise
         except KeyboardInterrupt:
             raise StopEventLoop
+        return ()
+
+    def _dispatch_events(self, event_pairs):
+        if self.fast_dispatch:
+            self._dispatch(event_pairs)
         else:
+            io = self._io
+            callbacks = self._callbacks
             for fd, events in event_pairs:
                 callbacks.append(partial(io.handle_events, self, fd, events))
 
+    def _dispatch(self, event_pairs):
+        # Run Poller.handle_events for each event without creating a
+        # callback for each event
+        handle_events = self._io.handle_events
+        for fd, events in event_pairs:
+            try:
+                handle_events(self, fd, events)
+            except socket.error as e:
+                if self._raise_loop_error(e):
+                    Failure(sys.exc_info()).log(
+                        msg='Unhadled exception in event loop callback.')
+            except Exception:
+                Failure(sys.exc_info()).log(
+                    msg='Unhadled exception in event loop callback.')
+
     def _raise_loop_error(self, e):
         # Depending on python version and EventLoop implementation,
         # different exception types may be thrown and there are
@@ -0,0 +1,141 @@
+'''Actors notify their monitor they are alive via the ``notify`` command,
+which sends the whole :meth:`pulsar.Actor.info` dictionary over the mailbox.
+
+When the :ref:`heartbeat <setting-heartbeat>` setting is ``shared``, the
+monitor assigns to each actor it spawns a :class:`HeartbeatSlot` of a
+:class:`HeartbeatTable` in shared memory. The actor increments the counter
+in its slot at every heartbeat and sends its information to the monitor at a
+lower rate, while the monitor reads the counters to check if actors are
+alive.
+
+Slots are only available to actors running on threads and to actors
+running on processes forked from the monitor process.
+'''
+import mmap
+import struct
+import multiprocessing
+from time import time
+
+from pulsar import platform
+from pulsar.utils.config import Global
+
+
+__all__ = ['HeartbeatTable', 'HeartbeatSlot', 'heartbeat_slot']
+
+COUNTER = struct.Struct('Q')
+HEARTBEAT_SLOTS = 4096
+_table = None
+
+
+def forks():
+    '''``True`` if new processes are forked from the current process.'''
+    if platform.type != 'posix':
+        return False
+    get_start_method = getattr(multiprocessing, 'get_start_method', None)
+    return get_start_method is None or get_start_method() == 'fork'
+
+
+def heartbeat_slot(kind, cfg):
+    '''Return a new :class:`HeartbeatSlot` for an actor with concurrency
+    ``kind`` or ``None`` if a slot is not available.'''
+    global _table
+    if cfg.heartbeat != 'shared':
+        return
+    if kind == 'thread' or (kind == 'process' and forks()):
+        if _table is None:
+            _table = HeartbeatTable(HEARTBEAT_SLOTS)
+        return _table.acquire()
+
+
+class HeartbeatTable(object):
+    '''A table of heartbeat counters in anonymous shared memory.
+
+    The table must be created before forking the processes which use it.
+
+    :param size: the number of slots in the table.
+    '''
+    def __init__(self, size):
+        self.size = size
+        self._map = mmap.mmap(-1, size*COUNTER.size)
+        self._free = list(range(size-1, -1, -1))
+
+    def __repr__(self):
+        return 'HeartbeatTable %s/%s' % (self.size - len(self._free),
+                                         self.size)
+
+    def acquire(self):
+        '''Acquire a free :class:`HeartbeatSlot`.
+
+        Return ``None`` if all the slots are taken.'''
+        if self._free:
+            index = self._free.pop()
+            self.write(index, 0)
+            return HeartbeatSlot(self, index)
+
+    def release(self, index):
+        '''Return the slot at ``index`` to the free slots.'''
+        self._free.append(index)
+
+    def read(self, index):
+        '''Read the counter at slot ``index``.'''
+        return COUNTER.unpack_from(self._map, index*COUNTER.size)[0]
+
+    def write(self, index, value):
+        COUNTER.pack_into(self._map, index*COUNTER.size, value)
+
+
+class HeartbeatSlot(object):
+    '''A slot in a :class:`HeartbeatTable`.
+
+    The actor owning the slot invokes :meth:`beat`, its monitor invokes
+    :meth:`last_beat`.
+    '''
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+        self._counter = 0
+        self._last_beat = None
+
+    def __repr__(self):
+        return 'heartbeat slot %s' % self.index
+
+    def beat(self):
+        '''Increment the counter in this slot.'''
+        table = self.table
+        if table is not None:
+            table.write(self.index, table.read(self.index) + 1)
+
+    def last_beat(self):
+        '''The time the monitor first saw the current counter, ``None`` if
+        the actor has not beaten yet.'''
+        if self.table is None:
+            return self._last_beat
+        counter = self.table.read(self.index)
+        if counter != self._counter:
+            self._counter = counter
+            self._last_beat = time()
+        return self._last_beat
+
+    def release(self):
+        '''Release this slot, it can be safely called several times.'''
+        if self.table is not None:
+            self.table.release(self.index)
+            self.table = None
+
+
+class Heartbeat(Global):
+    name = "heartbeat"
+    flags = ["--heartbeat"]
+    choices = ('mailbox', 'shared')
+    default = 'mailbox'
+    desc = """\
+        How actors notify their monitor they are alive.
+
+        ``mailbox`` (the default) sends the actor information at every
+        heartbeat. ``shared`` increments a counter in shared memory and
+        sends the actor information to the monitor every 30 seconds, the
+        information seen by monitors, including the ``load`` used by
+        autoscaling pools, can then be up to 30 seconds old. Actors on
+        processes which are not forked from the monitor always use
+        ``mailbox``.
+        """
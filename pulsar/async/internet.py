@@ -64,6 +64,14 @@ class Protocol(BaseProtocol):
 
       start -> CM [-> DR*] [-> ER?] -> CL -> end
     """
+    buffer_protocol = False
+    '''If ``True`` the protocol supports the buffer protocol.
+
+    The transport reads data into a reusable buffer and passes a memoryview
+    of it to :meth:`data_received`. The memoryview is valid only during the
+    call, data which is not consumed must be copied.
+    '''
+
     def data_received(self, data):
         """Called when some data is received.
 
@@ -150,7 +158,7 @@ class SocketTransport(Transport):
 
     def __repr__(self):
         address = self.address
-        if address:
+        if address is not None:
             family = FAMILY_NAME.get(self._sock.family, 'UNKNOWN')
             return nice_address(address, family)
         else:
@@ -236,8 +244,9 @@ class SocketTransport(Transport):
         raise NotImplementedError
 
     def _check_closed(self):
+        # client unix sockets have an empty address
         address = self.address
-        if not address:
+        if address is None:
             raise IOError("Transport is closed")
         elif self._closing:
             raise IOError("Transport is closing")
@@ -0,0 +1,128 @@
+'''Statistics about the time spent by an :class:`EventLoop`.
+
+When the :ref:`loop_stats <setting-loop_stats>` setting is positive, the
+event loop of actors measures one loop iteration every ``loop_stats``
+iterations and records:
+
+* the time spent polling for I/O events and running callbacks;
+* the loop lag, the time the loop was busy and could not poll;
+* the ``busy`` fraction, a moving average of the time spent running
+  callbacks over the time of an iteration. It is the actor ``load`` used
+  by :ref:`autoscaling pools <setting-max_workers>`;
+* the slowest callbacks and their names;
+* an histogram of how late timed callbacks run after their deadline.
+
+The statistics are available in the ``events`` entry of the
+:meth:`pulsar.Actor.info` dictionary.
+'''
+from bisect import bisect_right
+from functools import partial
+from heapq import heappush, heapreplace
+
+from pulsar.utils.config import Global, validate_pos_int
+from pulsar.utils.pep import default_timer
+
+
+__all__ = ['LoopStats', 'callback_name']
+
+OVERSHOOT_BUCKETS = (0.001, 0.01, 0.1, 1)
+OVERSHOOT_LABELS = ('<1ms', '<10ms', '<100ms', '<1s', '>=1s')
+# Weight of the last sampled iteration in the busy moving average
+BUSY_WEIGHT = 0.1
+
+
+def callback_name(callback):
+    '''The qualified name of an event loop ``callback``.'''
+    callback = getattr(callback, '_callback', callback)
+    while isinstance(callback, partial):
+        callback = callback.func
+    name = getattr(callback, '__qualname__', None)
+    if name is None:
+        name = getattr(callback, '__name__', None)
+        if name is None:
+            name = callback.__class__.__name__
+        else:
+            instance = getattr(callback, '__self__', None)
+            if instance is not None:
+                name = '%s.%s' % (instance.__class__.__name__, name)
+    module = getattr(callback, '__module__', None)
+    return '%s.%s' % (module, name) if module else name
+
+
+class LoopStats(object):
+    '''Collect statistics about an :class:`EventLoop`.
+
+    :param sample: measure one loop iteration every ``sample`` iterations.
+    :param slowest: number of slowest callbacks to keep.
+    :param timer: the callable returning the current time.
+    '''
+    def __init__(self, sample=1, slowest=10, timer=None):
+        self.sample = max(int(sample), 1)
+        self.slowest = slowest
+        self.timer = timer or default_timer
+        self.loops = 0
+        self.poll_time = 0
+        self.callback_time = 0
+        self.max_lag = 0
+        self.busy = 0
+        self.callbacks = 0
+        self.overshoot = [0]*len(OVERSHOOT_LABELS)
+        self._slowest = []
+
+    def __repr__(self):
+        return 'LoopStats every %s loops' % self.sample
+
+    def add_loop(self, poll_time, callback_time):
+        '''Add a measured loop iteration.'''
+        self.loops += 1
+        self.poll_time += poll_time
+        self.callback_time += callback_time
+        if callback_time > self.max_lag:
+            self.max_lag = callback_time
+        total = poll_time + callback_time
+        if total > 0:
+            self.busy += BUSY_WEIGHT*(callback_time/total - self.busy)
+
+    def add_callback(self, callback, duration, overshoot=None):
+        '''Add a ``callback`` which took ``duration`` seconds to run,
+        ``overshoot`` seconds after its deadline.'''
+        self.callbacks += 1
+        if overshoot is not None:
+            self.overshoot[bisect_right(OVERSHOOT_BUCKETS, overshoot)] += 1
+        slowest = self._slowest
+        if len(slowest) < self.slowest:
+            heappush(slowest, (duration, callback_name(callback)))
+        elif duration > slowest[0][0]:
+            heapreplace(slowest, (duration, callback_name(callback)))
+
+    def info(self):
+        '''Dictionary of statistics.'''
+        loops = self.loops
+        return {'sample': self.sample,
+                'sampled_loops': loops,
+                'poll_time': self.poll_time,
+                'callback_time': self.callback_time,
+                'average_lag': self.callback_time/loops if loops else 0,
+                'max_lag': self.max_lag,
+                'busy': self.busy,
+                'sampled_callbacks': self.callbacks,
+                'slowest_callbacks': [{'callback': name, 'time': duration}
+                                      for duration, name in
+                                      sorted(self._slowest, reverse=True)],
+                'timer_overshoot': dict(zip(OVERSHOOT_LABELS,
+                                            self.overshoot))}
+
+
+class LoopStatsSetting(Global):
+    name = "loop_stats"
+    flags = ["--loop-stats"]
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        Measure one event loop iteration every ``loop_stats`` iterations.
+
+        The statistics are reported in the actor info. ``0`` (the default)
+        disables the measurements, ``1`` measures all iterations. Values of
+        a hundred or more are cheap enough to be left on in production.
+        """
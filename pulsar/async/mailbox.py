@@ -15,16 +15,33 @@ The implementation details are outlined below:
 
       send('abc', 'ping')
 
-* The :class:`pulsar.Arbiter` mailbox is a TCP :class:`pulsar.Server`
-  accepting :class:`pulsar.Connection` from remote actors.
+* The :class:`pulsar.Arbiter` mailbox is a :class:`pulsar.Server`
+  accepting :class:`pulsar.Connection` from remote actors. It listens on a
+  unix domain socket when the platform supports it (all actors run in the
+  same host), otherwise on a local TCP socket. The
+  :ref:`mailbox-transport <setting-mailbox_transport>` setting can force
+  either of them.
 * The :attr:`pulsar.Actor.mailbox` is a :class:`pulsar.Client` of the arbiter
   mailbox server.
 * When an actor sends a message to another actor, the arbiter mailbox behaves
   as a proxy server by routing the message to the targeted actor.
 * Communication is bidirectional and there is **only one connection** between
   the arbiter and any given actor.
+* With the :ref:`actor-links <setting-actor_links>` setting, actors
+  listen for direct connections from other actors. A :class:`MailboxLinks`
+  opens a direct connection with a peer the first time a message is sent to
+  it, using the address the peer notified to its monitor. Until the link is
+  available messages are routed by the arbiter.
 * Messages are encoded and decoded using the unmasked websocket protocol
   implemented in :class:`pulsar.utils.websocket.FrameParser`.
+* Message bodies are encoded with the codec selected by the
+  :ref:`mailbox-codec <setting-mailbox_codec>` setting. The ``compact``
+  codec marshals the message fields into a tuple and falls back to pickle
+  for objects which cannot be marshalled. Decoding detects the codec from
+  the message body.
+* Messages sent to a connection during one iteration of the event loop are
+  coalesced into a single websocket frame, written once the iteration
+  completes (see :meth:`MailboxConsumer.flush`).
 * If, for some reasons, the connection between an actor and the arbiter
   get broken, the actor will eventually stop running and garbaged collected.
 
@@ -36,12 +53,22 @@ Actor mailbox protocol
   .. autoclass:: MailboxConsumer
    :members:
    :member-order: bysource
+
+  .. autoclass:: MailboxLinks
+   :members:
+   :member-order: bysource
 '''
+import os
 import sys
+import socket
 import logging
+import marshal
+import tempfile
 from collections import namedtuple
+from functools import partial
 
 from pulsar import ProtocolError, CommandError
+from pulsar.utils.config import Global
 from pulsar.utils.pep import pickle
 from pulsar.utils.internet import nice_address
 from pulsar.utils.websocket import FrameParser
@@ -51,11 +78,77 @@ from .access import get_actor
 from .defer import Failure, Deferred, maybe_async
 from .protocols import ProtocolConsumer
 from .clients import Client, Request
+from .stream import TcpServer
 from .proxy import actorid, get_proxy, get_command, ActorProxy
 
 
 LOGGER = logging.getLogger('pulsar.mailbox')
 CommandRequest = namedtuple('CommandRequest', 'actor caller connection')
+COMMAND_FIELDS = ('command', 'sender', 'target', 'args', 'kwargs', 'ack')
+CALLBACK_FIELDS = ('command', 'ack', 'result')
+COMPACT = b'\x00'
+BATCH = b'\x01'
+LINK_TIMEOUT = 5
+HAS_UNIX_SOCKETS = hasattr(socket, 'AF_UNIX')
+# Abstract namespace unix sockets need no file
+ABSTRACT_NAMESPACE = sys.platform.startswith('linux')
+
+
+def pickle_encode(data):
+    return pickle.dumps(data, protocol=2)
+
+
+def compact_encode(data):
+    '''Encode the message ``data`` as a marshalled tuple of
+    ``COMMAND_FIELDS`` or ``CALLBACK_FIELDS`` values, prefixed by the
+    ``COMPACT`` byte.
+
+    Messages of a different shape or containing objects which cannot be
+    marshalled are pickled.'''
+    try:
+        if data['command'] == 'callback':
+            values = (data['command'], data['ack'], data['result'])
+        else:
+            values = (data['command'], data['sender'], data['target'],
+                      data['args'], data['kwargs'])
+            if 'ack' in data:
+                values += (data['ack'],)
+        if len(values) == len(data):
+            return COMPACT + marshal.dumps(values)
+    except (KeyError, ValueError):
+        pass
+    return pickle_encode(data)
+
+
+def decode_message(body):
+    '''Decode a message ``body`` encoded by any of the ``MAILBOX_CODECS``.
+    '''
+    if body[:1] == COMPACT:
+        values = marshal.loads(body[1:])
+        if len(values) == 3:
+            return dict(zip(CALLBACK_FIELDS, values))
+        else:
+            return dict(zip(COMMAND_FIELDS, values))
+    else:
+        return pickle.loads(body)
+
+
+MAILBOX_CODECS = {'pickle': pickle_encode,
+                  'compact': compact_encode}
+
+
+def batch_encode(bodies):
+    '''Coalesce several encoded message ``bodies`` into one body, prefixed
+    by the ``BATCH`` byte.'''
+    return BATCH + marshal.dumps(list(bodies))
+
+
+def split_batch(body):
+    '''Split a message ``body`` into the list of bodies it carries.'''
+    if body[:1] == BATCH:
+        return marshal.loads(body[1:])
+    else:
+        return (body,)
 
 
 def command_in_context(command, caller, actor, args, kwargs):
@@ -66,6 +159,37 @@ def command_in_context(command, caller, actor, args, kwargs):
     return cmnd(request, args, kwargs)
 
 
+def create_mailbox_server(event_loop, transport='auto', name='mailbox'):
+    '''Create the :class:`pulsar.TcpServer` of a mailbox.
+
+    :param transport: ``unix`` for a unix domain socket, ``tcp`` for a
+        socket listening on the loopback interface and ``auto`` to use unix
+        domain sockets when available.
+    :return: the server, not yet serving.
+    '''
+    if transport == 'auto':
+        transport = 'unix' if HAS_UNIX_SOCKETS else 'tcp'
+    if transport == 'tcp':
+        return TcpServer(event_loop, '127.0.0.1', 0,
+                         consumer_factory=MailboxConsumer, name=name)
+    basename = 'pulsar-%s-%s' % (os.getpid(), gen_unique_id()[:8])
+    if ABSTRACT_NAMESPACE:
+        path = '\0%s' % basename
+    else:
+        path = os.path.join(tempfile.gettempdir(), '%s.sock' % basename)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(path)
+    except Exception:
+        sock.close()
+        raise
+    server = TcpServer(event_loop, sock=sock,
+                       consumer_factory=MailboxConsumer, name=name)
+    if not ABSTRACT_NAMESPACE:
+        server.bind_event('stop', lambda _: os.remove(path))
+    return server
+
+
 class ProxyMailbox(object):
     '''A proxy for the arbiter :class:`Mailbox`.
     '''
@@ -133,8 +257,10 @@ between actors. Encoding and decoding uses the unmasked websocket
 protocol.'''
     def connection_made(self, connection):
         self._pending_responses = {}
+        self._outgoing = []
         self._parser = FrameParser(kind=2)
         actor = get_actor()
+        self._encode = MAILBOX_CODECS[actor.cfg.mailbox_codec]
         if actor.is_arbiter():
             self.connection.bind_event('connection_lost', None,
                                        self._connection_lost)
@@ -152,10 +278,13 @@ protocol.'''
         msg = self._parser.decode(data)
         while msg:
             try:
-                message = pickle.loads(msg.body)
+                messages = [decode_message(body)
+                            for body in split_batch(msg.body)]
             except Exception as e:
                 raise ProtocolError('Could not decode message body: %s' % e)
-            maybe_async(self._responde(message), event_loop=self.event_loop)
+            for message in messages:
+                maybe_async(self._responde(message),
+                            event_loop=self.event_loop)
             msg = self._parser.decode()
 
     def start_request(self, req=None):
@@ -170,6 +299,40 @@ protocol.'''
                 self._write(req)
     start = start_request
 
+    def flush(self):
+        '''Write the messages queued during the current iteration of the
+        event loop.
+
+        A single message is written in its own frame, several messages are
+        coalesced into one frame. Invoked by the event loop once the
+        iteration completes, it can be invoked directly to write queued
+        messages before closing the connection.
+        '''
+        outgoing, self._outgoing = self._outgoing, []
+        if not outgoing:
+            return
+        if len(outgoing) == 1:
+            body = outgoing[0][1]
+        else:
+            body = batch_encode((body for _, body in outgoing))
+        data = self._parser.encode(body, opcode=0x2).msg
+        try:
+            self.transport.write(data)
+        except Exception as e:
+            actor = get_actor()
+            if isinstance(e, IOError) and not actor.is_running():
+                return
+            unhandled = False
+            for req, _ in outgoing:
+                future = self._pending_responses.pop(req.data.get('ack'),
+                                                     None)
+                if future:
+                    future.callback(e)
+                else:
+                    unhandled = True
+            if unhandled:
+                raise
+
     ########################################################################
     ##    INTERNALS
     def _connection_lost(self, failure):
@@ -228,14 +391,9 @@ protocol.'''
         pending.callback(result)
 
     def _write(self, req):
-        obj = pickle.dumps(req.data, protocol=2)
-        data = self._parser.encode(obj, opcode=0x2).msg
-        try:
-            self.transport.write(data)
-        except IOError:
-            actor = get_actor()
-            if actor.is_running():
-                raise
+        if not self._outgoing:
+            self.event_loop.call_soon(self.flush)
+        self._outgoing.append((req, self._encode(req.data)))
 
 
 class MailboxClient(Client):
@@ -263,3 +421,139 @@ class MailboxClient(Client):
                               self.address, self.timeout)
         self.response(req)
         return req.future
+
+    def close_connections(self, async=True):
+        if async and self._consumer is not None and self._consumer.transport:
+            # write messages queued during this loop iteration
+            self._consumer.flush()
+        return super(MailboxClient, self).close_connections(async)
+
+
+class MailboxLinks(object):
+    '''Direct mailbox connections between an :class:`pulsar.Actor` and
+    its peers.
+
+    The :attr:`server` accepts connections from other actors while links
+    with other actors are created the first time they are requested via
+    the :meth:`get` method.
+
+    .. attribute:: server
+
+        The :class:`pulsar.TcpServer` accepting links from other actors.
+    '''
+    def __init__(self, actor, event_loop):
+        self.actor = actor
+        self.event_loop = event_loop
+        self.server = create_mailbox_server(event_loop,
+                                            actor.cfg.mailbox_transport,
+                                            'mailbox links')
+        self.server.start_serving()
+        self._links = {}
+
+    def __repr__(self):
+        return 'Links for %s' % self.actor
+    __str__ = __repr__
+
+    @property
+    def address(self):
+        '''The address other actors connect to.'''
+        return self.server.address
+
+    def get(self, target):
+        '''Return the :class:`MailboxClient` connected with ``target``.
+
+        If the link is not yet available, it starts connecting and return
+        ``None``, in which case the message should be routed by the arbiter.
+        '''
+        aid = actorid(target)
+        link = self._links.get(aid)
+        if link is None:
+            monitor = self.actor.monitor
+            if aid != 'arbiter' and not (monitor and monitor.aid == aid):
+                self._links[aid] = False
+                self.event_loop.async(self._connect(aid))
+        elif link:
+            return link
+
+    def close(self):
+        '''Close the :attr:`server` and all links.'''
+        self.server.close()
+        links, self._links = self._links, {}
+        for link in links.values():
+            if link:
+                link.close()
+
+    #   INTERNALS
+    def _connect(self, aid):
+        actor = self.actor
+        link = None
+        try:
+            address = yield actor.send('arbiter', 'link_address', aid)
+            if address:
+                link = MailboxClient(address, actor, self.event_loop)
+                future = link.request('ping', actor, aid, None, None)
+                yield future.set_timeout(LINK_TIMEOUT, self.event_loop)
+                if self._links.get(aid) is False:
+                    connection = link._consumer.connection
+                    connection.event('connection_lost').add_both(
+                        partial(self._link_lost, aid, link))
+                    self._links[aid] = link
+                    actor.logger.debug('Direct link with %s', aid)
+                    link = None
+        except Exception:
+            actor.logger.debug('Could not link with %s', aid)
+        if link is not None:
+            link.abort()
+
+    def _link_lost(self, aid, link, exc):
+        if self._links.get(aid) is link:
+            self._links.pop(aid)
+        consumer = link._consumer
+        if consumer is not None:
+            pending, consumer._pending_responses = (
+                consumer._pending_responses, {})
+            for future in pending.values():
+                future.callback(ProtocolError('Link with %s lost' % aid))
+        return exc
+
+
+class MailboxCodec(Global):
+    name = "mailbox_codec"
+    flags = ["--mailbox-codec"]
+    choices = tuple(MAILBOX_CODECS)
+    default = 'compact'
+    desc = """\
+        Specify the codec encoding messages between actors.
+
+        ``compact`` marshals the message fields and it is faster than
+        ``pickle`` for messages containing only builtin types. Messages
+        with other objects are always pickled.
+        """
+
+
+class ActorLinks(Global):
+    name = "actor_links"
+    flags = ["--actor-links"]
+    action = "store_true"
+    default = False
+    desc = """\
+        Actors send messages to other actors via direct connections.
+
+        Each actor listens for connections from its peers and messages
+        between actors are no longer routed by the arbiter, once the
+        direct link is established.
+        """
+
+
+class MailboxTransport(Global):
+    name = "mailbox_transport"
+    flags = ["--mailbox-transport"]
+    choices = ('auto', 'unix', 'tcp')
+    default = 'auto'
+    desc = """\
+        Specify the transport of actor mailboxes.
+
+        ``unix`` listens on unix domain sockets, in the abstract namespace
+        on linux, ``tcp`` on the loopback interface. ``auto`` selects
+        ``unix`` when the platform supports it.
+        """
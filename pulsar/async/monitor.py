@@ -1,8 +1,8 @@
-import sys
+from math import ceil
 from time import time
 
 import pulsar
-from pulsar.utils.pep import iteritems, itervalues, range
+from pulsar.utils.pep import iteritems, itervalues, range, default_timer
 
 from . import proxy
 from .actor import Actor
@@ -66,9 +66,17 @@ def _spawn_actor(cls, monitor, cfg=None, name=None, aid=None, **kw):
 class PoolMixin(Actor):
     '''Not an actor per se, this is a mixin for :class:`Actor`
 which manages a pool (group) of actors. Given an :attr:`actor_class`
-it makes sure there are always :attr:`cfg.workers` alive.
+it makes sure there are always :attr:`pool_size` actors alive.
 It is used by both the :class:`Arbiter` and the :class:`Monitor` classes.
 
+When the :ref:`max_workers <setting-max_workers>` setting is positive, the
+pool size is adjusted by the :meth:`autoscale` method between
+:ref:`min_workers <setting-min_workers>` and ``max_workers`` according to the
+``load`` reported by actors in their info dictionary.
+
+Actors are replaced without reducing the capacity of the pool via
+the :meth:`recycle_actor` and :meth:`restart_actors` methods.
+
 .. attribute:: managed_actors
 
     dictionary with keys given by actor's ids and values by
@@ -92,6 +100,23 @@ during its life time.
         self.managed_actors = {}
         self.terminated_actors = []
         self.actor_class = self.params.pop('actor_class') or self.actor_class
+        self._pool_size = None
+        self._scaled = default_timer()
+        self._recycle_queue = []
+
+    @property
+    def pool_size(self):
+        '''The number of actors this pool keeps alive.
+
+        It is the :ref:`workers <setting-workers>` setting unless the pool
+        is autoscaling.'''
+        cfg = self.cfg
+        if self._pool_size is None:
+            if cfg.max_workers:
+                return min(max(cfg.workers, cfg.min_workers), cfg.max_workers)
+            else:
+                return cfg.workers
+        return self._pool_size
 
     def get_actor(self, aid):
         aid = getattr(aid, 'aid', aid)
@@ -122,6 +147,9 @@ during its life time.
         if log:
             self.logger.info('Removing %s', actor)
         self.managed_actors.pop(actor.aid, None)
+        heartbeat = actor.impl.heartbeat
+        if heartbeat is not None:
+            heartbeat.release()
         if self.monitor:
             self.monitor._remove_actor(actor, False)
 
@@ -181,26 +209,102 @@ the timeout, stop the actor.
                 self.send(actor, 'stop')
         return 1
 
+    def recycle_actor(self, actor):
+        '''Spawn a new actor replacing ``actor``.
+
+        ``actor`` is stopped by :meth:`recycle_actors` once its replacement
+        is ready.
+
+        :return: ``True`` if ``actor`` is being recycled.
+        '''
+        if (actor.aid in self.managed_actors and not actor.recycle and
+                not actor.stopping_start and self.is_running()):
+            self.logger.info('Recycling %s.', actor)
+            actor.recycle = self.spawn().aid
+            return True
+        return False
+
+    def restart_actors(self):
+        '''Recycle all managed actors, one at a time.'''
+        self._recycle_queue.extend(self.managed_actors)
+
+    def recycle_actors(self):
+        '''Stop actors being recycled once their replacement is ready and
+        start recycling the next actor queued by :meth:`restart_actors`.
+
+        If the replacement fails to become ready within the
+        :ref:`timeout <setting-timeout>`, the old actor is stopped anyway.
+        '''
+        recycling = False
+        for actor in list(itervalues(self.managed_actors)):
+            if actor.recycle and not actor.stopping_start:
+                new = self.managed_actors.get(actor.recycle)
+                if (new is None or new.ready or default_timer() -
+                        new.spawning_start > new.cfg.timeout):
+                    self.manage_actor(actor, True)
+                else:
+                    recycling = True
+        while self._recycle_queue and not recycling:
+            actor = self.managed_actors.get(self._recycle_queue.pop(0))
+            if actor:
+                recycling = self.recycle_actor(actor)
+
+    def autoscale(self):
+        '''Adjust the :attr:`pool_size` of an autoscaling pool.
+
+        The pool grows when the average ``load`` of actors is above
+        ``SCALE_UP_LOAD`` and shrinks when it is below ``SCALE_DOWN_LOAD``.
+        The new size brings the average load towards ``SCALE_TARGET_LOAD``
+        and the pool is not resized again for
+        :ref:`scale_cooldown <setting-scale_cooldown>` seconds.
+
+        Actors which are stopping or have not yet reported a load are
+        ignored.
+        '''
+        cfg = self.cfg
+        if not cfg.workers or not cfg.max_workers:
+            return
+        if default_timer() - self._scaled < cfg.scale_cooldown:
+            return
+        loads = []
+        for worker in itervalues(self.managed_actors):
+            load = worker.info.get('load')
+            if load is not None and not worker.stopping_start:
+                loads.append(load)
+        if not loads:
+            return
+        load = float(sum(loads))/len(loads)
+        size = self.pool_size
+        if load > SCALE_UP_LOAD or load < SCALE_DOWN_LOAD:
+            target = int(ceil(sum(loads)/SCALE_TARGET_LOAD))
+            target = min(max(target, cfg.min_workers, 1), cfg.max_workers)
+            if target != size:
+                self.logger.info('Scaling pool from %s to %s workers. '
+                                 'Average load %.2f', size, target, load)
+                self._pool_size = target
+                self._scaled = default_timer()
+
     def spawn_actors(self):
         '''Spawn new actors if needed. If the :class:`PoolMixin` is spawning
 do nothing.'''
-        to_spawn = self.cfg.workers - len(self.managed_actors)
-        if self.cfg.workers and to_spawn > 0:
+        pool_size = self.pool_size
+        recycled = sum((1 for w in itervalues(self.managed_actors)
+                        if w.recycle))
+        to_spawn = pool_size - len(self.managed_actors) + recycled
+        if pool_size and to_spawn > 0:
             for _ in range(to_spawn):
                 self.spawn()
 
     def stop_actors(self):
-        """Maintain the number of workers by spawning or killing
+        """Maintain the number of workers by stopping the oldest workers
 as required."""
-        if self.cfg.workers:
-            num_to_kill = len(self.managed_actors) - self.cfg.workers
-            for i in range(num_to_kill, 0, -1):
-                w, kage = 0, sys.maxsize
-                for worker in itervalues(self.managed_actors):
-                    age = worker.impl.age
-                    if age < kage:
-                        w, kage = w, age
-                self.manage_actor(w, True)
+        pool_size = self.pool_size
+        if pool_size:
+            workers = sorted((w for w in itervalues(self.managed_actors)
+                              if not w.stopping_start and not w.recycle),
+                             key=lambda w: w.impl.age)
+            for worker in workers[:max(0, len(workers) - pool_size)]:
+                self.manage_actor(worker, True)
 
     def close_actors(self):
         '''Close all managed :class:`Actor`.'''
@@ -248,7 +352,8 @@ class Monitor(PoolMixin):
         info = super(Monitor, self).info()
         if self.started():
             info['actor'].update({'concurrency': self.cfg.concurrency,
-                                  'workers': len(self.managed_actors)})
+                                  'workers': len(self.managed_actors),
+                                  'pool_size': self.pool_size})
             info['workers'] = [a.info for a in itervalues(self.managed_actors)
                                if a.info]
         return info
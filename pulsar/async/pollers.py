@@ -31,6 +31,11 @@ __all__ = ['Poller']
 
 class Poller(object):
     '''The Poller interface'''
+    edge_triggered = False
+    '''``True`` if the poller reports events only when the state of a file
+    descriptor changes. Handlers of an edge triggered poller must consume all
+    available data, until an ``EWOULDBLOCK`` error.'''
+
     def __init__(self):
         self._handlers = {}
 
@@ -166,7 +171,8 @@ class Poller(object):
             processed = True
             if error:
                 error()
-            else:
+            elif not events & READ:
+                # a hang-up together with READ is handled by the reader
                 loop.logger.warning('Error callback without handler for file'
                                     ' descriptor %s.', fd)
         if not processed:
@@ -222,6 +228,42 @@ if hasattr(select, 'epoll'):
 
     POLLERS['epoll'] = IOepoll
 
+    EDGE_EVENTS = READ | WRITE | ERROR | _EPOLLET
+
+    class IOepollET(IOepoll):
+        '''Edge triggered epoll.
+
+        File descriptors are registered once for both read and write events
+        so that adding and removing writers does not require a system call.
+        '''
+        edge_triggered = True
+
+        def poll(self, timeout=0.5):
+            handlers = self._handlers
+            event_pairs = []
+            for fd, events in self._epoll.poll(timeout):
+                if fd in handlers:
+                    mask = handlers[fd][0]
+                    if events & ERROR and not mask & ERROR:
+                        # Let the reader or writer handle the error
+                        events |= READ | WRITE
+                    # Remove events without a handler
+                    events &= mask
+                    if not events:
+                        continue
+                event_pairs.append((fd, events))
+            return event_pairs
+
+        def _register(self, fd, events, old_events=None):
+            if old_events is None:
+                self._epoll.register(fd, EDGE_EVENTS)
+            elif events & READ and not old_events & READ:
+                # New reader, rearm the file descriptor so that available
+                # data is reported
+                self._epoll.modify(fd, EDGE_EVENTS)
+
+    POLLERS['epollet'] = IOepollET
+
 if hasattr(select, 'kqueue'):     # pragma    nocover
 
     KQ_FILTER_READ = select.KQ_FILTER_READ
@@ -354,5 +396,21 @@ class PollerSetting(Global):
         Specify the default selector used for I/O event polling.
 
         The default value is the best possible for the system running the
-        application.
+        application. On linux, ``epollet`` selects edge triggered ``epoll``,
+        which avoids a system call every time a socket starts or stops
+        waiting to write.
+        """
+
+
+class FastDispatch(Global):
+    name = "fast_dispatch"
+    flags = ["--fast-dispatch"]
+    action = "store_true"
+    default = False
+    desc = """\
+        Dispatch I/O events directly to their handlers.
+
+        When set, the event loop runs the handlers registered with the poller
+        as soon as the poller returns events, rather than adding a new
+        callback for each event to the callbacks queue.
         """
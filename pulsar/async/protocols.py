@@ -3,6 +3,7 @@ from functools import partial
 
 from pulsar import TooManyConnections, ProtocolError
 from pulsar.utils.internet import nice_address, format_address
+from pulsar.utils.pep import ispy26
 
 from .defer import multi_async, log_failure
 from .events import EventHandler
@@ -54,6 +55,14 @@ class ProtocolConsumer(EventHandler):
     _connection = None
     _request = None
     _data_received_count = 0
+    buffer_protocol = False
+    '''If ``True`` the :meth:`data_received` method accepts a memoryview
+    of the transport read buffer and parses it in place.
+
+    The memoryview is valid only during the call, data which is not consumed
+    must be copied. Consumers which don't support the buffer protocol always
+    receive bytes.
+    '''
     ONE_TIME_EVENTS = ('pre_request', 'post_request')
     MANY_TIMES_EVENTS = ('data_received', 'data_processed')
 
@@ -195,6 +204,9 @@ class ProtocolConsumer(EventHandler):
         # the high level data_received method which must be implemented
         # by subclasses
         self._data_received_count = self._data_received_count + 1
+        if (not self.buffer_protocol and not ispy26 and
+                isinstance(data, memoryview)):
+            data = data.tobytes()
         self.fire_event('data_received', data=data)
         result = self.data_received(data)
         self.fire_event('data_processed', data=data)
@@ -350,6 +362,9 @@ class Connection(EventHandler, Protocol):
         else:
             assert self._current_consumer is None, 'Consumer is not None'
             self._current_consumer = consumer
+            # The transport reads into a reusable buffer if the consumer
+            # supports it. The value is kept for the next consumer.
+            self.buffer_protocol = consumer.buffer_protocol
             consumer._connection = self
             self._processed += 1
             consumer.connection_made(self)
@@ -170,8 +170,14 @@ class ActorProxyMonitor(ActorProxy):
         has completed. The :attr:`mailbox` is a server-side
         :class:`pulsar.async.mailbox.MailboxConsumer` instance and it is used
         by the :func:`send` function to send messages to the remote actor.
+
+    .. attribute:: recycle
+
+        The id of the actor replacing this actor when it is being
+        :ref:`recycled <actor-recycle>`, otherwise ``None``.
     '''
     monitor = None
+    recycle = None
 
     def __init__(self, impl):
         self.impl = impl
@@ -185,8 +191,21 @@ class ActorProxyMonitor(ActorProxy):
     @property
     def notified(self):
         '''Last time this :class:`ActorProxyMonitor` was notified by the
-        remote actor.'''
-        return self.info.get('last_notified')
+        remote actor, either via the ``notify`` command or via its
+        heartbeat slot.'''
+        notified = self.info.get('last_notified')
+        heartbeat = self.impl.heartbeat
+        if heartbeat is not None:
+            last_beat = heartbeat.last_beat()
+            if last_beat and (not notified or last_beat > notified):
+                notified = last_beat
+        return notified
+
+    @property
+    def ready(self):
+        '''``True`` once the remote actor has run all its ``start``
+        callbacks.'''
+        return bool(self.info.get('actor', {}).get('ready'))
 
     @property
     def pid(self):
@@ -236,4 +255,6 @@ class ActorProxyMonitor(ActorProxy):
             return False
         else:
             dt = default_timer() - self.stopping_start
-            return dt if dt >= ACTOR_ACTION_TIMEOUT else False
+            timeout = max(ACTOR_ACTION_TIMEOUT,
+                          self.cfg.graceful_timeout + MONITOR_TASK_PERIOD)
+            return dt if dt >= timeout else False
@@ -0,0 +1,321 @@
+'''Schedulers keep the :class:`TimedCall` created by
+:meth:`EventLoop.call_later` and :meth:`EventLoop.call_at` until they are due.
+
+Two implementations are available:
+
+* ``heap`` a binary heap. Cancelled timers are removed lazily, when they reach
+  the top of the heap or when they are more than half of the heap.
+* ``wheel`` a hierarchical timing wheel with ``O(1)`` insert and cancel.
+  It is the best choice when a large number of timers is cancelled before
+  expiring, like the idle timeouts of keep-alive connections.
+'''
+from heapq import heappush, heappop, heapify
+
+from pulsar.utils.structures import OrderedDict
+from pulsar.utils.config import Global
+from pulsar.utils.pep import default_timer, range
+
+SCHEDULERS = OrderedDict()
+
+__all__ = ['Scheduler']
+
+
+class Scheduler(object):
+    '''The Scheduler interface.
+
+    :param timer: the callable returning the current time, it must be
+        the same as the :attr:`EventLoop.timer`.
+    '''
+    name = None
+
+    def __init__(self, timer=None):
+        self.timer = timer or default_timer
+
+    def __len__(self):
+        '''Number of timers waiting to be called.'''
+        raise NotImplementedError
+
+    def __contains__(self, timed_call):
+        return timed_call._scheduler is self and not timed_call.cancelled
+
+    def add(self, timed_call):
+        '''Add a :class:`TimedCall` to the scheduler.'''
+        raise NotImplementedError
+
+    def cancel(self, timed_call):
+        '''Called by :meth:`TimedCall.cancel` when ``timed_call`` is
+        cancelled.'''
+        raise NotImplementedError
+
+    def next_deadline(self):
+        '''The time when the scheduler needs to be checked again or ``None``
+        if there are no timers.'''
+        raise NotImplementedError
+
+    def pop_due(self, now, callbacks):
+        '''Remove timers with deadline before ``now`` and append them to
+        ``callbacks``.'''
+        raise NotImplementedError
+
+    def clear(self):
+        '''Remove all timers.'''
+        raise NotImplementedError
+
+    def info(self):
+        '''Dictionary of information about the scheduler occupancy.'''
+        return {'scheduler': self.name,
+                'scheduled': len(self)}
+
+
+class HeapScheduler(Scheduler):
+    '''A :class:`Scheduler` based on a binary heap.'''
+    name = 'heap'
+    compact_size = 100
+    '''Minimum number of cancelled timers before the heap is compacted.'''
+
+    def __init__(self, timer=None):
+        super(HeapScheduler, self).__init__(timer)
+        self._heap = []
+        self._cancelled = 0
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def add(self, timed_call):
+        timed_call._scheduler = self
+        heappush(self._heap, timed_call)
+
+    def cancel(self, timed_call):
+        self._cancelled += 1
+        if (self._cancelled > self.compact_size and
+                2*self._cancelled > len(self._heap)):
+            self._compact()
+
+    def next_deadline(self):
+        heap = self._heap
+        while heap and heap[0].cancelled:
+            self._pop()
+        if heap:
+            return heap[0].deadline
+
+    def pop_due(self, now, callbacks):
+        heap = self._heap
+        while heap and heap[0].deadline <= now:
+            timed_call = self._pop()
+            if not timed_call.cancelled:
+                callbacks.append(timed_call)
+
+    def clear(self):
+        for timed_call in self._heap:
+            timed_call._scheduler = None
+        self._heap = []
+        self._cancelled = 0
+
+    def info(self):
+        info = super(HeapScheduler, self).info()
+        info.update({'heap_size': len(self._heap),
+                     'cancelled': self._cancelled})
+        return info
+
+    def _pop(self):
+        timed_call = heappop(self._heap)
+        timed_call._scheduler = None
+        if timed_call.cancelled:
+            self._cancelled -= 1
+        return timed_call
+
+    def _compact(self):
+        heap = []
+        for timed_call in self._heap:
+            if timed_call.cancelled:
+                timed_call._scheduler = None
+            else:
+                heap.append(timed_call)
+        heapify(heap)
+        self._heap = heap
+        self._cancelled = 0
+
+SCHEDULERS['heap'] = HeapScheduler
+
+
+# Timing wheel levels. The first level has 2**ROOT_BITS slots of one tick,
+# each other level has 2**LEVEL_BITS slots covering the whole previous level.
+ROOT_BITS = 8
+LEVEL_BITS = 6
+LEVELS = 5
+ROOT_SIZE = 1 << ROOT_BITS
+ROOT_MASK = ROOT_SIZE - 1
+LEVEL_SIZE = 1 << LEVEL_BITS
+LEVEL_MASK = LEVEL_SIZE - 1
+MAX_TICKS = (1 << (ROOT_BITS + (LEVELS - 1)*LEVEL_BITS)) - 1
+
+
+class TimingWheel(Scheduler):
+    '''A hierarchical timing wheel :class:`Scheduler`.
+
+    Timers are stored in sets, one for each slot of the wheel, so that
+    inserting and cancelling a timer is ``O(1)``. Timers far in the future are
+    stored in the coarser levels and cascaded to the finer levels as time
+    advances.
+
+    :param resolution: the duration of a tick in seconds. Timers are never
+        called before their deadline and at most one ``resolution`` after it.
+    '''
+    name = 'wheel'
+    resolution = 0.01
+
+    def __init__(self, timer=None, resolution=None):
+        super(TimingWheel, self).__init__(timer)
+        if resolution:
+            self.resolution = resolution
+        self._wheels = ()
+        self.clear()
+
+    def __len__(self):
+        return self._size
+
+    def add(self, timed_call):
+        # Round up the tick so that the timer is never called before its
+        # deadline. Ticks are compared with times as ``tick*resolution``,
+        # the corrections absorb the rounding of the division.
+        deadline = timed_call.deadline
+        tick = -int(-deadline // self.resolution)
+        if tick*self.resolution < deadline:
+            tick += 1
+        elif (tick - 1)*self.resolution >= deadline:
+            tick -= 1
+        if not self._size:
+            self._current = int(self.timer() // self.resolution)
+        timed_call._scheduler = self
+        self._insert(timed_call, tick)
+        self._size += 1
+
+    def cancel(self, timed_call):
+        _, level, slot = timed_call._handle
+        slot.discard(timed_call)
+        self._counts[level] -= 1
+        self._size -= 1
+        timed_call._scheduler = None
+
+    def next_deadline(self):
+        if not self._size:
+            return None
+        current = self._current
+        wheel = self._wheels[0]
+        if not current & ROOT_MASK:
+            # a cascade is pending
+            return current*self.resolution
+        elif self._counts[0]:
+            end = (current | ROOT_MASK) + 1
+            for tick in range(current, end):
+                if wheel[tick & ROOT_MASK]:
+                    return tick*self.resolution
+        # No timers in the first level before the next cascade
+        return ((current | ROOT_MASK) + 1)*self.resolution
+
+    def pop_due(self, now, callbacks):
+        # the last tick due, the largest with tick*resolution <= now
+        last = int(now // self.resolution)
+        if (last + 1)*self.resolution <= now:
+            last += 1
+        elif last*self.resolution > now:
+            last -= 1
+        wheel = self._wheels[0]
+        due = []
+        while self._size and self._current <= last:
+            current = self._current
+            index = current & ROOT_MASK
+            if not index:
+                self._cascade(current)
+            slot = wheel[index]
+            if slot:
+                wheel[index] = set()
+                self._counts[0] -= len(slot)
+                self._size -= len(slot)
+                due.extend(slot)
+            if self._counts[0]:
+                self._current += 1
+            else:
+                # Nothing in the first level, jump to the next cascade
+                self._current = min(last + 1, current + ROOT_SIZE - index)
+        if self._current <= last:
+            self._current = last + 1
+        if due:
+            due.sort()
+            for timed_call in due:
+                timed_call._scheduler = None
+                callbacks.append(timed_call)
+
+    def clear(self):
+        for wheel in self._wheels:
+            for slot in wheel:
+                for timed_call in slot:
+                    timed_call._scheduler = None
+        self._wheels = [[set() for _ in range(ROOT_SIZE)]]
+        self._wheels.extend(([set() for _ in range(LEVEL_SIZE)]
+                             for _ in range(LEVELS - 1)))
+        self._counts = [0]*LEVELS
+        self._size = 0
+        self._current = int(self.timer() // self.resolution)
+
+    def info(self):
+        info = super(TimingWheel, self).info()
+        info.update({'resolution': self.resolution,
+                     'levels': list(self._counts),
+                     'slots': [sum(1 for slot in wheel if slot)
+                               for wheel in self._wheels]})
+        return info
+
+    def _insert(self, timed_call, tick):
+        current = self._current
+        delta = tick - current
+        if delta < ROOT_SIZE:
+            level = 0
+            index = max(tick, current) & ROOT_MASK
+        else:
+            if delta > MAX_TICKS:
+                tick = current + MAX_TICKS
+                delta = MAX_TICKS
+            level = 1
+            shift = ROOT_BITS
+            while delta >= 1 << (shift + LEVEL_BITS):
+                level += 1
+                shift += LEVEL_BITS
+            index = (tick >> shift) & LEVEL_MASK
+        slot = self._wheels[level][index]
+        slot.add(timed_call)
+        self._counts[level] += 1
+        timed_call._handle = (tick, level, slot)
+
+    def _cascade(self, current):
+        # Move timers from the coarser levels into the finer ones
+        shift = ROOT_BITS
+        for level in range(1, LEVELS):
+            index = (current >> shift) & LEVEL_MASK
+            wheel = self._wheels[level]
+            slot = wheel[index]
+            if slot:
+                wheel[index] = set()
+                self._counts[level] -= len(slot)
+                for timed_call in slot:
+                    self._insert(timed_call, timed_call._handle[0])
+            if index:
+                break
+            shift += LEVEL_BITS
+
+SCHEDULERS['wheel'] = TimingWheel
+DefaultScheduler = HeapScheduler
+
+
+class SchedulerSetting(Global):
+    name = "scheduler"
+    flags = ["--scheduler"]
+    choices = tuple(SCHEDULERS)
+    default = 'heap'
+    desc = """\
+        Specify the scheduler used for timed callbacks.
+
+        ``heap`` is a binary heap, ``wheel`` a hierarchical timing wheel
+        with constant time insert and cancel, better suited for
+        servers handling a large number of keep-alive connections.
+        """
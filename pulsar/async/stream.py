@@ -20,13 +20,14 @@ import os
 import sys
 import socket
 from functools import partial
+from itertools import islice
 
 from pulsar.utils.exceptions import PulsarException
+from pulsar.utils.pep import ispy26
 from pulsar.utils.internet import (TRY_WRITE_AGAIN, TRY_READ_AGAIN,
                                    ACCEPT_ERRORS, EWOULDBLOCK, EPERM,
                                    format_address, ssl_context, ssl,
-                                   ESHUTDOWN, WRITE_BUFFER_MAX_SIZE)
-from pulsar.utils.structures import merge_prefix
+                                   ESHUTDOWN, SO_REUSEPORT)
 
 from .consts import NUMBER_ACCEPTS
 from .defer import multi_async, Deferred
@@ -37,6 +38,14 @@ SSLV3_ALERT_CERTIFICATE_UNKNOWN = 1
 # Got this error on pypy
 SSL3_WRITE_PENDING = 1
 MAX_CONSECUTIVE_WRITES = 500
+# Maximum number of buffers sent with a single sendmsg call
+MAX_WRITE_VECTORS = 128
+
+if ispy26:  # pragma    nocover
+    # No memoryview, partial writes copy the data not yet sent
+    write_view = lambda data: data
+else:
+    write_view = memoryview
 
 
 class TooManyConsecutiveWrite(PulsarException):
@@ -50,32 +59,40 @@ The primary feature of a stream transport is sending bytes to a protocol
 and receiving bytes from the underlying protocol. Writing to the transport
 is done using the :meth:`write` and :meth:`writelines` methods.
 The latter method is a performance optimisation, to allow software to take
-advantage of specific capabilities in some transport mechanisms.'''
+advantage of specific capabilities in some transport mechanisms.
+
+Data is never copied by the transport. The write buffer holds memoryviews of
+the data and, when the socket supports it, several buffers are sent with
+a single ``sendmsg`` call. When the :attr:`protocol` supports the
+:attr:`Protocol.buffer_protocol`, data is read into a buffer allocated once
+for the transport. Python 2.6 has no memoryview, there the write buffer holds
+the data and reads return bytes.'''
     _paused_reading = False
     _paused_writing = False
+    _recv_view = None
+    _sendmsg = hasattr(socket.socket, 'sendmsg')
 
     def _do_handshake(self):
         self._event_loop.add_reader(self._sock_fd, self._ready_read)
         self._event_loop.call_soon(self._protocol.connection_made, self)
 
-    def pause(self):    # pragma    nocover
+    def pause(self):
         """A :class:`SocketStreamTransport` can be paused and resumed.
-Invoking this method will cause the transport to buffer data coming
-from protocols but not sending it to the :attr:`protocol`. In other words,
-no data will be passed to the :meth:`pulsar.Protocol.data_received` method
-until :meth:`resume` is called."""
+Invoking this method will cause the transport to stop reading from the socket.
+In other words, no data will be passed to the
+:meth:`pulsar.Protocol.data_received` method until :meth:`resume` is called.
+Data left in the socket buffers slows down the sending end."""
         if not self._paused_reading:
             self._paused_reading = True
+            self._event_loop.remove_reader(self._sock_fd)
 
-    def resume(self):    # pragma    nocover
+    def resume(self):
         """Resume the receiving end. Data received will once again be
 passed to the :meth:`pulsar.Protocol.data_received` method."""
         if self._paused_reading:
             self._paused_reading = False
-            buffer = self._read_buffer
-            self._read_buffer = []
-            for chunk in buffer:
-                self._data_received(chunk)
+            if not self._closing:
+                self._event_loop.add_reader(self._sock_fd, self._ready_read)
 
     def pause_writing(self):    # pragma    nocover
         '''Suspend sending data to the network until a subsequent
@@ -96,18 +113,25 @@ be accumulating data in an internal buffer.'''
     def write(self, data):
         '''Write chunk of ``data`` to the endpoint.
         '''
-        if not data:
+        if data:
+            self.writelines((data,))
+
+    def writelines(self, list_of_data):
+        '''Write a list (or any iterable) of data bytes to the transport.
+
+        The data is sent with as few system calls as possible.
+        '''
+        chunks = []
+        for data in list_of_data:
+            if data:
+                assert isinstance(data, bytes)
+                chunks.append(write_view(data))
+        if not chunks:
             return
         self._check_closed()
         is_writing = bool(self._write_buffer)
-        if data:
-            # Add data to the buffer
-            assert isinstance(data, bytes)
-            if len(data) > WRITE_BUFFER_MAX_SIZE:
-                for i in range(0, len(data), WRITE_BUFFER_MAX_SIZE):
-                    self._write_buffer.append(data[i:i+WRITE_BUFFER_MAX_SIZE])
-            else:
-                self._write_buffer.append(data)
+        # Add data to the buffer
+        self._write_buffer.extend(chunks)
         if self._paused_writing:
             return
         # Try to write only when not waiting for write callbacks
@@ -123,11 +147,6 @@ be accumulating data in an internal buffer.'''
             if self._consecutive_writes > MAX_CONSECUTIVE_WRITES:
                 self.abort(TooManyConsecutiveWrite())
 
-    def writelines(self, list_of_data):
-        """Write a list (or any iterable) of data bytes to the transport."""
-        for data in list_of_data:
-            self.write(data)
-
     def _write_continue(self, e):
         return e.args[0] in TRY_WRITE_AGAIN
 
@@ -145,12 +164,22 @@ be accumulating data in an internal buffer.'''
         try:
             while buffer:
                 try:
-                    sent = self._sock.send(buffer[0])
+                    if self._sendmsg and len(buffer) > 1:
+                        sent = self._sock.sendmsg(
+                            list(islice(buffer, MAX_WRITE_VECTORS)))
+                    else:
+                        sent = self._sock.send(buffer[0])
                     if sent == 0:
                         break
-                    merge_prefix(buffer, sent)
-                    buffer.popleft()
                     tot_bytes += sent
+                    # Remove sent data from the buffer without copying
+                    while sent:
+                        chunk = buffer[0]
+                        if sent < len(chunk):
+                            buffer[0] = chunk[sent:]
+                            break
+                        buffer.popleft()
+                        sent -= len(chunk)
                 except self.SocketError as e:
                     if self._write_continue(e):
                         break
@@ -170,29 +199,27 @@ be accumulating data in an internal buffer.'''
     def _ready_read(self):
         # Read from the socket until we get EWOULDBLOCK or equivalent.
         # If any other error occur, abort the connection and re-raise.
-        passes = 0
         chunk = True
         try:
-            while chunk:
+            while chunk and not self._closing and not self._paused_reading:
                 try:
-                    chunk = self._sock.recv(self._read_chunk_size)
+                    if getattr(self._protocol, 'buffer_protocol', False):
+                        chunk = self._recv_into()
+                    else:
+                        chunk = self._sock.recv(self._read_chunk_size)
                 except self.SocketError as e:
                     if self._read_continue(e):
                         return
                     else:
                         raise
                 if chunk:
-                    if self._paused_reading:
-                        self._read_buffer.append(chunk)
-                    else:
-                        self._protocol.data_received(chunk)
-                elif not passes and chunk == b'':
+                    self._protocol.data_received(chunk)
+                else:
                     # We got empty data. Close the socket
                     try:
                         self._protocol.eof_received()
                     finally:
                         self.close()
-                passes += 1
             return
         except self.SocketError:
             failure = None if self._closing else sys.exc_info()
@@ -201,6 +228,16 @@ be accumulating data in an internal buffer.'''
         if failure:
             self.abort(failure)
 
+    def _recv_into(self):
+        # Read into the reusable buffer and return a memoryview of the data
+        if ispy26:  # pragma    nocover
+            return self._sock.recv(self._read_chunk_size)
+        view = self._recv_view
+        if view is None:
+            self._recv_view = view = memoryview(
+                bytearray(self._read_chunk_size))
+        return view[:self._sock.recv_into(view)]
+
     def mute_read_error(self, error):
         '''Return ``True`` if a socket error from a read operation is muted.
 
@@ -212,6 +249,7 @@ be accumulating data in an internal buffer.'''
 
 class SocketStreamSslTransport(SocketStreamTransport):
     SocketError = getattr(ssl, 'SSLError', None)
+    _sendmsg = False
 
     def __init__(self, event_loop, rawsock, protocol, sslcontext,
                  server_side=True, server_hostname=None, **kwargs):
@@ -288,7 +326,31 @@ class TcpServer(Server):
         :class:`ProtocolConsumer` which handle the receiving, decoding and
         sending of data.
 
+    :param accepts: maximum number of connections accepted every time the
+        listening socket is ready. Defaults to ``NUMBER_ACCEPTS``.
+    :param max_concurrent_connections: optional maximum number of open
+        connections. When reached, the server stops accepting connections
+        until one is closed.
+
+    The server stops accepting connections also once it has received
+    :attr:`max_connections` connections, rather than accepting and then
+    closing them.
     '''
+    _sslcontext = None
+    _paused = False
+    _draining = False
+
+    def __init__(self, *args, **kw):
+        self._accepts = kw.pop('accepts', None) or NUMBER_ACCEPTS
+        self._max_concurrent = kw.pop('max_concurrent_connections', None)
+        super(TcpServer, self).__init__(*args, **kw)
+        self._open_connections = 0
+
+    @property
+    def accepting(self):
+        '''``True`` when the server is accepting new connections.'''
+        return bool(self._sock) and not self._paused
+
     def start_serving(self, backlog=100, sslcontext=None):
         '''Start serving the Tcp socket.
 
@@ -297,12 +359,14 @@ class TcpServer(Server):
         :return: a :class:`pulsar.Deferred` called back when the server is
             serving the socket.'''
         if not self.event('start').done():
+            self._sslcontext = sslcontext
             res = self._event_loop.start_serving(self.protocol_factory,
                                                  host=self._host,
                                                  port=self._port,
                                                  sock=self._sock,
                                                  backlog=backlog,
-                                                 ssl=sslcontext)
+                                                 ssl=sslcontext,
+                                                 accepts=self._accepts)
             return res.add_callback(self._got_sockets
                                     ).add_both(partial(self.fire_event,
                                                        'start'))
@@ -317,16 +381,90 @@ class TcpServer(Server):
         '''Same as :meth:`stop_serving` method.'''
         self.stop_serving()
 
+    def drain(self, timeout=None):
+        '''Stop accepting connections and close connections once idle.
+
+        Connections without a request in progress are closed immediately,
+        the others once their current request has finished. Connections
+        still open after ``timeout`` seconds are aborted.
+
+        The listening socket is not closed since it may be shared with
+        other servers.
+
+        :return: a :class:`pulsar.Deferred` called back once all connections
+            are closed.
+        '''
+        self._draining = True
+        self._pause_accepting()
+        closed = []
+        for connection in list(self._concurrent_connections):
+            closed.append(connection.event('connection_lost'))
+            consumer = connection.current_consumer
+            if consumer is None:
+                connection.close()
+            else:
+                consumer.event('post_request').add_both(
+                    partial(self._close_drained, connection))
+        closed = multi_async(closed)
+        if timeout and not closed.done():
+            handle = self._event_loop.call_later(
+                timeout, self.close_connections, None, False)
+            closed.add_both(partial(self._drained, handle))
+        return closed
+
     def _got_sockets(self, sockets):
         self._sock = sockets[0]
         self.logger.info('%s serving on %s', self._name,
                          format_address(self.address))
         return self
 
+    def protocol_factory(self):
+        connection = super(TcpServer, self).protocol_factory()
+        self._open_connections += 1
+        if self._full():
+            self._pause_accepting()
+        return connection
+
+    def _close_drained(self, connection, result):
+        connection.close()
+        return result
+
+    def _drained(self, handle, result):
+        handle.cancel()
+        return result
+
     def _stop_serving(self, sock):
         self._event_loop.stop_serving(sock)
         self.fire_event('stop')
 
+    def _connection_lost(self, connection, exc):
+        self._open_connections -= 1
+        if self._paused and not self._full():
+            self._resume_accepting()
+        return super(TcpServer, self)._connection_lost(connection, exc)
+
+    def _full(self):
+        return (self._draining or
+                self._received >= self._max_connections or
+                (self._max_concurrent and
+                 self._open_connections >= self._max_concurrent))
+
+    def _pause_accepting(self):
+        if self._sock and not self._paused:
+            self._paused = True
+            self._event_loop.remove_reader(self._sock.fileno())
+            self.logger.info('%s stopped accepting connections', self)
+
+    def _resume_accepting(self):
+        if self._sock and self._paused:
+            self._paused = False
+            self._event_loop.add_reader(self._sock.fileno(),
+                                        sock_accept_connection,
+                                        self._event_loop,
+                                        self.protocol_factory, self._sock,
+                                        self._sslcontext, self._accepts)
+            self.logger.info('%s accepting connections', self)
+
 
 def create_connection(event_loop, protocol_factory, host, port, ssl,
                       family, proto, flags, sock, local_addr):
@@ -408,7 +546,8 @@ def create_connection(event_loop, protocol_factory, host, port, ssl,
 
 
 def start_serving(event_loop, protocol_factory, host, port, ssl,
-                  family, flags, sock, backlog, reuse_address):
+                  family, flags, sock, backlog, reuse_address, reuse_port,
+                  accepts=None):
     #Coroutine which starts socket servers
     if host is not None or port is not None:
         if sock is not None:
@@ -416,6 +555,8 @@ def start_serving(event_loop, protocol_factory, host, port, ssl,
                 'host/port and sock can not be specified at the same time')
         if reuse_address is None:
             reuse_address = os.name == 'posix' and sys.platform != 'cygwin'
+        if reuse_port and SO_REUSEPORT is None:
+            raise ValueError('reuse_port not supported by this platform')
         sockets = []
         if host == '':
             host = None
@@ -435,6 +576,8 @@ def start_serving(event_loop, protocol_factory, host, port, ssl,
                 if reuse_address:
                     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR,
                                     True)
+                if reuse_port:
+                    sock.setsockopt(socket.SOL_SOCKET, SO_REUSEPORT, True)
                 # Disable IPv4/IPv6 dual stack support (enabled by
                 # default on Linux) which makes a single socket
                 # listen on both address families.
@@ -463,7 +606,8 @@ def start_serving(event_loop, protocol_factory, host, port, ssl,
         sock.listen(backlog)
         sock.setblocking(False)
         event_loop.add_reader(sock.fileno(), sock_accept_connection,
-                              event_loop, protocol_factory, sock, ssl)
+                              event_loop, protocol_factory, sock, ssl,
+                              accepts)
     yield sockets
 
 
@@ -529,10 +673,15 @@ def sock_accept(event_loop, sock, future=None):    # pragma    nocover
     return future
 
 
-def sock_accept_connection(event_loop, protocol_factory, sock, ssl):
-    '''Used by start_serving.'''
+def sock_accept_connection(event_loop, protocol_factory, sock, ssl,
+                           accepts=None):
+    '''Used by start_serving.
+
+    Accept up to ``accepts`` connections. The batch stops once the
+    ``protocol_factory`` removes the reader of ``sock``.'''
+    fd = sock.fileno()
     try:
-        for i in range(NUMBER_ACCEPTS):
+        for i in range(accepts or NUMBER_ACCEPTS):
             try:
                 conn, address = sock.accept()
             except socket.error as e:
@@ -554,5 +703,14 @@ def sock_accept_connection(event_loop, protocol_factory, sock, ssl):
             else:
                 SocketStreamTransport(event_loop, conn, protocol,
                                       extra={'addr': address})
+            if not event_loop.has_reader(fd):
+                # The server stopped accepting connections
+                break
+        else:
+            if event_loop.io.edge_triggered:
+                # There could be more connections to accept and no new
+                # event for them
+                event_loop.call_soon(sock_accept_connection, event_loop,
+                                     protocol_factory, sock, ssl, accepts)
     except Exception:
         logger(event_loop).exception('Could not accept new connection')
@@ -208,6 +208,7 @@ class ThreadPool(object):
         assert self._state == RUN, 'Pool not running'
         d = Deferred()
         self._inqueue.put((d, func, args, kwargs))
+        return d
 
     def close(self, timeout=None):
         '''Close the thread pool.
@@ -0,0 +1,103 @@
+'''A blocked :class:`EventLoop` stops sending heartbeats and its actor is
+eventually terminated by the monitor, without any hint of what was blocking
+it.
+
+When the :ref:`watchdog <setting-watchdog>` setting is positive, each actor
+starts a :class:`Watchdog` thread which checks that the actor event loop
+keeps iterating. If the loop does not complete an iteration for more than
+``watchdog`` seconds, the watchdog logs the stack of the event loop thread.
+'''
+import sys
+import traceback
+from threading import Thread, Event
+
+from pulsar.utils.config import Global, validate_pos_float
+from pulsar.utils.pep import default_timer
+
+
+__all__ = ['Watchdog']
+
+
+class Watchdog(Thread):
+    '''A daemon thread watching an :class:`EventLoop`.
+
+    :param event_loop: the :class:`EventLoop` to watch.
+    :param threshold: seconds without a loop iteration after which the
+        loop is considered blocked. It is at least twice the
+        :attr:`EventLoop.poll_timeout`, the longest time an idle loop
+        waits for events.
+    :param logger: the logger for the stack of blocked loops.
+
+    .. attribute:: blocked
+
+        Number of times the event loop was found blocked.
+
+    .. attribute:: longest
+
+        The longest time, in seconds, the event loop was seen blocked.
+    '''
+    def __init__(self, event_loop, threshold, logger):
+        super(Watchdog, self).__init__(name='%s-watchdog' % event_loop)
+        self.daemon = True
+        self.event_loop = event_loop
+        self.threshold = max(threshold, 2*event_loop.poll_timeout)
+        self.logger = logger
+        self.blocked = 0
+        self.longest = 0
+        self._stop_event = Event()
+
+    def stop(self):
+        '''Stop watching the event loop.'''
+        self._stop_event.set()
+
+    def info(self):
+        return {'threshold': self.threshold,
+                'blocked': self.blocked,
+                'longest': self.longest}
+
+    def run(self):
+        event_loop = self.event_loop
+        wait = self._stop_event.wait
+        interval = 0.25*self.threshold
+        loops = event_loop.num_loops
+        since = default_timer()
+        reported = False
+        while not wait(interval):
+            now = default_timer()
+            if event_loop.num_loops != loops:
+                loops = event_loop.num_loops
+                since = now
+                reported = False
+            elif now - since > self.threshold:
+                self.longest = max(self.longest, now - since)
+                if not reported:
+                    reported = True
+                    self.blocked += 1
+                    self.report(now - since)
+
+    def report(self, blocked):
+        '''Log the stack of the event loop thread blocked for ``blocked``
+        seconds.'''
+        frame = sys._current_frames().get(self.event_loop.tid)
+        if frame is None:
+            return
+        stack = ''.join(traceback.format_stack(frame))
+        self.logger.warning('%s blocked for %.2f seconds. Stack:\n%s',
+                            self.event_loop, blocked, stack)
+
+
+class WatchdogSetting(Global):
+    name = "watchdog"
+    flags = ["--watchdog"]
+    validator = validate_pos_float
+    type = float
+    default = 0
+    desc = """\
+        Log the stack of actors whose event loop is blocked for more than
+        ``watchdog`` seconds.
+
+        A thread in each actor checks the event loop is running. ``0`` (the
+        default) disables the check. The value should be less than the
+        :ref:`timeout <setting-timeout>` so that the stack is logged before
+        the monitor terminates the actor.
+        """
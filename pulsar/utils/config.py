@@ -841,6 +841,57 @@ class Workers(Setting):
         """
 
 
+class MinWorkers(Setting):
+    name = "min_workers"
+    section = "Worker Processes"
+    flags = ["--min-workers"]
+    validator = validate_pos_int
+    type = int
+    default = 1
+    desc = """\
+        The minimum number of workers of an autoscaling pool.
+
+        Used only when :ref:`max_workers <setting-max_workers>` is set.
+        """
+
+
+class MaxWorkers(Setting):
+    name = "max_workers"
+    section = "Worker Processes"
+    flags = ["--max-workers"]
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The maximum number of workers of an autoscaling pool.
+
+        If positive, the number of workers starts at
+        :ref:`workers <setting-workers>` and it is adjusted between
+        ``min_workers`` and ``max_workers`` according to the load reported
+        by workers. Socket servers report their load when
+        :ref:`max_concurrent_connections
+        <setting-max_concurrent_connections>` is set, task queues report
+        the fraction of :ref:`concurrent_tasks <setting-concurrent_tasks>`
+        running. When :ref:`loop_stats <setting-loop_stats>` is positive,
+        the load is at least the fraction of time the worker event loop is
+        busy running callbacks.
+        It has no effect when ``workers`` is zero.
+        """
+
+
+class ScaleCooldown(Setting):
+    name = "scale_cooldown"
+    section = "Worker Processes"
+    flags = ["--scale-cooldown"]
+    validator = validate_pos_float
+    type = float
+    default = 30
+    desc = """\
+        Seconds to wait after resizing an autoscaling pool before resizing
+        it again.
+        """
+
+
 class Concurrency(Setting):
     inherit = True  # Inherited by the arbiter
     name = "concurrency"
@@ -864,7 +915,8 @@ class MaxRequests(Setting):
 
         Any value greater than zero will limit the number of requests a worker
         will process before automatically restarting. This is a simple method
-        to help limit the damage of memory leaks.
+        to help limit the damage of memory leaks. The monitor spawns a new
+        worker and stops the old one once the new worker is ready.
 
         If this is set to zero (the default) then the automatic worker
         restarts are disabled.
@@ -883,6 +935,21 @@ class Timeout(Setting):
         killed and restarted."""
 
 
+class GracefulTimeout(Setting):
+    name = "graceful_timeout"
+    section = "Worker Processes"
+    flags = ["--graceful-timeout"]
+    validator = validate_pos_float
+    type = float
+    default = 3
+    desc = """\
+        Seconds a stopping worker waits for requests in progress to finish.
+
+        Once the timeout is reached the remaining connections are closed and
+        the worker exits.
+        """
+
+
 class ThreadWorkers(Setting):
     name = "thread_workers"
     section = "Worker Processes"
@@ -787,7 +787,8 @@ OTHER DEALINGS IN THE SOFTWARE.'''
         self.errno = None
         self.errstr = ""
         # protected variables
-        self._buf = []
+        self._buf = bytearray()
+        self._scan = 0
         self._version = None
         self._method = None
         self._status_code = None
@@ -873,58 +874,57 @@ OTHER DEALINGS IN THE SOFTWARE.'''
             self.__on_message_complete = True
             return length
         #
-        data = bytes(data)
-        # start to parse
-        nb_parsed = 0
+        # data is accumulated in a bytearray and, until the headers are
+        # complete, scanned from the last position checked so that each byte
+        # is scanned once, regardless how the message is fragmented.
+        buf = self._buf
+        buf.extend(data)
         while True:
             if not self.__on_firstline:
-                idx = data.find(b'\r\n')
+                idx = buf.find(b'\r\n', self._scan)
                 if idx < 0:
-                    self._buf.append(data)
-                    return len(data)
-                else:
-                    self.__on_firstline = True
-                    self._buf.append(data[:idx])
-                    first_line = native_str(b''.join(self._buf),
-                                            DEFAULT_CHARSET)
-                    rest = data[idx+2:]
-                    data = b''
-                    if self._parse_firstline(first_line):
-                        nb_parsed = nb_parsed + idx + 2
-                        self._buf = [rest]
-                    else:
-                        return nb_parsed
+                    self._scan = len(buf) - 1 if buf else 0
+                    return length
+                first_line = native_str(bytes(buf[:idx]), DEFAULT_CHARSET)
+                if not self._parse_firstline(first_line):
+                    return self._nb_parsed(length)
+                self.__on_firstline = True
+                del buf[:idx+2]
+                self._scan = 0
             elif not self.__on_headers_complete:
-                if data:
-                    self._buf.append(data)
-                    data = b''
-                try:
-                    to_parse = b''.join(self._buf)
-                    ret = self._parse_headers(to_parse)
-                    if ret is False:
+                if buf.startswith(b'\r\n'):    # no headers
+                    idx = 0
+                else:
+                    idx = buf.find(b'\r\n\r\n', self._scan)
+                    if idx < 0:  # we don't have all headers
+                        idx = len(buf) - 3
+                        self._scan = idx if idx > 0 else 0
                         return length
-                    nb_parsed = nb_parsed + (len(to_parse) - ret)
+                try:
+                    self._parse_headers(bytes(buf[:idx]))
                 except InvalidHeader as e:
                     self.errno = INVALID_HEADER
                     self.errstr = str(e)
-                    return nb_parsed
+                    return self._nb_parsed(length)
+                del buf[:idx+4 if idx else 2]
+                self._scan = 0
             elif not self.__on_message_complete:
                 self.__on_message_begin = True
-                if data:
-                    self._buf.append(data)
-                    data = b''
                 ret = self._parse_body()
                 if ret is None:
-                    return length
+                    break
                 elif ret < 0:
                     return ret
                 elif ret == 0:
                     self.__on_message_complete = True
-                    return length
-                else:
-                    nb_parsed = max(length, ret)
+                    break
             else:
                 return 0
+        if self.__on_message_complete:
+            # data after the end of the message is not parsed, it is the
+            # beginning of a pipelined message.
+            return length - len(buf)
+        return length
 
     def _parse_firstline(self, line):
         try:
@@ -984,37 +984,7 @@ OTHER DEALINGS IN THE SOFTWARE.'''
         self._version = (int(match.group(1)), int(match.group(2)))
 
     def _parse_headers(self, data):
-        if data == b'\r\n':
-            self.__on_headers_complete = True
-            self._buf = []
-            return 0
-        idx = data.find(b'\r\n\r\n')
-        if idx < 0:  # we don't have all headers
-            return False
-        chunk = native_str(data[:idx], DEFAULT_CHARSET)
-        # Split lines on \r\n keeping the \r\n on each line
-        lines = deque(('%s\r\n' % line for line in chunk.split('\r\n')))
-        # Parse headers into key/value pairs paying attention
-        # to continuation lines.
-        while len(lines):
-            # Parse initial header name : value pair.
-            curr = lines.popleft()
-            if curr.find(":") < 0:
-                continue
-            name, value = curr.split(":", 1)
-            name = name.rstrip(" \t").upper()
-            if HEADER_RE.search(name):
-                raise InvalidHeader("invalid header name %s" % name)
-            name, value = name.strip().lower(), [value.lstrip()]
-            # Consume value continuation lines
-            while len(lines) and lines[0].startswith((" ", "\t")):
-                value.append(lines.popleft())
-            value = ''.join(value).rstrip()
-            # multiple headers
-            if name in self._headers:
-                value = "%s, %s" % (self._headers[name], value)
-            # store new header value
-            self._headers[name] = value
+        self._headers = self._parse_header_lines(data)
         # detect now if body is sent by chunks.
         clen = self._headers.get('content-length')
         te = self._headers.get('transfer-encoding', '').lower()
@@ -1047,77 +1017,118 @@ OTHER DEALINGS IN THE SOFTWARE.'''
                 self.__decompress_obj = zlib.decompressobj(16+zlib.MAX_WBITS)
             elif encoding == "deflate":
                 self.__decompress_obj = zlib.decompressobj()
-        rest = data[idx+4:]
-        self._buf = [rest]
         self.__on_headers_complete = True
         self.__on_message_begin = True
-        return len(rest)
+
+    def _parse_header_lines(self, data):
+        headers = OrderedDict()
+        if not data:
+            return headers
+        chunk = native_str(data, DEFAULT_CHARSET)
+        # Split lines on \r\n keeping the \r\n on each line
+        lines = deque(('%s\r\n' % line for line in chunk.split('\r\n')))
+        # Parse headers into key/value pairs paying attention
+        # to continuation lines.
+        while len(lines):
+            # Parse initial header name : value pair.
+            curr = lines.popleft()
+            if curr.find(":") < 0:
+                continue
+            name, value = curr.split(":", 1)
+            name = name.rstrip(" \t").upper()
+            if HEADER_RE.search(name):
+                raise InvalidHeader("invalid header name %s" % name)
+            name, value = name.strip().lower(), [value.lstrip()]
+            # Consume value continuation lines
+            while len(lines) and lines[0].startswith((" ", "\t")):
+                value.append(lines.popleft())
+            value = ''.join(value).rstrip()
+            # multiple headers
+            if name in headers:
+                value = "%s, %s" % (headers[name], value)
+            # store new header value
+            headers[name] = value
+        return headers
 
     def _parse_body(self):
-        data = b''.join(self._buf)
+        buf = self._buf
         #
         if not self._chunked:
             #
-            if not data and self._clen is None:
+            if self._clen is None and (not buf or not self._status):
                 if not self._status:    # message complete only for servers
                     self.__on_message_complete = True
             else:
-                if self._clen_rest is not None:
-                    self._clen_rest -= len(data)
+                rest = self._clen_rest
+                data = bytes(buf[:rest])
+                del buf[:rest]
+                self._clen_rest -= len(data)
                 # maybe decompress
                 if self.__decompress_obj is not None:
                     data = self.__decompress_obj.decompress(data)
                 self._partial_body = True
                 if data:
                     self._body.append(data)
-                self._buf = []
                 if self._clen_rest <= 0:
                     self.__on_message_complete = True
             return
         else:
             try:
-                size, rest = self._parse_chunk_size(data)
+                size, start = self._parse_chunk_size(buf)
             except InvalidChunkSize as e:
                 self.errno = INVALID_CHUNK
                 self.errstr = "invalid chunk size [%s]" % str(e)
                 return -1
             if size == 0:
                 return size
-            if size is None or len(rest) < size:
+            if size is None or len(buf) < start + size + 2:
                 return None
-            body_part, rest = rest[:size], rest[size:]
-            if len(rest) < 2:
+            end = start + size
+            if buf[end:end+2] != b'\r\n':
                 self.errno = INVALID_CHUNK
-                self.errstr = "chunk missing terminator [%s]" % data
+                self.errstr = "chunk missing terminator [%s]" % bytes(buf)
                 return -1
+            body_part = bytes(buf[start:end])
+            del buf[:end+2]
             # maybe decompress
             if self.__decompress_obj is not None:
                 body_part = self.__decompress_obj.decompress(body_part)
             self._partial_body = True
             self._body.append(body_part)
-            rest = rest[2:]
-            self._buf = [rest] if rest else []
-            return len(rest) + 2
+            return len(buf) + 2
 
     def _parse_chunk_size(self, data):
         idx = data.find(b'\r\n')
         if idx < 0:
             return None, None
-        line, rest_chunk = data[:idx], data[idx+2:]
+        line = bytes(data[:idx])
         chunk_size = line.split(b';', 1)[0].strip()
         try:
             chunk_size = int(chunk_size, 16)
         except ValueError:
             raise InvalidChunkSize(chunk_size)
         if chunk_size == 0:
-            self._parse_trailers(rest_chunk)
+            if not self._parse_trailers(data, idx + 2):
+                return None, None
             return 0, None
-        return chunk_size, rest_chunk
+        return chunk_size, idx + 2
+
+    def _parse_trailers(self, data, start):
+        if data[start:start+2] == b'\r\n':
+            end = start + 2
+        else:
+            idx = data.find(b'\r\n\r\n', start)
+            if idx < 0:
+                return False
+            self._trailers = self._parse_header_lines(bytes(data[start:idx]))
+            end = idx + 4
+        del data[:end]
+        return True
 
-    def _parse_trailers(self, data):
-        idx = data.find(b'\r\n\r\n')
-        if data[:2] == b'\r\n':
-            self._trailers = self._parse_headers(data[:idx])
+    def _nb_parsed(self, length):
+        # number of bytes of the last chunk of data parsed before an error.
+        # The error is in the buffer which ends with the last chunk.
+        return max(length - len(self._buf), 0)
 
 if not hasextensions:   # pragma    nocover
     setDefaultHttpParser(HttpParser)
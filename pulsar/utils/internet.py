@@ -68,6 +68,11 @@ TRY_READ_AGAIN = (EWOULDBLOCK, EAGAIN)
 
 SOCKET_INTERRUPT_ERRORS = (EINTR, ECONNRESET)
 
+# The python 2 socket module does not define SO_REUSEPORT
+SO_REUSEPORT = getattr(socket, 'SO_REUSEPORT', None)
+if SO_REUSEPORT is None and sys.platform.startswith('linux'):  # pragma nocover
+    SO_REUSEPORT = 15
+
 
 def parse_address(netloc, default_port=8000):
     '''Parse an internet address ``netloc`` and return a tuple with
@@ -192,6 +197,8 @@ def close_socket(sock):
 def nice_address(address, family=None):
     if isinstance(address, tuple):
         address = ':'.join((str(s) for s in address[:2]))
+    elif address:
+        address = format_address(address)
     return '%s %s' % (family, address) if family else address
 
 
@@ -203,6 +210,13 @@ def format_address(address):
             return '[%s]:%s' % address[:2]
         else:
             raise ValueError('Could not format address %s' % str(address))
+    elif (isinstance(address, (str, bytes)) and
+          address[:1] in ('\0', b'\0')):
+        # unix socket in the abstract namespace
+        address = address[1:]
+        if not isinstance(address, str):
+            address = address.decode('utf-8')
+        return '@%s' % address
     else:
         return str(address)
 
@@ -8,7 +8,7 @@ from struct import pack, unpack
 from array import array
 from io import BytesIO
 
-from .pep import ispy3k, range, to_bytes
+from .pep import ispy3k, ispy26, range, to_bytes
 from .exceptions import ProtocolError
 
 DEFAULT_VERSION = 13
@@ -27,6 +27,13 @@ else:  # pragma : nocover
     def is_text_data(data):
         return True
 
+if ispy26:  # pragma    nocover
+    # No memoryview, frames are parsed from a copy of the data
+    data_view = tobytes = bytes
+else:
+    data_view = memoryview
+    tobytes = memoryview.tobytes
+
 
 def int2bytes(*ints):
     '''convert a series of integers into bytes'''
@@ -240,6 +247,8 @@ class FrameParser(object):
             self.ws_middleware(extensions, WS_PROTOCOLS)
         self._frame = None  # current frame
         self._buf = None
+        self._payload = None  # payload chunks of the current frame
+        self._payload_size = 0
         self._kind = kind
 
     def ws_middleware(self, names, group):
@@ -309,14 +318,20 @@ class FrameParser(object):
     def decode(self, data=None):
         '''Decode bytes data into a :class:`Frame`. If :attr:`kind` is 0
 it decodes into a client frame (masked frame) while if is 1 or 2 it decodes
-into a server frame (unmasked).'''
+into a server frame (unmasked).
+
+``data`` can be bytes or a memoryview, for example of a transport read
+buffer. The payload of a frame received in several chunks is collected
+chunk by chunk, so that large frames are parsed in linear time.'''
         if data:
             if self._buf:
-                data = self._buf + data
+                self._buf += data
+                data = self._buf
         else:
             data = self._buf
         if not data:
             return None
+        data = data_view(data)
         masked_frame = self.expect_masked
         frame = self._frame
         # No opcode yet
@@ -365,21 +380,31 @@ into a server frame (unmasked).'''
             elif len(data) < mask_length:
                 return self.save_buf(frame, data)
             if d:
-                frame.msg.extend(d)
+                frame.msg += d
             if mask_length:
-                frame.masking_key, data = (data[:mask_length],
+                frame.masking_key, data = (tobytes(data[:mask_length]),
                                            data[mask_length:])
             else:
                 frame.masking_key = b''
             frame.msg.extend(frame.masking_key)
 
-        if len(data) < frame.payload_length:
-            self.save_buf(frame, data)
+        payload = self._payload
+        if payload is None:
+            self._payload = payload = []
+            self._payload_size = 0
+        needed = frame.payload_length - self._payload_size
+        if len(data) < needed:
+            if data:
+                payload.append(tobytes(data))
+                self._payload_size += len(data)
+            self.save_buf(frame, None)
         # We have a frame
         else:
-            payload = data[:frame.payload_length]  # payload data
+            payload.append(tobytes(data[:needed]))
+            payload = b''.join(payload)
+            self._payload = None
             frame.msg.extend(payload)
-            self.save_buf(None, data[frame.payload_length:])
+            self.save_buf(None, data[needed:])
             for extension in self.extensions:
                 data = extension.receive(frame, data)
             if frame.masking_key:
@@ -391,4 +416,4 @@ into a server frame (unmasked).'''
 
     def save_buf(self, frame, data):
         self._frame = frame
-        self._buf = data
+        self._buf = bytearray(data) if data else None
@@ -165,6 +165,38 @@ class TestPythonHttpParser(unittest.TestCase):
         data = b'HTTP/1.1 200 Connection established\r\n\r\n'
         self.assertEqual(p.execute(data, len(data)), len(data))
 
+    def test_headers_byte_by_byte(self):
+        p = self.parser()
+        data = (b'POST /test HTTP/1.1\r\n'
+                b'Host: 0.0.0.0:5000\r\n'
+                b'Accept: */*\r\n'
+                b'Content-Length: 4\r\n\r\nciao')
+        for n in range(len(data) - 4):
+            self.assertFalse(p.is_headers_complete())
+            chunk = data[n:n+1]
+            self.assertEqual(p.execute(chunk, 1), 1)
+        self.assertTrue(p.is_headers_complete())
+        self.assertEqual(p.get_method(), 'POST')
+        headers = p.get_headers()
+        self.assertEqual(len(headers), 3)
+        self.assertEqual(headers.get('accept'), '*/*')
+        self.assertFalse(p.is_message_complete())
+        p.execute(data[-4:], 4)
+        self.assertTrue(p.is_message_complete())
+        self.assertEqual(p.recv_body(), b'ciao')
+
+    def test_chunked_body(self):
+        p = self.parser()
+        data = (b'HTTP/1.1 200 OK\r\n'
+                b'Transfer-Encoding: chunked\r\n\r\n'
+                b'4\r\nciao\r\n7\r\n pulsar\r\n0\r\n\r\n')
+        for n in range(len(data)):
+            chunk = data[n:n+1]
+            self.assertEqual(p.execute(chunk, 1), 1)
+        self.assertTrue(p.is_chunked())
+        self.assertTrue(p.is_message_complete())
+        self.assertEqual(p.recv_body(), b'ciao pulsar')
+
 @unittest.skipUnless(hasextensions, 'Requires C extensions')
 class TestCHttpParser(TestPythonHttpParser):
 
@@ -0,0 +1,83 @@
+'''Tests HTTP pipelining in the wsgi server.'''
+import socket
+
+from pulsar import send
+from pulsar.utils.pep import range
+from pulsar.utils.httpurl import HttpParser
+from pulsar.apps import wsgi
+from pulsar.apps.test import unittest
+
+
+def echo_path(environ, start_response):
+    data = environ['PATH_INFO'].encode('utf-8')
+    # number of requests parsed and queued after this one
+    queued = environ['pulsar.connection'].current_consumer._pipeline
+    start_response('200 OK', [('Content-type', 'text/plain'),
+                              ('Content-Length', str(len(data))),
+                              ('X-Pipeline', str(len(queued or ())))])
+    return [data]
+
+
+class TestHttpPipelining(unittest.TestCase):
+    app = None
+    concurrency = 'thread'
+
+    @classmethod
+    def setUpClass(cls):
+        s = wsgi.WSGIServer(echo_path, name='pipeline_' + cls.concurrency,
+                            concurrency=cls.concurrency, bind='127.0.0.1:0',
+                            http_pipeline=4)
+        cls.app = yield send('arbiter', 'run', s)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.app is not None:
+            yield send('arbiter', 'kill_actor', cls.app.name)
+
+    def pipeline(self, paths, body=b''):
+        sock = socket.create_connection(self.app.address, timeout=5)
+        try:
+            data = b''.join((('POST /%s HTTP/1.1\r\nHost: localhost\r\n'
+                              'Content-Length: %s\r\n\r\n' %
+                              (path, len(body))).encode('utf-8') + body
+                             for path in paths))
+            sock.sendall(data)
+            responses = []
+            parser = HttpParser(kind=1)
+            while len(responses) < len(paths):
+                data = sock.recv(4096)
+                self.assertTrue(data)
+                while data:
+                    parsed = parser.execute(data, len(data))
+                    if parser.is_message_complete():
+                        responses.append(parser)
+                        parser = HttpParser(kind=1)
+                        data = data[parsed:]
+                    else:
+                        data = None
+            return responses
+        finally:
+            sock.close()
+
+    def test_pipelined_requests(self):
+        paths = [str(n) for n in range(3)]
+        responses = self.pipeline(paths)
+        self.assertEqual([r.recv_body() for r in responses],
+                         [('/%s' % p).encode('utf-8') for p in paths])
+
+    def test_pipelined_requests_with_body(self):
+        paths = [str(n) for n in range(3)]
+        responses = self.pipeline(paths, b'pulsar')
+        self.assertEqual([r.recv_body() for r in responses],
+                         [('/%s' % p).encode('utf-8') for p in paths])
+
+    def test_pipeline_limit(self):
+        # More requests than the http_pipeline setting, in one segment
+        paths = [str(n) for n in range(100)]
+        responses = self.pipeline(paths)
+        self.assertEqual([r.recv_body() for r in responses],
+                         [('/%s' % p).encode('utf-8') for p in paths])
+        # no more than http_pipeline requests are parsed ahead
+        queued = [int(r.get_headers()['x-pipeline']) for r in responses]
+        self.assertTrue(max(queued) <= 4)
+        self.assertEqual(queued[-1], 0)
@@ -10,6 +10,8 @@ from pulsar.apps import wsgi
 from pulsar.apps import http
 from pulsar.utils.multipart import parse_form_data, MultipartError
 from pulsar.apps.wsgi.utils import cookie_date
+from pulsar.utils.httpurl import Headers
+from pulsar.apps.wsgi.server import HeaderCache, HttpServerResponse
 from pulsar.apps.test import unittest
 
 
@@ -141,6 +143,56 @@ class WsgiResponseTests(unittest.TestCase):
         self.assertEqual(response['content-type'], 'text/plain')
 
 
+class TestHeaderCache(unittest.TestCase):
+
+    def test_server(self):
+        cache = HeaderCache('pulsar-test')
+        self.assertEqual(cache.server, b'Server: pulsar-test\r\n')
+
+    def test_date(self):
+        cache = HeaderCache('pulsar-test')
+        date = cache.date()
+        self.assertTrue(date.startswith(b'Date: '))
+        self.assertTrue(date.endswith(b' GMT\r\n'))
+        self.assertTrue(cache.date() is date or time.time() > cache._second)
+        cache._second -= 1
+        self.assertFalse(cache.date() is date)
+
+    def test_status_line(self):
+        cache = HeaderCache('pulsar-test')
+        line = cache.status_line((1, 1), '200 OK')
+        self.assertEqual(line, b'HTTP/1.1 200 OK\r\n')
+        self.assertTrue(cache.status_line((1, 1), '200 OK') is line)
+        self.assertEqual(cache.status_line((1, 0), '404 Not Found'),
+                         b'HTTP/1.0 404 Not Found\r\n')
+
+    def response(self, *headers):
+        response = HttpServerResponse(None, wsgi.WSGIServer().cfg,
+                                      'pulsar-test')
+        request = b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n'
+        response.parser.execute(request, len(request))
+        response._status = '200 OK'
+        response._request_headers = Headers(kind='client')
+        response.headers.update(headers + (('Content-Length', '0'),))
+        return response
+
+    def test_headers_bytes(self):
+        data = self.response().headers_bytes()
+        self.assertTrue(data.startswith(b'HTTP/1.1 200 OK\r\nDate: '))
+        self.assertEqual(data.count(b'\r\nServer: '), 1)
+        self.assertTrue(b'\r\nServer: pulsar-test\r\n' in data)
+        self.assertEqual(data.count(b'\r\nDate: '), 1)
+
+    def test_headers_bytes_set_by_application(self):
+        data = self.response(('Server', 'custom'),
+                             ('Date', 'Sun, 06 Nov 1994 08:49:37 GMT')
+                             ).headers_bytes()
+        self.assertEqual(data.count(b'\r\nServer: '), 1)
+        self.assertTrue(b'\r\nServer: custom\r\n' in data)
+        self.assertEqual(data.count(b'\r\nDate: '), 1)
+        self.assertTrue(b'Date: Sun, 06 Nov 1994 08:49:37 GMT\r\n' in data)
+
+
 class testWsgiApplication(unittest.TestCase):
 
     def testBuildWsgiApp(self):
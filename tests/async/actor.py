@@ -1,4 +1,5 @@
 '''Tests actor and actor proxies.'''
+import time
 from multiprocessing.queues import Queue
 
 import pulsar
@@ -16,6 +17,18 @@ def check_actor(actor, name):
     assert(actor.name==name)
 
 
+def send_to_peer(actor, aid):
+    # The first message is routed by the arbiter and starts the link
+    routed = yield actor.send(aid, 'echo', 'routed')
+    yield async_while(3, lambda: not actor.links.get(aid))
+    direct = yield actor.send(aid, 'echo', 'direct')
+    yield routed, direct, actor.links.get(aid) is not None
+
+
+def block(actor, seconds):
+    time.sleep(seconds)
+
+
 class create_echo_server(object):
     '''partial is not picklable in python 2.6'''
     def __init__(self, address):
@@ -88,6 +101,27 @@ class TestActorThread(ActorTestMixin, unittest.TestCase):
         self.assertTrue('actor' in info)
         ainfo = info['actor']
         self.assertEqual(ainfo['is_process'], self.concurrency=='process')
+        self.assertFalse('stats' in info['events'])
+        self.assertFalse('load' in info)
+
+    def test_info_loop_stats(self):
+        proxy = yield self.spawn(name='pippo', loop_stats=1)
+        info = yield send(proxy, 'info')
+        stats = info['events']['stats']
+        self.assertEqual(stats['sample'], 1)
+        self.assertTrue(stats['sampled_loops'])
+        self.assertTrue(stats['slowest_callbacks'])
+        self.assertEqual(info['load'], stats['busy'])
+
+    def test_watchdog(self):
+        proxy = yield self.spawn(name='pippo', watchdog=1)
+        info = yield send(proxy, 'info')
+        self.assertEqual(info['events']['watchdog']['blocked'], 0)
+        yield send(proxy, 'run', block, 2.5)
+        info = yield send(proxy, 'info')
+        watchdog = info['events']['watchdog']
+        self.assertEqual(watchdog['blocked'], 1)
+        self.assertTrue(watchdog['longest'] > 1)
 
     @run_on_arbiter
     def testSimpleSpawn(self):
@@ -121,6 +155,14 @@ class TestActorThread(ActorTestMixin, unittest.TestCase):
         self.assertEqual(result, b'Hello')
         yield self.stop_actors(proxy)
 
+    def test_actor_links(self):
+        proxy1 = yield self.spawn(name='link1', actor_links=True)
+        proxy2 = yield self.spawn(name='link2', actor_links=True)
+        info = yield send(proxy2, 'info')
+        self.assertTrue(info['actor']['link_address'])
+        result = yield send(proxy1, 'run', send_to_peer, proxy2.aid)
+        self.assertEqual(tuple(result), ('routed', 'direct', True))
+
 @dont_run_with_thread
 class TestActorProcess(TestActorThread):
     concurrency = 'process'
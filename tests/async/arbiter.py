@@ -19,6 +19,10 @@ def cause_timeout(actor):
     else:
         actor.event_loop.call_soon(cause_timeout, actor)
 
+def recycle(actor):
+    return actor.recycle()
+
+
 def cause_terminate(actor):
     if actor.next_periodic_task:
         actor.next_periodic_task.cancel()
@@ -90,6 +94,109 @@ class TestArbiterThread(ActorTestMixin, unittest.TestCase):
         self.assertTrue(proxy.aid in arbiter.managed_actors)
         yield send(proxy, 'stop')
 
+    @run_on_arbiter
+    def test_heartbeat_slot(self):
+        arbiter = pulsar.get_actor()
+        name = 'testHeartbeat-%s' % self.concurrency
+        future = spawn(name=name, concurrency=self.concurrency,
+                       heartbeat='shared')
+        heartbeat = arbiter.managed_actors[future.aid].impl.heartbeat
+        self.assertTrue(heartbeat)
+        yield future
+        self.assertTrue(heartbeat.last_beat())
+        self.assertTrue(future.result.notified)
+        yield send(future.result, 'stop')
+
+    @run_on_arbiter
+    def test_autoscale(self):
+        arbiter = pulsar.get_actor()
+        name = 'autoscale-%s' % self.concurrency
+        monitor = arbiter.add_monitor(name, workers=1, max_workers=3,
+                                      scale_cooldown=0,
+                                      concurrency=self.concurrency)
+        self.assertEqual(monitor.pool_size, 1)
+        workers = lambda: [w for w in monitor.managed_actors.values()
+                           if w.info and not w.stopping_start]
+        yield pulsar.async_while(3*MONITOR_TASK_PERIOD,
+                                 lambda: not workers())
+        for worker in workers():
+            worker.info['load'] = 1
+        monitor.autoscale()
+        self.assertEqual(monitor.pool_size, 2)
+        yield pulsar.async_while(3*MONITOR_TASK_PERIOD,
+                                 lambda: len(workers()) < 2)
+        for worker in workers():
+            worker.info['load'] = 3
+        monitor.autoscale()
+        self.assertEqual(monitor.pool_size, 3)
+        for worker in workers():
+            worker.info['load'] = 0
+        monitor.autoscale()
+        self.assertEqual(monitor.pool_size, 1)
+        yield pulsar.async_while(3*MONITOR_TASK_PERIOD,
+                                 lambda: len(workers()) > 1)
+        self.assertEqual(len(workers()), 1)
+        monitor.stop()
+        yield pulsar.async_while(3*MONITOR_TASK_PERIOD,
+                                 lambda: monitor.aid in arbiter.monitors)
+        self.assertFalse(monitor.aid in arbiter.monitors)
+
+    @run_on_arbiter
+    def test_recycle(self):
+        arbiter = pulsar.get_actor()
+        name = 'recycle-%s' % self.concurrency
+        monitor = arbiter.add_monitor(name, workers=2,
+                                      concurrency=self.concurrency)
+        workers = lambda: set(w.aid for w in monitor.managed_actors.values()
+                              if w.ready and not w.recycle)
+        yield pulsar.async_while(3*MONITOR_TASK_PERIOD,
+                                 lambda: len(workers()) < 2)
+        old = workers()
+        self.assertEqual(len(old), 2)
+        # Rolling restart of all workers
+        monitor.restart_actors()
+        yield pulsar.async_while(8*MONITOR_TASK_PERIOD,
+                                 lambda: old & set(monitor.managed_actors))
+        self.assertFalse(old & set(monitor.managed_actors))
+        # Workers can ask to be recycled
+        old = workers()
+        self.assertEqual(len(old), 2)
+        aid = old.pop()
+        result = yield send(monitor.managed_actors[aid], 'run', recycle)
+        self.assertEqual(result, True)
+        self.assertTrue(monitor.managed_actors[aid].recycle)
+        yield pulsar.async_while(4*MONITOR_TASK_PERIOD,
+                                 lambda: aid in monitor.managed_actors)
+        self.assertFalse(aid in monitor.managed_actors)
+        self.assertTrue(old.pop() in monitor.managed_actors)
+        monitor.stop()
+        yield pulsar.async_while(3*MONITOR_TASK_PERIOD,
+                                 lambda: monitor.aid in arbiter.monitors)
+        self.assertFalse(monitor.aid in arbiter.monitors)
+
+    @run_on_arbiter
+    def test_stop_actors_with_stopping_worker(self):
+        arbiter = pulsar.get_actor()
+        name = 'stop-actors-%s' % self.concurrency
+        monitor = arbiter.add_monitor(name, workers=3,
+                                      concurrency=self.concurrency)
+        workers = lambda: [w for w in monitor.managed_actors.values()
+                           if w.ready]
+        yield pulsar.async_while(3*MONITOR_TASK_PERIOD,
+                                 lambda: len(workers()) < 3)
+        ready = workers()
+        stopping, others = ready[0], ready[1:]
+        self.assertEqual(len(others), 2)
+        stopping.stopping_start = default_timer()
+        # fewer running workers than the pool size, nothing to stop
+        monitor.stop_actors()
+        for worker in others:
+            self.assertEqual(worker.stopping_start, None)
+        monitor.stop()
+        yield pulsar.async_while(3*MONITOR_TASK_PERIOD,
+                                 lambda: monitor.aid in arbiter.monitors)
+        self.assertFalse(monitor.aid in arbiter.monitors)
+
     @run_on_arbiter
     def testBadMonitor(self):
         arbiter = pulsar.get_actor()
@@ -1,11 +1,16 @@
 import time
 import sys
+import socket
+from functools import partial
 from threading import current_thread
 
 import pulsar
-from pulsar import Failure, run_in_loop_thread, Deferred
+from pulsar import Failure, run_in_loop_thread, Deferred, TimedCall
+from pulsar.async import pollers
+from pulsar.async.schedulers import HeapScheduler, TimingWheel
+from pulsar.async.loopstats import LoopStats, callback_name
 from pulsar.utils.pep import get_event_loop, new_event_loop
-from pulsar.apps.test import unittest, mute_failure
+from pulsar.apps.test import unittest, mute_failure, mock
 
 
 class TestEventLoop(unittest.TestCase):
@@ -185,3 +190,210 @@ class TestEventLoop(unittest.TestCase):
             pass
         else:
             assert False, "TypeError not raised"
+
+    def test_fast_dispatch(self):
+        event_loop = new_event_loop(iothreadloop=False, fast_dispatch=True)
+        self.assertTrue(event_loop.fast_dispatch)
+        r, w = socket.socketpair()
+        d = pulsar.Deferred()
+        event_loop.add_reader(r.fileno(), lambda: d.callback(r.recv(10)))
+        w.send(b'ping')
+        self.assertEqual(event_loop.run_until_complete(d, timeout=5), b'ping')
+        event_loop.remove_reader(r.fileno())
+        r.close()
+        w.close()
+
+    def test_wake_pending_reset(self):
+        event_loop = new_event_loop(iothreadloop=False)
+        # flag left set by a thread whose callback was moved already
+        event_loop._wake_pending = True
+        event_loop._run_once(0.01)
+        self.assertFalse(event_loop._wake_pending)
+        d = pulsar.Deferred()
+        event_loop.call_soon_threadsafe(d.callback, 'done')
+        self.assertTrue(event_loop._wake_pending)
+        self.assertEqual(event_loop.run_until_complete(d, timeout=5), 'done')
+        self.assertFalse(event_loop._wake_pending)
+
+    def test_dispatch_hang_up(self):
+        # A hang-up together with READ is handled by the reader, with or
+        # without fast dispatch
+        event_loop = new_event_loop(iothreadloop=False, fast_dispatch=True,
+                                    logger=mock.Mock())
+        r, w = socket.socketpair()
+        reader = mock.Mock()
+        event_loop.add_reader(r.fileno(), reader)
+        events = pollers.READ | pollers.ERROR
+        event_loop._dispatch([(r.fileno(), events)])
+        event_loop._io.handle_events(event_loop, r.fileno(), events)
+        self.assertEqual(reader.call_count, 2)
+        self.assertFalse(event_loop.logger.warning.called)
+        event_loop._dispatch([(r.fileno(), pollers.ERROR)])
+        self.assertTrue(event_loop.logger.warning.called)
+        event_loop.remove_reader(r.fileno())
+        r.close()
+        w.close()
+
+    @unittest.skipUnless(hasattr(pollers, 'IOepollET'),
+                         'Edge triggered epoll not available')
+    def test_edge_triggered(self):
+        io = pollers.IOepollET()
+        self.assertTrue(io.edge_triggered)
+        event_loop = new_event_loop(io=io, iothreadloop=False)
+        r, w = socket.socketpair()
+        r.setblocking(False)
+        event_loop.add_writer(r.fileno(), lambda: None)
+        # data is available before the reader is added
+        w.send(b'ping')
+        event_loop.remove_writer(r.fileno())
+        d = pulsar.Deferred()
+        event_loop.add_reader(r.fileno(), lambda: d.callback(r.recv(10)))
+        self.assertEqual(event_loop.run_until_complete(d, timeout=5), b'ping')
+        self.assertEqual(io.handlers(r.fileno())[0], pollers.READ)
+        event_loop.remove_reader(r.fileno())
+        r.close()
+        w.close()
+
+
+class TestSchedulers(unittest.TestCase):
+
+    def timer(self):
+        return self.now
+
+    def _scheduler(self, scheduler_class):
+        self.now = 1000.
+        scheduler = scheduler_class(self.timer)
+        calls = [TimedCall(self.now + t, None, ()) for t in
+                 (0.5, 0.2, 3, 300, 70000, 0.25)]
+        for c in calls:
+            scheduler.add(c)
+        self.assertEqual(len(scheduler), 6)
+        self.assertTrue(calls[0] in scheduler)
+        calls[0].cancel()
+        calls[3].cancel()
+        self.assertFalse(calls[0] in scheduler)
+        self.assertEqual(len(scheduler), 4)
+        fired = []
+        while scheduler:
+            deadline = scheduler.next_deadline()
+            self.assertTrue(deadline)
+            self.now = max(self.now, deadline)
+            scheduler.pop_due(self.now, fired)
+        self.assertEqual(fired, [calls[1], calls[5], calls[2], calls[4]])
+        for c in fired:
+            self.assertTrue(c.deadline <= self.now)
+            self.assertFalse(c in scheduler)
+        info = scheduler.info()
+        self.assertEqual(info['scheduler'], scheduler.name)
+        self.assertEqual(info['scheduled'], 0)
+        return scheduler
+
+    def test_heap(self):
+        scheduler = self._scheduler(HeapScheduler)
+        self.assertEqual(scheduler.next_deadline(), None)
+        self.assertEqual(scheduler.info()['heap_size'], 0)
+
+    def test_heap_compact(self):
+        scheduler = HeapScheduler()
+        calls = [TimedCall(1000 + i, None, ()) for i in range(300)]
+        for c in calls:
+            scheduler.add(c)
+        for c in calls[:200]:
+            c.cancel()
+        self.assertEqual(len(scheduler), 100)
+        # compacted once more than half of the heap was cancelled
+        info = scheduler.info()
+        self.assertEqual(info['heap_size'], 149)
+        self.assertEqual(info['cancelled'], 49)
+
+    def test_wheel(self):
+        scheduler = self._scheduler(TimingWheel)
+        self.assertEqual(scheduler.next_deadline(), None)
+        self.assertEqual(scheduler.info()['levels'], [0, 0, 0, 0, 0])
+
+    def _wheel(self):
+        self.now = 0.
+        scheduler = TimingWheel(self.timer, 0.01)
+        calls = [TimedCall(i*0.001, None, ()) for i in range(1, 2000)]
+        for c in calls:
+            scheduler.add(c)
+        return scheduler, calls
+
+    def test_wheel_never_early(self):
+        scheduler, calls = self._wheel()
+        for c in calls:
+            for now in (c.deadline - 0.000005, c.deadline):
+                due = []
+                scheduler.pop_due(now, due)
+                for d in due:
+                    self.assertTrue(d.deadline <= now)
+        scheduler.pop_due(3, [])
+        self.assertFalse(scheduler)
+
+    def test_wheel_late(self):
+        scheduler, calls = self._wheel()
+        fired = 0
+        while scheduler:
+            self.now = scheduler.next_deadline()
+            due = []
+            scheduler.pop_due(self.now, due)
+            for c in due:
+                self.assertTrue(c.deadline <= self.now)
+                self.assertTrue(self.now - c.deadline < 0.01)
+            fired += len(due)
+        self.assertEqual(fired, len(calls))
+
+    def test_wheel_event_loop(self):
+        event_loop = new_event_loop(iothreadloop=False,
+                                    scheduler=TimingWheel())
+        self.assertIsInstance(event_loop.scheduler, TimingWheel)
+        d = pulsar.Deferred()
+        c1 = event_loop.call_later(0.3, d.callback, 'OK')
+        c2 = event_loop.call_later(20, d.callback, 'BAD')
+        self.assertTrue(event_loop.has_callback(c2))
+        c2.cancel()
+        self.assertFalse(event_loop.has_callback(c2))
+        self.assertEqual(event_loop.run_until_complete(d), 'OK')
+        self.assertFalse(event_loop.has_callback(c1))
+
+
+def slow_callback():
+    time.sleep(0.05)
+
+
+class TestLoopStats(unittest.TestCase):
+
+    def test_callback_name(self):
+        self.assertEqual(callback_name(TimedCall(None, slow_callback, ())),
+                         'tests.async.eventloop.slow_callback')
+        name = callback_name(partial(self.test_callback_name))
+        self.assertTrue(name.endswith('TestLoopStats.test_callback_name'))
+
+    def test_stats(self):
+        stats = LoopStats(sample=1, slowest=2)
+        event_loop = new_event_loop(iothreadloop=False, stats=stats)
+        self.assertEqual(event_loop.stats, stats)
+        d = pulsar.Deferred()
+        event_loop.call_soon(slow_callback)
+        event_loop.call_soon(lambda: None)
+        event_loop.call_later(0.1, lambda: None)
+        event_loop.call_later(0.2, d.callback, 'OK')
+        self.assertEqual(event_loop.run_until_complete(d), 'OK')
+        info = stats.info()
+        self.assertTrue(info['sampled_loops'] > 1)
+        self.assertTrue(info['max_lag'] >= 0.05)
+        self.assertTrue(0 < info['busy'] < 1)
+        self.assertTrue(info['poll_time'] > 0)
+        slowest = info['slowest_callbacks']
+        self.assertEqual(len(slowest), 2)
+        self.assertEqual(slowest[0]['callback'],
+                         'tests.async.eventloop.slow_callback')
+        self.assertTrue(slowest[0]['time'] >= 0.05)
+        self.assertEqual(sum(info['timer_overshoot'].values()), 1)
+
+    def test_sample(self):
+        stats = LoopStats(sample=3)
+        event_loop = new_event_loop(iothreadloop=False, stats=stats)
+        for _ in range(9):
+            event_loop._run_once(0.001)
+        self.assertEqual(stats.info()['sampled_loops'], 3)
@@ -0,0 +1,29 @@
+'''Tests the shared memory heartbeat table.'''
+from pulsar.async.heartbeat import HeartbeatTable
+from pulsar.apps.test import unittest
+
+
+class TestHeartbeatTable(unittest.TestCase):
+
+    def test_beat(self):
+        table = HeartbeatTable(2)
+        slot = table.acquire()
+        self.assertEqual(slot.last_beat(), None)
+        slot.beat()
+        slot.beat()
+        self.assertEqual(table.read(slot.index), 2)
+        last_beat = slot.last_beat()
+        self.assertTrue(last_beat)
+        self.assertEqual(slot.last_beat(), last_beat)
+
+    def test_release(self):
+        table = HeartbeatTable(1)
+        slot = table.acquire()
+        slot.beat()
+        self.assertEqual(table.acquire(), None)
+        slot.release()
+        slot.release()
+        slot.beat()
+        slot = table.acquire()
+        self.assertEqual(table.read(slot.index), 0)
+        self.assertEqual(table.acquire(), None)
@@ -0,0 +1,95 @@
+'''Tests the mailbox message codecs and transports.'''
+import os
+from collections import namedtuple
+
+from pulsar import send, multi_async
+from pulsar.utils.pep import new_event_loop, range
+from pulsar.utils.internet import format_address
+from pulsar.async.mailbox import (Message, MAILBOX_CODECS, COMPACT,
+                                  HAS_UNIX_SOCKETS, ABSTRACT_NAMESPACE,
+                                  BATCH, decode_message, batch_encode,
+                                  split_batch, create_mailbox_server)
+from pulsar.apps.test import unittest
+
+
+Point = namedtuple('Point', 'x y')
+
+
+class TestMailboxCodecs(unittest.TestCase):
+
+    def encode(self, codec, data):
+        body = MAILBOX_CODECS[codec](data)
+        return body, decode_message(body)
+
+    def test_compact_command(self):
+        message = Message.command('ping', 'abc', 'arbiter', (1, 'a'),
+                                  {'b': [1.5, None]})
+        body, data = self.encode('compact', message.data)
+        self.assertEqual(body[:1], COMPACT)
+        self.assertEqual(data, message.data)
+        self.assertEqual(data['ack'], message.data['ack'])
+
+    def test_compact_callback(self):
+        message = Message.callback(None, 'ab12')
+        body, data = self.encode('compact', message.data)
+        self.assertEqual(body[:1], COMPACT)
+        self.assertEqual(data['command'], 'callback')
+        self.assertEqual(data['ack'], 'ab12')
+        self.assertEqual(data.get('result'), None)
+
+    def test_compact_fallback(self):
+        message = Message.callback(Point(1, 2), 'ab12')
+        body, data = self.encode('compact', message.data)
+        self.assertNotEqual(body[:1], COMPACT)
+        self.assertEqual(data, message.data)
+        self.assertIsInstance(data['result'], Point)
+
+    def test_pickle(self):
+        message = Message.command('notify', 'abc', 'arbiter', ({'a': 1},),
+                                  None)
+        body, data = self.encode('pickle', message.data)
+        self.assertNotEqual(body[:1], COMPACT)
+        self.assertEqual(data, message.data)
+
+
+class TestMailboxBatch(unittest.TestCase):
+
+    def test_split(self):
+        encode = MAILBOX_CODECS['compact']
+        messages = [Message.command('ping', 'abc', 'arbiter', (), None).data
+                    for _ in range(3)]
+        body = batch_encode((encode(data) for data in messages))
+        self.assertEqual(body[:1], BATCH)
+        bodies = split_batch(body)
+        self.assertEqual(len(bodies), 3)
+        self.assertEqual([decode_message(b) for b in bodies], messages)
+
+    def test_split_single(self):
+        body = MAILBOX_CODECS['pickle'](Message.callback(1, 'ab12').data)
+        self.assertEqual(split_batch(body), (body,))
+
+    def test_many_messages(self):
+        # All messages are sent in the same loop iteration
+        result = yield multi_async((send('arbiter', 'ping')
+                                    for _ in range(500)))
+        self.assertEqual(result, ['pong']*500)
+
+
+class TestMailboxTransport(unittest.TestCase):
+
+    def test_tcp(self):
+        server = create_mailbox_server(new_event_loop(), 'tcp')
+        self.assertEqual(server.sock, None)
+        self.assertEqual(server.address, None)
+
+    @unittest.skipUnless(HAS_UNIX_SOCKETS, 'Requires unix sockets')
+    def test_unix(self):
+        server = create_mailbox_server(new_event_loop(), 'unix')
+        address = server.address
+        server.sock.close()
+        if ABSTRACT_NAMESPACE:
+            self.assertTrue(address[:1] in ('\0', b'\0'))
+            self.assertTrue(format_address(address).startswith('@pulsar-'))
+        else:
+            self.assertTrue(address.endswith('.sock'))
+            os.remove(address)
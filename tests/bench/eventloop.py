@@ -0,0 +1,110 @@
+from threading import Thread
+
+from pulsar import Poller, Deferred, ThreadPool, send
+from pulsar.async.pollers import READ
+from pulsar.utils.pep import new_event_loop, range
+from pulsar.apps.test import unittest
+
+
+def apply_round_trips(actor, num_tasks):
+    pool = ThreadPool(actor, threads=1)
+    for n in range(num_tasks):
+        result = yield pool.apply(abs, -n)
+        assert result == n
+    yield pool.close(5)
+
+
+class ReadyPoller(Poller):
+    '''A poller where all registered file descriptors are always ready.'''
+    def install_waker(self, event_loop):
+        pass
+
+    def poll(self, timeout=0.5):
+        return [(fd, READ) for fd in self._handlers]
+
+    def _register(self, fd, events, old_events=None):
+        pass
+
+
+class TestEventDispatch(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 10
+    num_fds = 1000
+    num_loops = 20
+    benchmark_template = ('\nRepeated {0[number]} times. Average {0[mean]} '
+                          'secs, Stdev {0[std]}. {0[events]} events/second.')
+
+    def getSummary(self, info, number, total_time, total_time2):
+        events = number*self.num_fds*self.num_loops
+        info['events'] = int(events/total_time)
+        return info
+
+    def event_loop(self, fast_dispatch):
+        event_loop = new_event_loop(io=ReadyPoller(), iothreadloop=False,
+                                    fast_dispatch=fast_dispatch)
+        callback = lambda: None
+        for fd in range(self.num_fds):
+            event_loop.add_reader(fd, callback)
+        return event_loop
+
+    def test_callback_dispatch(self):
+        event_loop = self.event_loop(False)
+        for _ in range(self.num_loops):
+            event_loop._run_once()
+
+    def test_fast_dispatch(self):
+        event_loop = self.event_loop(True)
+        for _ in range(self.num_loops):
+            event_loop._run_once()
+
+
+class TestCallSoonThreadsafe(unittest.TestCase):
+    '''Callbacks per second added to an event loop by another thread.'''
+    __benchmark__ = True
+    __number__ = 10
+    num_callbacks = 10000
+    benchmark_template = ('\nRepeated {0[number]} times. Average {0[mean]} '
+                          'secs, Stdev {0[std]}. {0[callbacks]} '
+                          'callbacks/second.')
+
+    def getSummary(self, info, number, total_time, total_time2):
+        info['callbacks'] = int(number*self.num_callbacks/total_time)
+        return info
+
+    def test_call_soon_threadsafe(self):
+        event_loop = new_event_loop(iothreadloop=False)
+        done = Deferred()
+        called = []
+
+        def callback():
+            called.append(None)
+            if len(called) == self.num_callbacks:
+                done.callback(len(called))
+
+        def submit():
+            for _ in range(self.num_callbacks):
+                event_loop.call_soon_threadsafe(callback)
+
+        thread = Thread(target=submit)
+        event_loop.call_soon(thread.start)
+        result = event_loop.run_until_complete(done, timeout=30)
+        self.assertEqual(result, self.num_callbacks)
+        thread.join()
+
+
+class TestThreadPoolApply(unittest.TestCase):
+    '''Round trips per second of :meth:`ThreadPool.apply` between the
+    arbiter event loop and a pool thread.'''
+    __benchmark__ = True
+    __number__ = 10
+    num_tasks = 1000
+    benchmark_template = ('\nRepeated {0[number]} times. Average {0[mean]} '
+                          'secs, Stdev {0[std]}. {0[tasks]} '
+                          'round trips/second.')
+
+    def getSummary(self, info, number, total_time, total_time2):
+        info['tasks'] = int(number*self.num_tasks/total_time)
+        return info
+
+    def test_apply(self):
+        yield send('arbiter', 'run', apply_round_trips, self.num_tasks)
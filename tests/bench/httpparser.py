@@ -0,0 +1,98 @@
+from pulsar.utils.httpurl import hasextensions
+from pulsar.utils.pep import range
+from pulsar.apps.test import unittest
+from pulsar.utils import httpurl
+
+
+REQUEST = (b'GET /forum/bla?page=1 HTTP/1.1\r\n'
+           b'Host: 127.0.0.1:8060\r\n'
+           b'User-Agent: pulsar\r\n'
+           b'Accept: text/html,application/xhtml+xml,application/xml\r\n'
+           b'Accept-Language: en-US,en;q=0.5\r\n'
+           b'Accept-Encoding: gzip, deflate\r\n'
+           b'Cookie: session=a6d9ed6b2b1f4f7e8a1e0c21bd5f9a06\r\n'
+           b'Connection: keep-alive\r\n\r\n')
+# A request with large headers, as sent by a slow client
+EXTRA_HEADERS = ''.join(('X-Header-%s: %s\r\n' % (i, 'x'*40)
+                         for i in range(32))).encode('ascii')
+LARGE_REQUEST = REQUEST[:-2] + EXTRA_HEADERS + b'\r\n'
+
+
+class RejoinHttpParser(object):
+    '''The buffering of the python parser before it became incremental.
+
+    Until the headers are complete, segments are appended to a list which is
+    joined and searched for the end of the headers every time data arrives.'''
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self._buf = []
+        self._parser = None
+
+    def execute(self, data, length):
+        parser = self._parser
+        if parser is not None and parser.is_headers_complete():
+            return parser.execute(data, length)
+        self._buf.append(data)
+        data = b''.join(self._buf)
+        if data.find(b'\r\n\r\n') < 0:
+            return length
+        self._parser = httpurl.HttpParser(**self.kwargs)
+        return self._parser.execute(data, len(data))
+
+    def is_message_complete(self):
+        return self._parser.is_message_complete()
+
+
+class TestPythonHttpParser(unittest.TestCase):
+    '''Parse throughput of HTTP requests.
+
+    The same request is parsed in one segment and in segments of a few bytes,
+    the latter simulating headers arriving in many small TCP packets. A
+    request with large headers is parsed in small segments too.'''
+    __benchmark__ = True
+    __number__ = 10
+    num_requests = 1000
+    segment_size = 4
+    benchmark_template = ('\nRepeated {0[number]} times. Average {0[mean]} '
+                          'secs, Stdev {0[std]}. {0[requests]} '
+                          'requests/second.')
+
+    def parser(self, **kwargs):
+        return httpurl.HttpParser(**kwargs)
+
+    def getSummary(self, info, number, total_time, total_time2):
+        info['requests'] = int(number*self.num_requests/total_time)
+        return info
+
+    def parse(self, segment_size, data=REQUEST):
+        chunks = [data[i:i+segment_size]
+                  for i in range(0, len(data), segment_size)]
+        for _ in range(self.num_requests):
+            p = self.parser(kind=0)
+            for chunk in chunks:
+                p.execute(chunk, len(chunk))
+            assert p.is_message_complete()
+
+    def test_parse(self):
+        self.parse(len(REQUEST))
+
+    def test_parse_segments(self):
+        self.parse(self.segment_size)
+
+    def test_parse_large_segments(self):
+        self.parse(self.segment_size, LARGE_REQUEST)
+
+
+class TestRejoinHttpParser(TestPythonHttpParser):
+    '''Baseline: the python parser re-joining and parsing again the data
+    received until the headers are complete.'''
+
+    def parser(self, **kwargs):
+        return RejoinHttpParser(**kwargs)
+
+
+@unittest.skipUnless(hasextensions, 'Requires C extensions')
+class TestCHttpParser(TestPythonHttpParser):
+
+    def parser(self, **kwargs):
+        return httpurl.CHttpParser(**kwargs)
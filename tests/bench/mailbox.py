@@ -0,0 +1,50 @@
+from pulsar import send, multi_async
+from pulsar.async.mailbox import Message, MAILBOX_CODECS, decode_message
+from pulsar.utils.pep import range
+from pulsar.apps.test import unittest
+
+
+class TestMailboxCodecs(unittest.TestCase):
+    '''Encode and decode throughput of the mailbox codecs.'''
+    __benchmark__ = True
+    __number__ = 10
+    num_messages = 10000
+    benchmark_template = ('\nRepeated {0[number]} times. Average {0[mean]} '
+                          'secs, Stdev {0[std]}. {0[messages]} '
+                          'messages/second.')
+
+    def getSummary(self, info, number, total_time, total_time2):
+        info['messages'] = int(number*self.num_messages/total_time)
+        return info
+
+    def codec(self, name):
+        encode = MAILBOX_CODECS[name]
+        data = Message.command('notify', 'a5d7c8e1', 'arbiter',
+                               ({'mailbox': 2, 'sockets': [], 'age': 34.5},),
+                               None).data
+        for _ in range(self.num_messages):
+            decode_message(encode(data))
+
+    def test_pickle(self):
+        self.codec('pickle')
+
+    def test_compact(self):
+        self.codec('compact')
+
+
+class TestArbiterMailbox(unittest.TestCase):
+    '''Messages per second sent to the arbiter, with the
+    ``--mailbox-codec`` of the test run.'''
+    __benchmark__ = True
+    __number__ = 10
+    num_messages = 1000
+    benchmark_template = TestMailboxCodecs.benchmark_template
+
+    def getSummary(self, info, number, total_time, total_time2):
+        info['messages'] = int(number*self.num_messages/total_time)
+        return info
+
+    def test_ping(self):
+        result = yield multi_async((send('arbiter', 'ping')
+                                    for _ in range(self.num_messages)))
+        self.assertEqual(len(result), self.num_messages)
@@ -1,11 +1,12 @@
 '''Test Internet connections and wrapped socket methods in event loop.'''
 import socket
 
-from pulsar import Connection, Protocol, TcpServer, async_while
-from pulsar.utils.pep import get_event_loop, new_event_loop, ispy3k
+from pulsar import Connection, Protocol, TcpServer, async_while, Deferred
+from pulsar.utils.pep import get_event_loop, new_event_loop, ispy3k, ispy26
 from pulsar.utils.internet import is_socket_closed, format_address
 from pulsar.apps.test import unittest, run_test_server
 from pulsar.async.pollers import READ
+from pulsar.async.stream import SocketStreamTransport
 
 from examples.echo.manage import Echo, EchoServerProtocol
 
@@ -19,6 +20,22 @@ class SimpleProtocol(Protocol):
         self.transport = transport
 
 
+class BufferProtocol(SimpleProtocol):
+    buffer_protocol = True
+
+    def __init__(self, size):
+        self.size = size
+        self.views = []
+        self.received = bytearray()
+        self.done = Deferred()
+
+    def data_received(self, data):
+        self.views.append(data)
+        self.received += data
+        if len(self.received) == self.size:
+            self.done.callback(bytes(self.received))
+
+
 class TestEventLoop(unittest.TestCase):
 
     def test_create_connection_error(self):
@@ -44,6 +61,53 @@ class TestEventLoop(unittest.TestCase):
         self.assertRaises(KeyError, loop.io.handlers, fn)
         self.assertTrue(is_socket_closed(socket))
 
+    def test_writelines(self):
+        loop = new_event_loop(iothreadloop=False)
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        w = socket.create_connection(server.getsockname())
+        r, _ = server.accept()
+        server.close()
+        r.setblocking(False)
+        transport = SocketStreamTransport(loop, w, SimpleProtocol())
+        data = [b'a'*1000, b'', b'b'*(1 << 20), b'c', b'd'*100]
+        transport.writelines(data)
+        data = b''.join(data)
+        received = []
+        d = Deferred()
+
+        def _read():
+            received.append(r.recv(65536))
+            if sum(len(chunk) for chunk in received) == len(data):
+                d.callback(b''.join(received))
+        loop.add_reader(r.fileno(), _read)
+        result = loop.run_until_complete(d, timeout=10)
+        self.assertEqual(result, data)
+        self.assertFalse(transport._write_buffer)
+        transport.close()
+        loop.remove_reader(r.fileno())
+        r.close()
+
+    @unittest.skipIf(ispy26, 'Requires memoryview')
+    def test_buffer_protocol(self):
+        loop = new_event_loop(iothreadloop=False)
+        r, w = socket.socketpair()
+        data = b'abcdefgh'*1000
+        protocol = BufferProtocol(len(data))
+        transport = SocketStreamTransport(loop, r, protocol,
+                                          read_chunk_size=1000)
+        w.sendall(data)
+        result = loop.run_until_complete(protocol.done, timeout=5)
+        self.assertEqual(result, data)
+        self.assertTrue(len(protocol.views) > 1)
+        for view in protocol.views:
+            self.assertIsInstance(view, memoryview)
+            self.assertTrue(len(view) <= 1000)
+        self.assertTrue(transport._recv_view)
+        transport.close()
+        w.close()
+
     def test_start_serving_ipv6(self):
         loop = get_event_loop()
         sockets = yield loop.start_serving(Protocol,'::1', 0)
@@ -105,6 +169,91 @@ class TestEventLoop(unittest.TestCase):
         yield async_while(3, lambda: not is_socket_closed(sock))
         self.assertTrue(is_socket_closed(sock))
 
+    def test_max_concurrent_connections(self):
+        loop = new_event_loop(iothreadloop=False)
+        server = TcpServer(loop, '127.0.0.1', 0, EchoServerProtocol,
+                           max_concurrent_connections=2, accepts=10)
+        loop.run_until_complete(server.start_serving(), timeout=5)
+
+        def run(seconds):
+            d = Deferred()
+            loop.call_later(seconds, d.callback, None)
+            loop.run_until_complete(d)
+        clients = [socket.create_connection(server.address)
+                   for _ in range(3)]
+        run(0.3)
+        # The third connection waits in the backlog
+        self.assertEqual(server.received, 2)
+        self.assertFalse(server.accepting)
+        clients[0].close()
+        run(0.3)
+        self.assertEqual(server.received, 3)
+        self.assertFalse(server.accepting)
+        clients[1].close()
+        run(0.3)
+        self.assertTrue(server.accepting)
+        for client in clients[2:]:
+            client.close()
+        server.stop_serving()
+        run(0.1)
+        self.assertFalse(server.accepting)
+
+    def test_max_connections(self):
+        loop = new_event_loop(iothreadloop=False)
+        server = TcpServer(loop, '127.0.0.1', 0, EchoServerProtocol,
+                           max_connections=1)
+        loop.run_until_complete(server.start_serving(), timeout=5)
+        clients = [socket.create_connection(server.address)
+                   for _ in range(2)]
+        d = Deferred()
+        loop.call_later(0.3, d.callback, None)
+        loop.run_until_complete(d)
+        # Connections exceeding max_connections are not accepted
+        self.assertEqual(server.received, 1)
+        self.assertFalse(server.accepting)
+        for client in clients:
+            client.close()
+        server.stop_serving()
+
+    def test_drain(self):
+        loop = new_event_loop(iothreadloop=False)
+        server = TcpServer(loop, '127.0.0.1', 0, EchoServerProtocol)
+        loop.run_until_complete(server.start_serving(), timeout=5)
+        idle = socket.create_connection(server.address)
+        busy = socket.create_connection(server.address)
+        busy.sendall(b'Hello')
+        d = Deferred()
+        loop.call_later(0.3, d.callback, None)
+        loop.run_until_complete(d)
+        self.assertEqual(server.concurrent_connections, 2)
+        drained = server.drain(5)
+        self.assertFalse(server.accepting)
+        # The idle connection is closed, the busy one finishes its request
+        separator = EchoServerProtocol.separator
+        busy.sendall(separator)
+        loop.run_until_complete(drained, timeout=5)
+        self.assertEqual(server.concurrent_connections, 0)
+        self.assertEqual(idle.recv(16), b'')
+        self.assertEqual(busy.recv(16), b'Hello' + separator)
+        idle.close()
+        busy.close()
+        server.stop_serving()
+
+    def test_drain_timeout(self):
+        loop = new_event_loop(iothreadloop=False)
+        server = TcpServer(loop, '127.0.0.1', 0, EchoServerProtocol)
+        loop.run_until_complete(server.start_serving(), timeout=5)
+        busy = socket.create_connection(server.address)
+        busy.sendall(b'Hello')
+        d = Deferred()
+        loop.call_later(0.3, d.callback, None)
+        loop.run_until_complete(d)
+        loop.run_until_complete(server.drain(0.5), timeout=5)
+        self.assertEqual(server.concurrent_connections, 0)
+        self.assertEqual(busy.recv(16), b'')
+        busy.close()
+        server.stop_serving()
+
     @unittest.skipUnless(ispy3k, 'Requires python 3')
     def test_create_connection_local_addr(self):
         from test.support import find_unused_port
@@ -3,6 +3,7 @@ import struct
 
 from pulsar import ProtocolError
 from pulsar.apps.test import unittest
+from pulsar.utils.pep import ispy26
 from pulsar.utils.websocket import Frame, int2bytes, i2b, FrameParser
 import pulsar.apps.ws
 
@@ -113,8 +114,54 @@ class FrameTest(unittest.TestCase):
         self.assertTrue(pframe)
         self.assertEqual(pframe.payload_length, len(self.large_bdata))
         self.assertEqual(pframe.body, self.large_bdata)
-        
-        
+
+    @unittest.skipIf(ispy26, 'Requires memoryview')
+    def testPartialParsingBuffer(self):
+        # Parse from a reusable buffer, as a transport reading with
+        # recv_into would do
+        p = FrameParser()
+        frame = Frame(self.bdata, opcode=0x2, final=True, masking_key='ciao')
+        msg = bytes(frame.msg + frame.msg)
+        buffer = bytearray(100)
+        view = memoryview(buffer)
+        frames = []
+        for i in range(0, len(msg), 100):
+            chunk = msg[i:i+100]
+            buffer[:len(chunk)] = chunk
+            pframe = p.decode(view[:len(chunk)])
+            while pframe:
+                frames.append(pframe)
+                pframe = p.decode()
+            # overwrite the buffer
+            buffer[:] = b'x'*100
+        self.assertEqual(len(frames), 2)
+        for pframe in frames:
+            self.assertEqual(pframe.masking_key, b'ciao')
+            self.assertEqual(pframe.body, self.bdata)
+
+    def testChunkedLargeFrame(self):
+        # A large frame followed by a small one, received in small chunks
+        p = FrameParser()
+        data = self.large_bdata*16
+        frame = Frame(data, opcode=0x2, final=True, masking_key='ciao')
+        small = Frame(self.bdata, opcode=0x2, final=True, masking_key='ciao')
+        msg = bytes(frame.msg + small.msg)
+        frames = []
+        for i in range(0, len(msg), 4096):
+            pframe = p.decode(msg[i:i+4096])
+            if not frames and not pframe:
+                # the partial payload is not kept in the parser buffer
+                self.assertFalse(p._buf and len(p._buf) > 14)
+            while pframe:
+                frames.append(pframe)
+                pframe = p.decode()
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames[0].payload_length, len(data))
+        self.assertEqual(frames[0].body, data)
+        self.assertEqual(frames[1].body, self.bdata)
+        self.assertEqual(p.decode(), None)
+
+
 class Extensions(unittest.TestCase):
     
     def testDeflate(self):